@@ -0,0 +1,61 @@
+"""
+Import-time benchmark for vorpal.
+Each scenario runs in a fresh interpreter so no module is cached, and the median of several runs is reported.
+Usage: python benchmarks/bench_import.py [--runs N] [--max-http-seconds S]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scenario name -> statement timed after interpreter startup
+SCENARIOS = {
+    'import vorpal': 'import vorpal',
+    'HTTP only (vorpal.BaseHttpEndpoint)': 'import vorpal; vorpal.BaseHttpEndpoint',
+    'browser (vorpal.WebDriverFactory)': 'import vorpal; vorpal.WebDriverFactory',
+    'everything (selenium.webdriver + vorpal.Base)': 'import selenium.webdriver, vorpal; [getattr(vorpal, name) '
+                                                     'for name in vorpal.__all__]',
+}
+
+TIMER = "import time; _start = time.perf_counter(); {statement}; print(time.perf_counter() - _start)"
+
+
+def time_statement(statement: str, runs: int) -> float:
+    """
+    Median seconds taken by statement across fresh interpreters.
+    :param statement: Python source to time
+    :param runs: number of interpreters to start
+    """
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, '-c', TIMER.format(statement=statement)], cwd=REPO_ROOT)
+        samples.append(float(output))
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7, help='fresh interpreters per scenario')
+    parser.add_argument('--max-http-seconds', type=float, default=None,
+                        help='exit non-zero if the HTTP-only import is slower than this')
+    args = parser.parse_args()
+
+    timings = {name: time_statement(statement, args.runs) for name, statement in SCENARIOS.items()}
+    width = max(len(name) for name in timings)
+    for name, seconds in timings.items():
+        print(f"{name:<{width}}  {seconds * 1000:8.1f} ms")
+    http_seconds = timings['HTTP only (vorpal.BaseHttpEndpoint)']
+    everything_seconds = timings['everything (selenium.webdriver + vorpal.Base)']
+    print(f"HTTP-only saving vs eager import: {(everything_seconds - http_seconds) * 1000:.1f} ms")
+
+    if args.max_http_seconds is not None and http_seconds > args.max_http_seconds:
+        print(f"HTTP-only import took {http_seconds:.3f}s, over the {args.max_http_seconds}s budget")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""
+Operation benchmark for vorpal.
+Runs the core element, wait, screenshot and HTTP operations against a latency-injecting in-process browser and a
+local HTTP stand-in, reports round trips, median wall time and peak allocations per call, and compares them with a
+stored baseline. A round trip more than the baseline, or time/allocations beyond the tolerance, is a regression.
+Usage: python benchmarks/bench_operations.py [--repeat N] [--latency-ms MS] [--items N] [--tolerance F]
+                                             [--baseline PATH] [--save-baseline]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from conftest import LocalServer  # noqa: E402
+from vorpal.Base import BaseHttpEndpoint, SimulatedWebDriver, wait_until  # noqa: E402
+from vorpal.Base.custom_selenium_driver import CustomSeleniumDriver  # noqa: E402
+from vorpal.Base.simulated_driver import SimulatedBrowser  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_operations.json')
+
+PAGE_URL = 'http://bench.test/'
+
+HEADING = {'Element name': 'Heading', 'locator_type': 'css_selector', 'locator': 'h1'}
+READY = {'Element name': 'Ready', 'locator_type': 'id', 'locator': 'ready'}
+
+
+def page_html(items: int) -> str:
+    """Benchmark page with a heading, a small form and a list of items."""
+    rows = ''.join(f'<li class="item">Item {index}</li>' for index in range(items))
+    return (f'<title>Bench</title><h1>Benchmark</h1><p id="ready">Ready</p>'
+            f'<form><input id="name" name="name"><input type="checkbox" id="agree"></form><ul>{rows}</ul>')
+
+
+class LatencyBrowser(SimulatedBrowser):
+    """SimulatedBrowser that counts every command and sleeps before answering, like a remote browser would."""
+
+    def __init__(self, pages: dict, latency: float):
+        """
+        :param pages: {url: html} served by the browser
+        :param latency: seconds added to every command
+        """
+        super().__init__(pages)
+        self.latency = latency
+        self.commands = Counter()
+
+    def execute(self, command: str, params: dict) -> dict:
+        self.commands[command] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return super().execute(command, params)
+
+
+def serve_stand_in(latency: float) -> None:
+    """Run the shared echoing LocalServer until stdin closes, printing its port first (see start_stand_in)."""
+    with LocalServer(latency=latency) as server:
+        print(server.server_address[1], flush=True)
+        sys.stdin.read()
+
+
+def start_stand_in(latency: float):
+    """
+    Start the HTTP stand-in in its own interpreter, so its work is neither timed nor traced with the client's.
+    :param latency: seconds added to every response
+    :return: (process, base_url); close process.stdin to stop it
+    """
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve-http', '--latency-ms',
+                                str(latency * 1000)], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    port = int(process.stdout.readline())
+    return process, f'http://127.0.0.1:{port}'
+
+
+class Bench:
+    """Driver, endpoint and round-trip counters shared by the operations."""
+
+    def __init__(self, latency: float, items: int, screenshot_root: str, base_url: str):
+        webdriver = SimulatedWebDriver()
+        self.browser = webdriver.command_executor = LatencyBrowser({PAGE_URL: page_html(items)}, latency)
+        self.driver = CustomSeleniumDriver(webdriver, implicit_wait=0, screenshot_root=screenshot_root)
+        self.endpoint = BaseHttpEndpoint(base_url)
+        self.requests = 0
+        self.endpoint.session.hooks['response'].append(self._count_response)
+
+    def _count_response(self, response, *args, **kwargs):
+        self.requests += 1
+
+    @property
+    def round_trips(self) -> int:
+        """WebDriver commands plus HTTP responses so far."""
+        return sum(self.browser.commands.values()) + self.requests
+
+    def reset(self) -> None:
+        """Load a fresh copy of the benchmark page."""
+        self.driver.get(PAGE_URL)
+
+    def close(self) -> None:
+        self.driver.quit()
+        self.endpoint.close()
+
+
+# Operation name -> setup(bench) returning the callable that is measured; setup itself is not measured
+def _element_text(bench):
+    element = bench.driver.get_element(HEADING)
+    element.element
+    return lambda: element.text
+
+
+def _click(bench):
+    element = bench.driver.find_element_by_id('agree')
+    element.element
+    return element.click
+
+
+def _set_value(bench):
+    element = bench.driver.find_element_by_id('name')
+    element.element
+    return lambda: element.set_value('benchmark')
+
+
+def _iterate_elements(bench):
+    return lambda: [item.text for item in bench.driver.find_elements_by_css_selector('li.item')]
+
+
+def _collection_texts(bench):
+    return lambda: bench.driver.find_elements_by_css_selector('li.item').texts()
+
+
+def _get_element(bench):
+    return lambda: bench.driver.get_element(HEADING).element
+
+
+def _wait_until(bench):
+    return lambda: wait_until(lambda: bench.driver.get_element(READY).is_displayed, timeout_seconds=1)
+
+
+def _wait_for(bench):
+    return lambda: bench.driver.wait_for(READY, 'visible', timeout=1)
+
+
+def _take_screen_shot(bench):
+    return lambda: bench.driver.take_screen_shot('bench', directory='.')
+
+
+def _http(verb, *args):
+    return lambda bench: lambda: getattr(bench.endpoint, verb)('/items/1', *args)
+
+
+OPERATIONS = OrderedDict([
+    ('ExtendedWebElement.text', _element_text),
+    ('ExtendedWebElement.click', _click),
+    ('ExtendedWebElement.set_value', _set_value),
+    ('find_elements + item.text', _iterate_elements),
+    ('find_elements + texts()', _collection_texts),
+    ('get_element', _get_element),
+    ('wait_until(is_displayed)', _wait_until),
+    ('wait_for(visible)', _wait_for),
+    ('take_screen_shot', _take_screen_shot),
+    ('BaseHttpEndpoint.GET', _http('GET', {'q': 'x'})),
+    ('BaseHttpEndpoint.POST', _http('POST', {'name': 'x'})),
+    ('BaseHttpEndpoint.PUT', _http('PUT', {'name': 'x'})),
+    ('BaseHttpEndpoint.PATCH', _http('PATCH', {'name': 'x'})),
+    ('BaseHttpEndpoint.DELETE', _http('DELETE')),
+])
+
+
+def measure(bench: Bench, setup, repeat: int) -> dict:
+    """
+    Measure one operation.
+    :param bench: Bench the operation runs against
+    :param setup: function(bench) returning the operation
+    :param repeat: timed calls
+    :return: {'round_trips': per call, 'ms': median wall time per call, 'alloc_kib': peak traced memory of one call}
+    """
+    bench.reset()
+    operation = setup(bench)
+    operation()
+
+    start = bench.round_trips
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - began)
+    round_trips = (bench.round_trips - start) / repeat
+
+    tracemalloc.start()
+    try:
+        operation()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'round_trips': round_trips, 'ms': round(statistics.median(samples) * 1000, 3),
+            'alloc_kib': round(peak / 1024, 1)}
+
+
+def run_benchmarks(repeat: int = 20, latency: float = 0.001, items: int = 50, operations=None) -> dict:
+    """
+    Measure every operation.
+    :param repeat: (optional) timed calls per operation
+    :param latency: (optional) seconds added to every WebDriver command and HTTP response
+    :param items: (optional) list length used by the find_elements operations
+    :param operations: (optional) names of the operations to run (default: all of OPERATIONS)
+    :return: {'latency_ms', 'items', 'operations': {name: measure() result}}
+    """
+    process, base_url = start_stand_in(latency)
+    try:
+        with tempfile.TemporaryDirectory() as screenshot_root:
+            bench = Bench(latency, items, screenshot_root, base_url)
+            try:
+                results = OrderedDict((name, measure(bench, OPERATIONS[name], repeat))
+                                      for name in (operations or OPERATIONS))
+            finally:
+                bench.close()
+    finally:
+        process.stdin.close()
+        process.wait()
+    return {'latency_ms': latency * 1000, 'items': items, 'operations': results}
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.5) -> list:
+    """
+    Regressions of results against baseline.
+    Any extra round trip is a regression. Wall time and allocations are only compared when both runs used the same
+    latency and item count, and must exceed the baseline by more than tolerance (plus a small absolute margin).
+    :param results: run_benchmarks() result
+    :param baseline: earlier run_benchmarks() result
+    :param tolerance: (optional) allowed relative increase of wall time and allocations
+    :return: list of messages, empty when nothing regressed
+    """
+    comparable = (results['latency_ms'], results['items']) == (baseline['latency_ms'], baseline['items'])
+    regressions = []
+    for name, current in results['operations'].items():
+        previous = baseline['operations'].get(name)
+        if previous is None:
+            continue
+        if current['round_trips'] > previous['round_trips']:
+            regressions.append(f"{name}: {current['round_trips']:g} round trips, baseline {previous['round_trips']:g}")
+        if not comparable:
+            continue
+        if current['ms'] > previous['ms'] * (1 + tolerance) + 0.2:
+            regressions.append(f"{name}: {current['ms']:.2f} ms, baseline {previous['ms']:.2f} ms")
+        if current['alloc_kib'] > previous['alloc_kib'] * (1 + tolerance) + 1:
+            regressions.append(f"{name}: {current['alloc_kib']:.1f} KiB allocated, "
+                               f"baseline {previous['alloc_kib']:.1f} KiB")
+    return regressions
+
+
+def report(results: dict, baseline: dict = None) -> str:
+    """Table of results, with the baseline's round trips and time alongside when given."""
+    operations = results['operations']
+    width = max(len(name) for name in operations)
+    lines = [f"{'operation':<{width}}  {'trips':>6}  {'ms':>8}  {'KiB':>7}" + ('  baseline' if baseline else '')]
+    for name, result in operations.items():
+        line = f"{name:<{width}}  {result['round_trips']:>6g}  {result['ms']:>8.2f}  {result['alloc_kib']:>7.1f}"
+        previous = (baseline or {}).get('operations', {}).get(name)
+        if previous:
+            line += f"  {previous['round_trips']:g} trips, {previous['ms']:.2f} ms"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='timed calls per operation')
+    parser.add_argument('--latency-ms', type=float, default=1.0, help='latency added to every round trip')
+    parser.add_argument('--items', type=int, default=50, help='list length for the find_elements operations')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed relative increase of wall time and allocations')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--serve-http', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_http:
+        serve_stand_in(args.latency_ms / 1000)
+        return 0
+
+    results = run_benchmarks(args.repeat, args.latency_ms / 1000, args.items)
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    print(report(results, baseline))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+            baseline_file.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if baseline is None:
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Shared fixtures: a local HTTP stand-in server for the HTTP tests and the operation benchmark"""
+import json
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+ReceivedRequest = namedtuple('ReceivedRequest', 'method path headers')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Echoes method, path, headers and body back as JSON over keep-alive connections, after the server's latency.
+    Subclasses override respond() to serve something else; every request is recorded on the server either way.
+    """
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; without TCP_NODELAY each response waits for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def handle_request(self):
+        self.server.record(self)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.respond()
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
+
+    def respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.send_body(self.status(), json.dumps({
+            'method': self.command,
+            'path': self.path,
+            'headers': dict(self.headers),
+            'body': self.rfile.read(length).decode(),
+        }).encode(), {'Content-Type': 'application/json'})
+
+    def status(self) -> int:
+        return 200
+
+    def send_body(self, status: int, body: bytes, headers: dict = None):
+        """
+        Send a complete response with a Content-Length
+        :param status: HTTP status code
+        :param body: response body
+        :param headers: extra response headers
+        """
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalServer(ThreadingHTTPServer):
+    """Threaded HTTP server on an ephemeral 127.0.0.1 port that records the requests and connections it sees"""
+    daemon_threads = True
+
+    def __init__(self, handler_class=StandInHandler, latency: float = 0.0):
+        """
+        :param handler_class: StandInHandler subclass answering the requests
+        :param latency: seconds added before every response
+        """
+        super().__init__(('127.0.0.1', 0), handler_class)
+        self.latency = latency
+        self.requests = []
+        self.connections = set()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+    def record(self, handler: BaseHTTPRequestHandler):
+        with self._lock:
+            self.requests.append(ReceivedRequest(handler.command, handler.path, dict(handler.headers)))
+            self.connections.add(handler.client_address)
+
+    def reset(self):
+        "Forget the requests and connections seen so far"
+        with self._lock:
+            self.requests.clear()
+            self.connections.clear()
+
+    def start(self) -> 'LocalServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+@pytest.fixture(scope="module")
+def local_server():
+    "Echoing LocalServer shared by the tests of a module"
+    with LocalServer() as server:
+        yield server
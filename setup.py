@@ -12,7 +12,7 @@ setup(
     classifiers=[
         'Development Status :: 3 - Alpha',
         'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
     ],
     keywords='test automation qa',
     project_urls={
@@ -23,6 +23,9 @@ setup(
         'selenium',
         'requests'
     ],
-    python_requires='>=3.6',
+    extras_require={
+        'async': ['aiohttp'],
+    },
+    python_requires='>=3.7',
     package_data={},
 )
\ No newline at end of file
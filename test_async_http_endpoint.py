@@ -0,0 +1,127 @@
+"""Tests for AsyncHttpEndpoint against a local asyncio HTTP stand-in server"""
+import asyncio
+import json
+import pytest
+from vorpal import AsyncHttpEndpoint
+
+aiohttp = pytest.importorskip('aiohttp')
+
+
+class StandInServer:
+    "Minimal keep-alive HTTP/1.1 server that echoes each request as JSON"
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.server = None
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{}/'.format(self.server.sockets[0].getsockname()[1])
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode().split(' ', 2)
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode().rstrip('\r\n')
+                    if not line:
+                        break
+                    key, value = line.split(':', 1)
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+                await asyncio.sleep(self.delay)
+                self.in_flight -= 1
+
+                status = 404 if path.startswith('/missing') else 200
+                payload = json.dumps({'method': method, 'path': path, 'headers': headers,
+                                      'body': body.decode()}).encode()
+                writer.write('HTTP/1.1 {} X\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n'
+                             .format(status, len(payload)).encode() + payload)
+                await writer.drain()
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+@pytest.mark.parametrize('verb', ['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+def test_verbs(verb):
+    "Test that every verb mirrors BaseHttpEndpoint and returns a read response"
+    async def scenario():
+        async with StandInServer() as server, AsyncHttpEndpoint(server.base_url) as endpoint:
+            return await getattr(endpoint, verb)('/users')
+
+    response = run(scenario())
+    assert response.status_code == 200
+    assert response.json()['method'] == verb
+    assert response.json()['path'] == '/users'
+
+def test_query_params_json_and_form():
+    "Test query_params and is_json semantics"
+    async def scenario():
+        async with StandInServer() as server, AsyncHttpEndpoint(server.base_url) as endpoint:
+            get = await endpoint.GET('/search', {'q': 'vorpal'})
+            as_json = await endpoint.POST('/users', {'a': 1})
+            as_form = await endpoint.POST('/users', {'a': 'b'}, is_json=False)
+            return get, as_json, as_form
+
+    get, as_json, as_form = run(scenario())
+    assert get.json()['path'] == '/search?q=vorpal'
+    assert json.loads(as_json.json()['body']) == {'a': 1}
+    assert as_form.json()['body'] == 'a=b'
+
+def test_query_params_normalized_like_requests():
+    "Test that None values are dropped and other values sent as strings, as requests does"
+    async def scenario():
+        async with StandInServer() as server, AsyncHttpEndpoint(server.base_url) as endpoint:
+            return await endpoint.GET('/search', {'a': None, 'b': True, 'c': 1.5, 'd': [1, None, 'x'], 'e': b'y'})
+
+    assert run(scenario()).json()['path'] == '/search?b=True&c=1.5&d=1&d=x&e=y'
+
+def test_concurrent_fan_out_on_pooled_connections():
+    "Test that requests run concurrently and reuse pooled connections"
+    async def scenario():
+        async with StandInServer(delay=0.05) as server, \
+                AsyncHttpEndpoint(server.base_url, pool_size=10) as endpoint:
+            for _ in range(2):
+                await asyncio.gather(*(endpoint.GET(f'/users/{i}') for i in range(10)))
+            return server
+
+    server = run(scenario())
+    assert server.max_in_flight == 10
+    assert server.connections == 10
+
+def test_defaults_and_errors():
+    "Test default headers/auth and raise_for_status"
+    async def scenario():
+        async with StandInServer() as server, \
+                AsyncHttpEndpoint(server.base_url, headers={'X-Suite': 'api'}, auth=('u', 'p'), timeout=5) as endpoint:
+            return await endpoint.GET('/'), await endpoint.GET('/missing')
+
+    found, missing = run(scenario())
+    assert found.json()['headers']['x-suite'] == 'api'
+    assert found.json()['headers']['authorization'].startswith('Basic ')
+    assert not missing.ok
+    with pytest.raises(Exception):
+        missing.raise_for_status()
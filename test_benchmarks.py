@@ -0,0 +1,49 @@
+"""Tests for the operation benchmark harness in benchmarks/bench_operations.py"""
+import importlib.util
+import json
+import os
+import pytest
+
+BENCH_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'bench_operations.py')
+
+
+@pytest.fixture(scope="module")
+def bench():
+    spec = importlib.util.spec_from_file_location('bench_operations', BENCH_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_round_trips_per_operation(bench):
+    results = bench.run_benchmarks(repeat=2, latency=0, items=5)
+    round_trips = {name: result['round_trips'] for name, result in results['operations'].items()}
+    assert list(round_trips) == list(bench.OPERATIONS)
+    assert round_trips['get_element'] == 1
+    assert round_trips['ExtendedWebElement.click'] == 1
+    assert round_trips['find_elements + texts()'] == 2
+    assert round_trips['find_elements + item.text'] == 1 + 5 * 2
+    assert round_trips['BaseHttpEndpoint.POST'] == 1
+    assert all(result['ms'] >= 0 and result['alloc_kib'] > 0 for result in results['operations'].values())
+
+
+def test_stored_baseline_covers_every_operation(bench):
+    with open(bench.DEFAULT_BASELINE) as baseline_file:
+        baseline = json.load(baseline_file)
+    assert set(baseline['operations']) == set(bench.OPERATIONS)
+
+
+def test_compare_flags_regressions(bench):
+    baseline = {'latency_ms': 1.0, 'items': 50,
+                'operations': {'click': {'round_trips': 1, 'ms': 1.0, 'alloc_kib': 1.0}}}
+    same = {'latency_ms': 1.0, 'items': 50,
+            'operations': {'click': {'round_trips': 1, 'ms': 1.1, 'alloc_kib': 1.2}}}
+    assert bench.compare(same, baseline) == []
+
+    slower = {'latency_ms': 1.0, 'items': 50,
+              'operations': {'click': {'round_trips': 2, 'ms': 3.0, 'alloc_kib': 10.0}}}
+    assert len(bench.compare(slower, baseline)) == 3
+
+    # Timings from a run with other settings are not comparable, round trips still are
+    slower['latency_ms'] = 0
+    assert bench.compare(slower, baseline) == ['click: 2 round trips, baseline 1']
@@ -0,0 +1,178 @@
+"""Tests for recording and replaying WebDriver and HTTP traffic with a Cassette"""
+import io
+import json
+import pytest
+from conftest import LocalServer, StandInHandler
+from vorpal import BaseHttpEndpoint, BasePage, Cassette, SimulatedWebDriver, custom_selenium_driver
+from vorpal.Base import CassetteMismatch
+from vorpal.Base.replay_driver import ReplayWebDriver
+
+
+class CreatedHandler(StandInHandler):
+    "Echoes every request, answering POST with 201 Created"
+
+    def status(self):
+        return 201 if self.command == 'POST' else 200
+
+
+@pytest.fixture(scope="module")
+def server():
+    with LocalServer(CreatedHandler) as server:
+        yield server
+
+
+@pytest.fixture
+def base_url(server):
+    return server.base_url
+
+
+SHOP = {'http://shop.test/': '<title>Shop</title><ul><li class="item">Apple<li class="item">Pear</ul>'
+                             '<a id="next" href="/next">Next</a>',
+        'http://shop.test/next': '<title>Next</title>'}
+
+
+class NextPage(BasePage):
+    "Page object navigated to with readiness other than 'load'"
+    url = 'http://shop.test/next'
+    ready = 'eager'
+
+    def isCurrentPage(self):
+        return self.driver.title == 'Next'
+
+
+def run_scenario(driver):
+    driver.get('http://shop.test/')
+    texts = driver.find_elements_by_class_name('item').texts()
+    heading = driver.title
+    driver.find_element_by_id('next').click()
+    return texts, heading, driver.title
+
+
+def test_http_exchanges_replay_without_server(tmp_path, server, base_url):
+    path = str(tmp_path / 'api.jsonl')
+    with Cassette(path) as cassette:
+        assert cassette.mode == 'record'
+        endpoint = cassette.wrap_endpoint(BaseHttpEndpoint(base_url))
+        recorded = [endpoint.GET('/users', {'b': 2, 'a': 1}).json(),
+                    endpoint.POST('/users', {'name': 'Ann', 'age': 3}).json(),
+                    endpoint.DELETE('/users/1').status_code]
+    hits = len(server.requests)
+
+    replay = Cassette(path)
+    assert replay.mode == 'replay' and len(replay) == 3
+    endpoint = replay.wrap_endpoint(BaseHttpEndpoint('http://127.0.0.1:9'))
+    # Query parameter order and JSON key order are normalized away
+    assert endpoint.GET('/users/', {'a': 1, 'b': 2}).json() == recorded[0]
+    response = endpoint.POST('/users', {'age': 3, 'name': 'Ann'})
+    assert (response.status_code, response.json()) == (201, recorded[1])
+    assert response.from_cassette
+    assert endpoint.DELETE('/users/1').status_code == recorded[2]
+    assert len(server.requests) == hits
+    assert replay.unused() == []
+
+
+def test_unmatched_request_reports_closest(tmp_path, base_url):
+    path = str(tmp_path / 'api.jsonl')
+    with Cassette(path) as cassette:
+        cassette.wrap_endpoint(BaseHttpEndpoint(base_url)).GET('/users', {'page': 1})
+
+    endpoint = Cassette(path, mode='replay').wrap_endpoint(BaseHttpEndpoint(base_url))
+    with pytest.raises(CassetteMismatch) as error:
+        endpoint.GET('/users', {'page': 2})
+    assert error.value.request == 'GET /users?page=2'
+    assert error.value.closest == ['GET /users?page=1 (query differ)']
+
+
+def test_new_episodes_rerecords_partially(tmp_path, server, base_url):
+    path = str(tmp_path / 'api.jsonl.gz')
+    with Cassette(path) as cassette:
+        endpoint = cassette.wrap_endpoint(BaseHttpEndpoint(base_url))
+        endpoint.GET('/kept')
+        endpoint.GET('/refreshed')
+
+    hits = len(server.requests)
+    rerecord = lambda request: request.path_url == '/refreshed'
+    with Cassette(path, mode='new_episodes', rerecord=rerecord) as cassette:
+        endpoint = cassette.wrap_endpoint(BaseHttpEndpoint(base_url))
+        endpoint.GET('/kept')
+        endpoint.GET('/refreshed')
+        endpoint.GET('/added')
+        assert [mismatch.request for mismatch in cassette.mismatches] == ['GET /added']
+    assert len(server.requests) == hits + 2
+
+    replay = Cassette(path, mode='replay')
+    assert sorted(json.loads(interaction.key)['path'] for interaction in Cassette.load(path)) == \
+        ['/added', '/kept', '/refreshed']
+    endpoint = replay.wrap_endpoint(BaseHttpEndpoint(base_url))
+    assert endpoint.GET('/added').json()['path'] == '/added'
+    assert len(server.requests) == hits + 2
+
+
+def test_streamed_download_replays(tmp_path, base_url):
+    path = str(tmp_path / 'api.jsonl')
+    with Cassette(path) as cassette:
+        cassette.wrap_endpoint(BaseHttpEndpoint(base_url)).download('/export', io.BytesIO())
+
+    destination = io.BytesIO()
+    endpoint = Cassette(path).wrap_endpoint(BaseHttpEndpoint(base_url))
+    response = endpoint.download('/export', destination, chunk_size=4)
+    assert json.loads(destination.getvalue())['path'] == '/export'
+    assert response.transfer.chunks > 1
+
+
+def test_webdriver_session_replays_without_browser(tmp_path):
+    path = str(tmp_path / 'shop.jsonl.gz')
+    with Cassette(path) as cassette:
+        driver = cassette.driver(lambda: custom_selenium_driver.CustomSeleniumDriver(SimulatedWebDriver(SHOP)))
+        recorded = run_scenario(driver)
+        driver.quit()
+    assert recorded == (['Apple', 'Pear'], 'Shop', 'Next')
+
+    cassette = Cassette(path)
+    driver = cassette.driver()
+    assert isinstance(driver.driver, ReplayWebDriver)
+    assert run_scenario(driver) == recorded
+    driver.quit()
+    assert cassette.unused() == []
+
+
+def test_readiness_navigation_replays(tmp_path):
+    path = str(tmp_path / 'shop.jsonl')
+    with Cassette(path) as cassette:
+        driver = cassette.driver(lambda: custom_selenium_driver.CustomSeleniumDriver(SimulatedWebDriver(SHOP)))
+        driver.get('http://shop.test/')
+        NextPage(driver, 'Next').goto(force=True)
+        NextPage(driver, 'Next').goto(ready='page', force=True)
+        recorded = driver.title
+
+    cassette = Cassette(path)
+    driver = cassette.driver()
+    driver.get('http://shop.test/')
+    NextPage(driver, 'Next').goto(force=True)
+    NextPage(driver, 'Next').goto(ready='page', force=True)
+    assert driver.title == recorded == 'Next'
+    assert cassette.unused() == []
+
+
+def test_changed_test_code_reports_mismatch(tmp_path):
+    path = str(tmp_path / 'shop.jsonl')
+    with Cassette(path) as cassette:
+        run_scenario(cassette.driver(lambda: custom_selenium_driver.CustomSeleniumDriver(SimulatedWebDriver(SHOP))))
+
+    driver = Cassette(path).driver()
+    driver.get('http://shop.test/')
+    with pytest.raises(CassetteMismatch) as error:
+        driver.find_element_by_id('previous').click()
+    assert error.value.channel == 'webdriver'
+    assert 'findElement' in error.value.request
+    assert 'params differ' in error.value.closest[0]
+
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / 'x.jsonl'), mode='sometimes')
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / 'x.jsonl')).driver()
+    (tmp_path / 'bad.jsonl').write_text('{"other": 1}\n')
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / 'bad.jsonl'))
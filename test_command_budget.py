@@ -0,0 +1,115 @@
+"""Tests for command budgets on page-object flows"""
+import pytest
+from vorpal import custom_selenium_driver, BasePage, Locator, SimulatedWebDriver, CommandBudgetExceeded, within_budget
+from vorpal.Base import Instrumentation, MemorySink
+
+LOGIN = """<title>Login</title><form action="/home">
+<input id="user" name="user"><input id="password" name="password" type="password">
+<button id="submit">Sign in</button></form>"""
+
+PAGES = {'http://app.test/login': LOGIN, 'http://app.test/home': '<title>Home</title>'}
+
+
+class LoginPage(BasePage):
+    "Page object with budgeted flows"
+    url = 'http://app.test/login'
+    user = Locator('user', 'id')
+    password = Locator('password', 'id')
+    submit = Locator('submit', 'id')
+
+    def isCurrentPage(self):
+        return True
+
+    @within_budget(max_commands=8)
+    def login(self, user, password):
+        self.user.set_value(user)
+        self.password.set_value(password)
+        self.submit.click()
+
+    @within_budget(max_commands=8, name='login with checks')
+    def careful_login(self, user, password):
+        for _ in range(2):
+            self.user.set_value(user)
+        self.password.set_value(password)
+        self.submit.click()
+
+
+@pytest.fixture
+def driver():
+    driver = custom_selenium_driver.CustomSeleniumDriver(SimulatedWebDriver(PAGES), implicit_wait=0)
+    driver.get('http://app.test/login')
+    return driver
+
+
+def test_block_within_budget(driver):
+    with driver.command_budget(max_commands=3, max_seconds=5) as budget:
+        driver.find_element_by_id('user').set_value('ann')
+    assert budget.command_count == 3
+    assert budget.commands[('clearElement', 'id=user')] == 1
+    assert driver.instrumentation is None
+
+
+def test_exceeded_budget_reports_commands_by_element(driver):
+    with pytest.raises(CommandBudgetExceeded) as error:
+        with driver.command_budget(max_commands=2, name='fill user'):
+            driver.get_element({'Element name': 'User', 'locator_type': 'id', 'locator': 'user'}).set_value('ann')
+    message = str(error.value)
+    assert message.startswith('Command budget exceeded in fill user: 3 commands (max 2)')
+    assert 'findElement' in message and 'clearElement' in message and 'sendKeysToElement' in message
+    assert error.value.budget.commands[('clearElement', 'User')] == 1
+
+
+def test_decorated_page_methods(driver):
+    page = LoginPage(driver, 'Login')
+    page.login('ann', 'secret')
+    assert driver.title == 'Home'
+
+    driver.get('http://app.test/login')
+    with pytest.raises(CommandBudgetExceeded, match='in login with checks: 10 commands'):
+        page.careful_login('ann', 'secret')
+
+
+def test_time_budget_and_existing_instrumentation(driver):
+    sink = MemorySink()
+    instrumentation = driver.enable_instrumentation(sink)
+    ticks = iter([0.0, 2.5])
+    budget = driver.command_budget(max_seconds=1.0)
+    budget.clock = lambda: next(ticks)
+    with pytest.raises(CommandBudgetExceeded, match=r'2\.500s \(max 1\.0s\)'):
+        with budget:
+            driver.title
+    # The driver's own instrumentation stays enabled and keeps its sinks
+    assert driver.instrumentation is instrumentation
+    assert instrumentation.sinks == [sink]
+    assert [record.name for record in sink.records] == ['getTitle']
+
+
+def test_errors_inside_block_are_not_masked(driver):
+    with pytest.raises(ZeroDivisionError):
+        with driver.command_budget(max_commands=0):
+            driver.title
+            1 / 0
+
+
+def test_driver_budget_as_decorator(driver):
+    budget = driver.command_budget(max_commands=1)
+
+    @budget
+    def read_title():
+        return driver.title
+
+    assert read_title() == 'Login'
+    assert read_title() == 'Login'
+
+
+def test_shared_instrumentation_counts_only_own_commands(driver):
+    other = custom_selenium_driver.CustomSeleniumDriver(SimulatedWebDriver(PAGES), implicit_wait=0)
+    instrumentation = Instrumentation()
+    driver.enable_instrumentation(instrumentation=instrumentation)
+    other.enable_instrumentation(instrumentation=instrumentation)
+    with driver.command_budget(max_commands=1) as budget:
+        driver.title
+        for _ in range(3):
+            other.title
+    assert budget.command_count == 1
+    assert instrumentation.session_of(driver.driver) != instrumentation.session_of(other.driver)
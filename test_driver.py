@@ -1,5 +1,8 @@
+import base64
+import os
 from unittest import mock
 import pytest
+from selenium.common.exceptions import JavascriptException, TimeoutException, WebDriverException
 from vorpal import custom_selenium_driver, By
 
 @pytest.fixture
@@ -22,10 +25,58 @@ def test_get_by_type(by_str, expected):
     d = custom_selenium_driver.CustomSeleniumDriver(mock.MagicMock())
     assert(d.get_by_type(by_str) == expected)
 
-def test_take_screen_shot(driver_and_mock):
-    d, driver_mock = driver_and_mock
-    d.take_screen_shot('test')
-    driver_mock.save_screenshot.assert_called_once()
+def test_take_screen_shot(tmp_path):
+    driver_mock = mock.MagicMock()
+    driver_mock.get_screenshot_as_base64.return_value = base64.b64encode(b'png bytes').decode()
+    d = custom_selenium_driver.CustomSeleniumDriver(driver_mock, screenshot_root=str(tmp_path))
+    path = d.take_screen_shot('test', directory='failures')
+    d.screenshot_writer.flush()
+    driver_mock.get_screenshot_as_base64.assert_called_once()
+    assert os.path.dirname(path) == str(tmp_path / 'failures')
+    with open(path, 'rb') as png_file:
+        assert png_file.read() == b'png bytes'
+
+def test_take_screen_shot_skips_identical_images_and_flushes_on_quit(tmp_path):
+    driver_mock = mock.MagicMock()
+    images = [b'first', b'first', b'second']
+    driver_mock.get_screenshot_as_base64.side_effect = [base64.b64encode(image).decode() for image in images]
+    d = custom_selenium_driver.CustomSeleniumDriver(driver_mock, screenshot_root=str(tmp_path))
+    paths = [d.take_screen_shot(f'shot{number}', directory='') for number in range(3)]
+    d.quit()
+    # The skipped image's path is the identical screenshot that was written
+    assert paths[1] == paths[0]
+    assert all(os.path.exists(path) for path in paths)
+    assert sorted(path.name.split('.')[0] for path in tmp_path.iterdir()) == ['shot0', 'shot2']
+    assert (d.screenshot_writer.written, d.screenshot_writer.skipped) == (2, 1)
+    driver_mock.quit.assert_called_once()
+
+def test_take_screen_shot_rewrites_identical_image_after_failure_or_elsewhere(tmp_path):
+    driver_mock = mock.MagicMock()
+    driver_mock.get_screenshot_as_base64.return_value = base64.b64encode(b'same').decode()
+    d = custom_selenium_driver.CustomSeleniumDriver(driver_mock, screenshot_root=str(tmp_path))
+    writer = d.screenshot_writer
+    paths = []
+    with mock.patch.object(writer, '_write', side_effect=OSError('disk full')):
+        paths.append(d.take_screen_shot('failed', directory=''))
+        with pytest.raises(OSError):
+            writer.flush()
+    paths.append(d.take_screen_shot('retried', directory=''))
+    paths.append(d.take_screen_shot('other', directory='other'))
+    paths.append(d.take_screen_shot('same', directory='other'))
+    writer.flush()
+    assert paths[1] != paths[0] and paths[2] != paths[1]
+    assert paths[3] == paths[2]
+    assert all(os.path.exists(path) for path in paths[1:])
+    assert (writer.written, writer.skipped) == (2, 1)
+
+def test_take_screen_shot_reports_write_errors_on_flush(tmp_path):
+    driver_mock = mock.MagicMock()
+    driver_mock.get_screenshot_as_base64.return_value = base64.b64encode(b'png').decode()
+    (tmp_path / 'blocked').write_text('a file where the directory should be')
+    d = custom_selenium_driver.CustomSeleniumDriver(driver_mock, screenshot_root=str(tmp_path))
+    d.take_screen_shot('test', directory='blocked')
+    with pytest.raises(OSError):
+        d.screenshot_writer.flush()
 
 @pytest.mark.parametrize("direction,expected", [
     ('up', 'window.scrollBy(0, -1000);'),
@@ -38,3 +89,85 @@ def test_scroll_window(driver_and_mock, direction, expected):
 
 
 
+def test_record_reresolve(driver_and_mock):
+    d, _ = driver_and_mock
+    d.record_reresolve('button')
+    d.record_reresolve('button')
+    assert d.reresolve_counts == {'button': 2}
+
+BUTTON = {'Element name': 'Button', 'locator_type': 'id', 'locator': 'button'}
+
+def test_wait_for_event_driven_single_command(driver_and_mock):
+    d, driver_mock = driver_and_mock
+    handle = mock.MagicMock(name='handle')
+    driver_mock.execute_async_script.return_value = {'status': 'ok', 'element': handle}
+
+    element = d.wait_for(BUTTON, 'visible', timeout=3, event_driven=True)
+
+    driver_mock.execute_async_script.assert_called_once()
+    assert driver_mock.execute_async_script.call_args[0][1:] == (By.ID, 'button', 'visible', None, 3000)
+    # The session's script timeout is raised for the wait and put back afterwards
+    assert [call.args for call in driver_mock.set_script_timeout.call_args_list] == [(4,), (30,)]
+    assert element.element is handle
+    driver_mock.find_element.assert_not_called()
+
+def test_wait_for_event_driven_timeout(driver_and_mock):
+    d, driver_mock = driver_and_mock
+    driver_mock.execute_async_script.return_value = {'status': 'timeout'}
+
+    with pytest.raises(TimeoutException):
+        d.wait_for(BUTTON, 'text', expected='Done', timeout=1, event_driven=True)
+
+def test_wait_for_falls_back_to_polling(driver_and_mock):
+    d, driver_mock = driver_and_mock
+    d.event_driven_waits = True
+    driver_mock.execute_async_script.side_effect = WebDriverException('unsupported')
+    handle = driver_mock.find_element.return_value
+    handle.is_displayed.return_value = True
+
+    element = d.wait_for(BUTTON, 'visible', timeout=1)
+
+    assert element.element is handle
+    assert d.async_waits_supported is False
+    d.wait_for(BUTTON, 'visible', timeout=1)
+    driver_mock.execute_async_script.assert_called_once()
+
+def test_wait_for_polls_once_after_script_error(driver_and_mock):
+    d, driver_mock = driver_and_mock
+    d.event_driven_waits = True
+    driver_mock.execute_async_script.side_effect = [JavascriptException('document unloaded'),
+                                                    {'status': 'ok', 'element': 'handle'}]
+    driver_mock.find_element.return_value.is_displayed.return_value = True
+
+    d.wait_for(BUTTON, 'visible', timeout=1)
+    assert d.async_waits_supported is True
+    assert d.wait_for(BUTTON, 'visible', timeout=1).element == 'handle'
+    driver_mock.find_element.assert_called_once()
+
+def test_wait_for_text_polling_reads_input_value(driver_and_mock):
+    d, driver_mock = driver_and_mock
+    handle = driver_mock.find_element.return_value
+    handle.tag_name = 'input'
+    handle.get_attribute.side_effect = lambda name: 'Done' if name == 'value' else ''
+    handle.text = ''
+
+    element = d.wait_for(BUTTON, 'text', expected='Done', timeout=1)
+
+    assert element.element is handle
+    driver_mock.execute_async_script.assert_not_called()
+
+def test_element_explicit_wait_polls_by_default(driver_and_mock):
+    d, driver_mock = driver_and_mock
+    handle = driver_mock.find_element.return_value
+    handle.is_displayed.return_value = True
+    handle.is_enabled.return_value = True
+
+    element = d.element_explicit_wait(BUTTON, timeout=1)
+
+    driver_mock.execute_async_script.assert_not_called()
+    assert element.element is handle
+
+def test_wait_for_rejects_unknown_state(driver_and_mock):
+    d, _ = driver_and_mock
+    with pytest.raises(ValueError):
+        d.wait_for(BUTTON, 'sparkling')
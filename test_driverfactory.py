@@ -12,3 +12,11 @@ def test_get_webdriver_instance(browser, expected):
     wdf = WebDriverFactory(browser, '', fake_webdriver)
     wdf.get_webdriver_instance()
     getattr(fake_webdriver, expected).assert_called_once()
+
+def test_page_load_strategy_is_passed_as_capability():
+    fake_webdriver = mock.MagicMock()
+    wdf = WebDriverFactory('chrome', '', fake_webdriver, page_load_strategy='eager')
+    wdf.get_webdriver_instance()
+    capabilities = fake_webdriver.Chrome.call_args[1]['desired_capabilities']
+    assert capabilities['pageLoadStrategy'] == 'eager'
+    assert capabilities['browserName'] == 'chrome'
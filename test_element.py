@@ -1,4 +1,5 @@
 from vorpal import ExtendedWebElement, By
+from vorpal.Base import scripts
 from unittest import mock
 import pytest
 
@@ -45,7 +46,17 @@ def test_click_js(element_and_drivers):
 
     e.click_js()
 
-    driver.execute_script.assert_called_once_with('document.querySelector("locator").click()')
+    # Not resolved yet: the script finds the element itself, still in a single call
+    driver.execute_script.assert_called_once_with(scripts.RUN_ACTIONS, [['click', [By.CSS_SELECTOR, 'locator', 1], []]])
+    driver.driver.find_element.assert_not_called()
+
+def test_click_js_passes_resolved_handle(element_and_drivers):
+    e, driver, element_mock = element_and_drivers
+
+    e.element
+    e.click_js()
+
+    driver.execute_script.assert_called_once_with(scripts.RUN_ACTIONS, [['click', element_mock, []]])
 
 def test_set_value(element_and_drivers):
     e, driver, element_mock = element_and_drivers
@@ -193,3 +204,140 @@ def test_convert_locator_to_css_errorc(by):
     except NotImplementedError:
         pass
 
+
+@pytest.fixture
+def snapshot_result():
+    return {
+        'tag_name': 'input',
+        'text': '',
+        'value': ' typed ',
+        'inner_text': '',
+        'is_displayed': True,
+        'is_enabled': True,
+        'is_selected': False,
+        'rect': {'x': 1, 'y': 2, 'width': 3, 'height': 4},
+        'attributes': {'href': None, 'class': 'field'},
+    }
+
+def test_snapshot_single_script_call(element_and_drivers, snapshot_result):
+    e, driver, element_mock = element_and_drivers
+    driver.execute_script.return_value = snapshot_result
+
+    snapshot = e.snapshot(['class'])
+
+    driver.execute_script.assert_called_once()
+    assert driver.execute_script.call_args[0][1:] == (element_mock, ['class'])
+    assert snapshot.display_text == 'typed'
+    assert snapshot.size == {'height': 4, 'width': 3}
+    assert snapshot.location == {'x': 1, 'y': 2}
+    assert snapshot.get_attribute('class') == 'field'
+
+def test_snapshot_is_immutable(element_and_drivers, snapshot_result):
+    e, driver, _ = element_and_drivers
+    driver.execute_script.return_value = snapshot_result
+
+    snapshot = e.snapshot()
+    with pytest.raises(AttributeError):
+        snapshot.text = 'a'
+    with pytest.raises(TypeError):
+        snapshot.rect['x'] = 5
+
+def test_snapshot_mode_serves_properties(snapshot_result):
+    driver = mock.MagicMock(name='driver')
+    element_mock = mock.MagicMock(name='element')
+    driver.driver.find_element.return_value = element_mock
+    driver.execute_script.return_value = snapshot_result
+    e = ExtendedWebElement(driver, 'name', 'locator', use_snapshot=True, snapshot_attributes=['class'])
+
+    assert e.text == 'typed'
+    assert e.tag_name == 'input'
+    assert e.is_displayed is True
+    assert e.is_enabled is True
+    assert e.is_selected is False
+    assert e.get_attribute('class') == 'field'
+    assert e.rect['width'] == 3
+
+    driver.execute_script.assert_called_once()
+    element_mock.is_displayed.assert_not_called()
+    element_mock.get_attribute.assert_not_called()
+
+def test_snapshot_invalidated_by_actions(snapshot_result):
+    driver = mock.MagicMock(name='driver')
+    driver.execute_script.return_value = snapshot_result
+    e = ExtendedWebElement(driver, 'name', 'locator', use_snapshot=True)
+
+    e.text
+    e.click()
+    e.text
+    assert driver.execute_script.call_count == 2
+
+def test_stale_element_reresolved_and_retried():
+    from selenium.common.exceptions import StaleElementReferenceException
+    driver = mock.MagicMock(name='driver')
+    driver.implicit_wait = 1
+    stale = mock.MagicMock(name='stale')
+    stale.click.side_effect = StaleElementReferenceException()
+    fresh = mock.MagicMock(name='fresh')
+    driver.driver.find_element.side_effect = [stale, fresh]
+    e = ExtendedWebElement(driver, 'button', 'locator')
+
+    e.click()
+
+    fresh.click.assert_called_once()
+    assert e.element is fresh
+    driver.record_reresolve.assert_called_once_with('button')
+
+def test_stale_nth_element_reresolved_by_index():
+    from selenium.common.exceptions import StaleElementReferenceException
+    driver = mock.MagicMock(name='driver')
+    driver.implicit_wait = 1
+    stale = mock.MagicMock(name='stale')
+    type(stale).text = mock.PropertyMock(side_effect=StaleElementReferenceException())
+    fresh = mock.MagicMock(name='fresh')
+    fresh.text = 'b'
+    driver.driver.find_elements.return_value = [mock.MagicMock(), fresh]
+    e = ExtendedWebElement(driver, None, 'li', nth_of_type=2, web_element=stale)
+
+    assert e.text_raw == 'b'
+    driver.record_reresolve.assert_called_once_with(f'{By.CSS_SELECTOR}=li')
+
+def test_stale_element_retried_only_once():
+    from selenium.common.exceptions import StaleElementReferenceException
+    driver = mock.MagicMock(name='driver')
+    driver.implicit_wait = 1
+    element_mock = mock.MagicMock(name='element')
+    element_mock.submit.side_effect = StaleElementReferenceException()
+    driver.driver.find_element.return_value = element_mock
+    e = ExtendedWebElement(driver, 'form', 'locator')
+
+    with pytest.raises(StaleElementReferenceException):
+        e.submit()
+    assert element_mock.submit.call_count == 2
+
+
+def test_navigation_invalidates_cached_handle():
+    from vorpal import custom_selenium_driver
+    selenium_driver = mock.MagicMock()
+    first, second = mock.Mock(name='first'), mock.Mock(name='second')
+    selenium_driver.find_element.side_effect = [first, second]
+    driver = custom_selenium_driver.CustomSeleniumDriver(selenium_driver)
+    e = ExtendedWebElement(driver, 'name', 'locator', use_snapshot=True)
+
+    assert e.element is first
+    assert e.element is first
+    driver.get('http://localhost/next')
+    assert e.element is second
+    assert selenium_driver.find_element.call_count == 2
+
+
+def test_navigation_invalidates_cached_snapshot():
+    from vorpal import custom_selenium_driver
+    selenium_driver = mock.MagicMock()
+    selenium_driver.execute_script.side_effect = [
+        {'tag_name': 'p', 'text': 'old'}, {'tag_name': 'p', 'text': 'new'}]
+    driver = custom_selenium_driver.CustomSeleniumDriver(selenium_driver)
+    e = ExtendedWebElement(driver, 'name', 'locator', use_snapshot=True)
+
+    assert e.cached_snapshot.text == 'old'
+    driver.refresh()
+    assert e.cached_snapshot.text == 'new'
@@ -0,0 +1,123 @@
+"""Unit tests for ElementCollection"""
+from unittest import mock
+import pytest
+from vorpal import custom_selenium_driver, ElementCollection, By
+from vorpal.Base import scripts
+
+@pytest.fixture
+def driver_and_handles():
+    driver_mock = mock.MagicMock(name='driver')
+    handles = [mock.MagicMock(name=f'handle{i}') for i in range(3)]
+    driver_mock.find_elements.return_value = handles
+    return custom_selenium_driver.CustomSeleniumDriver(driver_mock), driver_mock, handles
+
+def test_find_elements_resolves_once(driver_and_handles):
+    d, driver_mock, handles = driver_and_handles
+
+    collection = d.find_elements(By.CSS_SELECTOR, 'li')
+    elements = list(collection)
+
+    driver_mock.find_elements.assert_called_once_with(By.CSS_SELECTOR, 'li')
+    assert isinstance(collection, ElementCollection)
+    assert len(collection) == 3
+    assert [e.element for e in elements] == handles
+    assert [e.nth_of_type for e in elements] == [1, 2, 3]
+    driver_mock.find_element.assert_not_called()
+
+def test_get_elements_keeps_name(driver_and_handles):
+    d, _, _ = driver_and_handles
+
+    collection = d.get_elements({'Element name': 'Items', 'locator_type': 'css_selector', 'locator': 'li'})
+    assert collection[1].name == 'Items'
+
+def test_find_elements_by_variants(driver_and_handles):
+    d, driver_mock, _ = driver_and_handles
+
+    d.find_elements_by_xpath('//li')
+    driver_mock.find_elements.assert_called_once_with(By.XPATH, '//li')
+
+def test_texts_single_script(driver_and_handles):
+    d, driver_mock, handles = driver_and_handles
+    driver_mock.execute_script.return_value = ['a', 'b', 'c']
+
+    assert d.find_elements(By.CSS_SELECTOR, 'li').texts() == ['a', 'b', 'c']
+    driver_mock.execute_script.assert_called_once_with(scripts.COLLECTION_TEXTS, handles)
+
+def test_attributes(driver_and_handles):
+    d, driver_mock, handles = driver_and_handles
+    driver_mock.execute_script.return_value = ['x', None, 'z']
+
+    assert d.find_elements(By.CSS_SELECTOR, 'li').attributes('href') == ['x', None, 'z']
+    driver_mock.execute_script.assert_called_once_with(scripts.COLLECTION_ATTRIBUTES, handles, 'href')
+
+def test_visible_keeps_original_index(driver_and_handles):
+    d, driver_mock, handles = driver_and_handles
+    driver_mock.execute_script.return_value = [False, True, True]
+
+    visible = d.find_elements(By.CSS_SELECTOR, 'li').visible()
+    assert len(visible) == 2
+    assert visible[0].element is handles[1]
+    assert visible[0].nth_of_type == 2
+
+def test_filter_uses_snapshots(driver_and_handles):
+    d, driver_mock, handles = driver_and_handles
+    driver_mock.execute_script.return_value = [
+        {'tag_name': 'li', 'text': text, 'is_displayed': True, 'rect': {}, 'attributes': {}}
+        for text in ('keep', 'drop', 'keep')
+    ]
+
+    kept = d.find_elements(By.CSS_SELECTOR, 'li').filter(lambda snapshot: snapshot.text == 'keep')
+    driver_mock.execute_script.assert_called_once()
+    assert [e.element for e in kept] == [handles[0], handles[2]]
+
+def test_slice_returns_collection(driver_and_handles):
+    d, _, handles = driver_and_handles
+
+    tail = d.find_elements(By.CSS_SELECTOR, 'li')[1:]
+    assert isinstance(tail, ElementCollection)
+    assert tail[0].nth_of_type == 2
+
+def test_empty_collection_skips_script(driver_and_handles):
+    d, driver_mock, _ = driver_and_handles
+    driver_mock.find_elements.return_value = []
+
+    assert d.find_elements(By.CSS_SELECTOR, 'li').rects() == []
+    driver_mock.execute_script.assert_not_called()
+
+def test_stale_collection_requeried(driver_and_handles):
+    from selenium.common.exceptions import StaleElementReferenceException
+    d, driver_mock, handles = driver_and_handles
+    fresh = [mock.MagicMock(name=f'fresh{i}') for i in range(3)]
+    driver_mock.find_elements.side_effect = [handles, handles[:2], fresh]
+    driver_mock.execute_script.side_effect = [StaleElementReferenceException(), ['a', 'b', 'c']]
+
+    collection = d.find_elements(By.CSS_SELECTOR, 'li')
+    with mock.patch('selenium.webdriver.support.wait.time.sleep'):
+        assert collection.texts() == ['a', 'b', 'c']
+    # The re-query waited until the locator matched as many elements as before
+    assert collection.web_elements == fresh
+    assert d.reresolve_counts[f'{By.CSS_SELECTOR}=li'] == 1
+
+def test_stale_collection_that_changed_size_raises(driver_and_handles):
+    from selenium.common.exceptions import StaleElementReferenceException
+    d, driver_mock, handles = driver_and_handles
+    d.implicit_wait = 0
+    driver_mock.find_elements.side_effect = [handles, handles[:2]]
+    driver_mock.execute_script.side_effect = StaleElementReferenceException()
+
+    visible = d.find_elements(By.CSS_SELECTOR, 'li')[1:]
+    with pytest.raises(StaleElementReferenceException):
+        visible.texts()
+    assert visible.total == 3
+
+
+def test_collection_requeries_after_navigation():
+    selenium_driver = mock.MagicMock()
+    old_handles, new_handles = [mock.Mock(), mock.Mock()], [mock.Mock(), mock.Mock(), mock.Mock()]
+    selenium_driver.find_elements.side_effect = [old_handles, new_handles]
+    driver = custom_selenium_driver.CustomSeleniumDriver(selenium_driver)
+    collection = driver.find_elements_by_css_selector('li')
+    assert len(collection) == 2
+    driver.get('http://localhost/next')
+    assert len(collection) == 3
+    assert collection.web_elements == new_handles
@@ -1,6 +1,7 @@
 """Unit tests for expected conditions functions"""
 from unittest import mock
-from vorpal import wait_until
+import pytest
+from vorpal import wait_until, wait_any, wait_all, WaitTimeoutException
 
 def test_condition_called():
     """Test that the condition function is called only once if it immediately returns True"""
@@ -13,3 +14,59 @@ def test_condition_called_after_wait():
     condition = mock.MagicMock(side_effect=[False, True], polling_frequency_seconds=0.00001)
     wait_until(condition)
     assert condition.call_count == 2
+
+@pytest.fixture
+def fake_time():
+    "Patch the wait engine's clock and sleep so that sleeps advance time instantly"
+    now = [0.0]
+    sleeps = []
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+    with mock.patch('vorpal.Base.expected_condition.monotonic', lambda: now[0]), \
+            mock.patch('vorpal.Base.expected_condition.sleep', fake_sleep):
+        yield sleeps
+
+def test_wait_until_times_out(fake_time):
+    """Test that a condition that never becomes true raises after the deadline instead of looping forever"""
+    with pytest.raises(WaitTimeoutException) as error:
+        wait_until(lambda: False, timeout_seconds=2, polling_frequency_seconds=0.5)
+    assert error.value.polls == 5
+    assert sum(fake_time) == 2
+
+def test_wait_until_returns_value(fake_time):
+    """Test that wait_until returns the truthy value of the condition"""
+    assert wait_until(mock.MagicMock(side_effect=[None, 'ready'])) == 'ready'
+
+def test_wait_until_backoff(fake_time):
+    """Test that the polling delay grows by backoff up to max_polling_seconds"""
+    condition = mock.MagicMock(side_effect=[False] * 5 + [True])
+    wait_until(condition, polling_frequency_seconds=0.1, backoff=2, max_polling_seconds=0.5)
+    assert fake_time == [0.1, 0.2, 0.4, 0.5, 0.5]
+
+def test_wait_until_ignored_exceptions(fake_time):
+    """Test that ignored exceptions count as a falsy result"""
+    condition = mock.MagicMock(side_effect=[ValueError(), True])
+    assert wait_until(condition, ignored_exceptions=(ValueError,)) is True
+
+def test_wait_any_reports_fired_condition(fake_time):
+    """Test that wait_any checks every condition in each cycle and reports which one fired"""
+    success = mock.MagicMock(side_effect=[False, False])
+    error_toast = mock.MagicMock(side_effect=[False, 'toast'])
+    result = wait_any(success, error_toast)
+    assert result.index == 1
+    assert result.condition is error_toast
+    assert result.value == 'toast'
+    assert success.call_count == 2
+    assert len(fake_time) == 1
+
+def test_wait_all(fake_time):
+    """Test that wait_all returns once every condition is true in the same cycle"""
+    first = mock.MagicMock(return_value=1)
+    second = mock.MagicMock(side_effect=[False, 2])
+    assert wait_all(first, second) == [1, 2]
+
+def test_wait_all_times_out(fake_time):
+    """Test that wait_all raises if one condition never becomes true"""
+    with pytest.raises(WaitTimeoutException):
+        wait_all(lambda: True, lambda: False, timeout_seconds=1)
@@ -0,0 +1,104 @@
+"""Tests for filling many form fields with one script call"""
+from unittest import mock
+import pytest
+from vorpal import custom_selenium_driver, BasePage, Locator, SimulatedWebDriver
+from vorpal.Base import FieldResult, FormFillError
+
+SIGNUP = """<title>Sign up</title><form id="signup" action="/done">
+<input id="name" name="name"><textarea id="bio" name="bio">old</textarea>
+<select id="plan" name="plan"><option value="free">Free<option value="pro">Pro plan</select>
+<select id="tags" name="tags" multiple><option>a<option>b<option>c</select>
+<input type="checkbox" id="terms" name="terms"><input type="checkbox" id="news" name="news" checked>
+<input type="radio" name="size" value="s" id="small" checked><input type="radio" name="size" value="l" id="large">
+<input id="code" name="code" readonly value="X"><input id="locked" name="locked" disabled>
+<input type="file" id="avatar" name="avatar"><input id="search" name="search">
+</form>"""
+
+
+class SignupPage(BasePage):
+    "Page object for the sign-up form"
+    url = 'http://app.test/signup'
+    full_name = Locator('name', 'id')
+    bio = Locator('bio', 'id')
+    plan = Locator('plan', 'id')
+    tags = Locator('tags', 'id')
+    terms = Locator('terms', 'id')
+    news = Locator('news', 'id')
+    size = Locator('//input[@name="size"]', 'xpath')
+    code = Locator('code', 'id')
+    locked = Locator('locked', 'id')
+    avatar = Locator('avatar', 'id')
+    search = Locator('search', 'id')
+
+    def isCurrentPage(self):
+        return True
+
+
+@pytest.fixture
+def driver():
+    driver = custom_selenium_driver.CustomSeleniumDriver(
+        SimulatedWebDriver({'http://app.test/signup': SIGNUP}), implicit_wait=0)
+    driver.get('http://app.test/signup')
+    return driver
+
+
+@pytest.fixture
+def page(driver):
+    return SignupPage(driver, 'Sign up')
+
+
+def values(driver):
+    document = driver.driver.browser.document
+    return driver.driver.browser.form_data(next(e for e in document.iter() if e.attributes.get('id') == 'signup'))
+
+
+def test_fills_every_control_type_in_one_command(driver, page):
+    with driver.command_budget(max_commands=1):
+        results = page.fill_form({page.full_name: 'Ann', page.bio: 'Hello', page.plan: 'Pro plan', page.tags: ['a', 'c'],
+                                  page.terms: True, page.news: False, page.size: 'l'})
+    assert [result.error for result in results] == [None] * 7
+    assert results[0] == FieldResult('full_name', 'Ann', None)
+    assert values(driver) == [('name', 'Ann'), ('bio', 'Hello'), ('plan', 'pro'), ('tags', 'a'), ('tags', 'c'),
+                              ('terms', 'on'), ('size', 'l'), ('code', 'X'), ('avatar', ''),
+                              ('search', '')]
+    # Handles found by the script are kept, so later reads need no lookup
+    with driver.command_budget(max_commands=1):
+        assert page.full_name.get_attribute('value') == 'Ann'
+
+
+def test_attribute_names_and_resolved_handles(driver, page):
+    handle = page.full_name.element
+    calls = []
+    original = driver.execute_script
+    driver.execute_script = lambda script, *args: calls.append(args) or original(script, *args)
+    page.fill_form({'full_name': 'Bo', 'bio': 'Hi'})
+    (fields,), = calls
+    assert fields[0][0] is handle and fields[0][4] == 'Bo'
+    assert fields[1][:4] == [None, 'id', 'bio', 1]
+    assert page.bio.get_attribute('value') == 'Hi'
+
+
+def test_reports_per_field_failures(driver, page):
+    with pytest.raises(FormFillError) as error:
+        page.fill_form({page.code: 'Y', page.locked: 'x', page.plan: 'gold', page.full_name: 'ok'})
+    assert {failure.name: failure.error for failure in error.value.failures} == \
+        {'code': 'read-only', 'locked': 'disabled', 'plan': 'no option "gold"'}
+    assert 'code: read-only' in str(error.value)
+    assert page.full_name.get_attribute('value') == 'ok'
+
+    missing = {'Element name': 'Missing', 'locator_type': 'id', 'locator': 'missing'}
+    results = driver.fill_form([(missing, 'x'), (page.size, False)], raise_on_failure=False)
+    assert [result.error for result in results] == ['not found', 'a radio button cannot be unchecked']
+
+
+def test_keystroke_fields_use_send_keys(driver, page):
+    with mock.patch.object(type(page.search), 'set_value', autospec=True,
+                           side_effect=lambda element, value: element.send_keys(value)) as set_value:
+        page.fill_form({'full_name': 'Ann', 'search': 'kiwi', 'avatar': '/tmp/me.png'}, keystrokes=['search'])
+    # The keystroke field and the file input (which only accepts typed paths) fall back to set_value()
+    assert [call.args[1] for call in set_value.call_args_list] == ['kiwi', '/tmp/me.png']
+    assert page.search.get_attribute('value') == 'kiwi'
+    assert page.avatar.get_attribute('value') == '/tmp/me.png'
+    with pytest.raises(KeyError):
+        page.fill_form({'full_name': 'Ann'}, keystrokes=['bio'])
+
@@ -0,0 +1,133 @@
+"""Tests for the HttpCache layer of BaseHttpEndpoint.GET"""
+import pytest
+from conftest import LocalServer, StandInHandler
+from vorpal import BaseHttpEndpoint
+from vorpal.Base import HttpCache, MemoryCacheBackend, DiskCacheBackend
+from vorpal.Base.http_cache import CacheEntry
+
+
+class ValidatingHandler(StandInHandler):
+    "Serves /etag, /modified and /plain with their validators"
+
+    def respond(self):
+        headers = {}
+        if self.path.startswith('/etag'):
+            headers['ETag'] = '"v1"'
+            not_modified = self.headers.get('If-None-Match') == '"v1"'
+        elif self.path.startswith('/modified'):
+            headers['Last-Modified'] = 'Wed, 21 Oct 2015 07:28:00 GMT'
+            not_modified = self.headers.get('If-Modified-Since') == headers['Last-Modified']
+        else:
+            not_modified = False
+        if self.path.startswith('/private'):
+            headers['Cache-Control'] = 'private'
+        if self.path.startswith('/vary'):
+            headers['Vary'] = '*'
+
+        body = b'' if not_modified else (self.path + ' ' + self.headers.get('Authorization', '')).encode()
+        self.send_body(304 if not_modified else 200, body, headers)
+
+
+@pytest.fixture(scope="module")
+def server():
+    with LocalServer(ValidatingHandler) as server:
+        yield server
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+    return now
+
+@pytest.fixture
+def endpoint(server, clock):
+    server.reset()
+    cache = HttpCache(ttl=60, clock=lambda: clock[0])
+    with BaseHttpEndpoint(server.base_url, cache=cache) as endpoint:
+        yield endpoint
+
+def test_fresh_hit_skips_request(endpoint, server):
+    first = endpoint.GET('/plain', {'b': 2, 'a': 1})
+    second = endpoint.GET('/plain', {'a': 1, 'b': 2})
+    assert second.text == first.text
+    assert second.from_cache and not first.from_cache
+    assert len(server.requests) == 1
+    assert endpoint.cache.stats() == {'hits': 1, 'misses': 1, 'revalidations': 0}
+
+def test_query_params_are_part_of_key(endpoint, server):
+    endpoint.GET('/plain', {'a': 1})
+    endpoint.GET('/plain', {'a': 2})
+    assert len(server.requests) == 2
+
+@pytest.mark.parametrize('path,header', [
+    ('/etag', 'If-None-Match'),
+    ('/modified', 'If-Modified-Since'),
+])
+def test_stale_entry_revalidated(endpoint, server, clock, path, header):
+    endpoint.GET(path)
+    clock[0] += 120
+    response = endpoint.GET(path)
+
+    assert response.status_code == 200
+    assert response.text.split()[0] == path
+    assert header in server.requests[-1].headers
+    assert endpoint.cache.stats()['revalidations'] == 1
+
+    # Revalidation refreshes freshness
+    endpoint.GET(path)
+    assert len(server.requests) == 2
+
+def test_stale_entry_without_validators_refetched(endpoint, server, clock):
+    endpoint.GET('/plain')
+    clock[0] += 120
+    endpoint.GET('/plain')
+    assert 'If-None-Match' not in server.requests[-1].headers
+    assert endpoint.cache.stats()['misses'] == 2
+
+def test_per_call_bypass(endpoint, server):
+    endpoint.GET('/plain')
+    response = endpoint.GET('/plain', use_cache=False)
+    assert len(server.requests) == 2
+    assert not hasattr(response, 'from_cache')
+
+def test_credentials_are_part_of_key(endpoint, server):
+    shared = dict(base_url=endpoint.base_url, cache=endpoint.cache)
+    with BaseHttpEndpoint(auth=('ann', 'a'), **shared) as ann, BaseHttpEndpoint(auth=('bob', 'b'), **shared) as bob:
+        assert ann.GET('/plain').text != bob.GET('/plain').text
+        assert bob.GET('/plain').from_cache
+        assert ann.GET('/plain', headers={'Accept': 'text/csv'}).from_cache is False
+        assert ann.GET('/plain', headers={'Accept': 'text/csv'}).from_cache
+    assert len(server.requests) == 3
+
+def test_vary_and_private_responses(server, clock):
+    base_url = server.base_url
+    with BaseHttpEndpoint(base_url, cache=HttpCache(shared=True)) as endpoint:
+        for path in ('/vary', '/vary', '/private', '/private'):
+            assert not endpoint.GET(path).from_cache
+    with BaseHttpEndpoint(base_url, cache=HttpCache()) as endpoint:
+        endpoint.GET('/private')
+        assert endpoint.GET('/private').from_cache
+
+def test_memory_backend_lru_bound():
+    backend = MemoryCacheBackend(max_bytes=10)
+    entry = lambda content: CacheEntry('u', 200, 'OK', {}, content, None, 0)
+    backend.set('a', entry(b'12345'))
+    backend.set('b', entry(b'12345'))
+    backend.get('a')
+    backend.set('c', entry(b'12345'))
+    assert backend.get('b') is None
+    assert backend.get('a') is not None
+    assert backend.size == 10
+
+def test_disk_backend_shared(tmpdir):
+    path = str(tmpdir.join('cache.sqlite'))
+    entry = CacheEntry('u', 200, 'OK', {'ETag': '"v1"'}, b'body', 'utf-8', 5.0)
+    DiskCacheBackend(path).set('key', entry)
+    assert DiskCacheBackend(path).get('key') == entry
+
+def test_disk_backend_evicts_lru(tmpdir):
+    backend = DiskCacheBackend(str(tmpdir.join('cache.sqlite')), max_bytes=8)
+    backend.set('a', CacheEntry('u', 200, 'OK', {}, b'1234', None, 0))
+    backend.set('b', CacheEntry('u', 200, 'OK', {}, b'1234', None, 0))
+    backend.set('c', CacheEntry('u', 200, 'OK', {}, b'1234', None, 0))
+    assert backend.get('a') is None
+    assert len(backend) == 2
@@ -1,4 +1,8 @@
+import json
+import time
+import pytest
 from vorpal import BaseHttpEndpoint
+from vorpal.Base.base_http_endpoint import create_session
 
 def test_http_endpoint():
     """
@@ -7,3 +11,94 @@ def test_http_endpoint():
     github_api_endpoint = BaseHttpEndpoint("https://api.github.com")
     response_body = github_api_endpoint.GET('/').json()
     assert response_body["current_user_url"] == "https://api.github.com/user"
+
+
+@pytest.fixture
+def base_url(local_server):
+    local_server.reset()
+    return local_server.base_url + '/'
+
+@pytest.mark.parametrize('verb', ['GET', 'POST', 'PUT', 'PATCH', 'DELETE'])
+def test_verbs(base_url, verb):
+    "Test that every verb keeps its signature and reaches the server"
+    with BaseHttpEndpoint(base_url) as endpoint:
+        response = getattr(endpoint, verb)('/users')
+        assert response.json()['method'] == verb
+        assert response.json()['path'] == '/users'
+
+def test_connection_reused(base_url, local_server):
+    "Test that consecutive requests share one keep-alive connection"
+    with BaseHttpEndpoint(base_url) as endpoint:
+        for _ in range(5):
+            endpoint.GET('/', {'a': 1})
+    assert len(local_server.connections) == 1
+
+def test_default_headers_auth_timeout(base_url):
+    "Test that endpoint defaults are applied and per-call headers are merged"
+    with BaseHttpEndpoint(base_url, headers={'X-Suite': 'api'}, auth=('user', 'pass'), timeout=5) as endpoint:
+        headers = endpoint.GET('/', headers={'X-Call': '1'}).json()['headers']
+    assert headers['X-Suite'] == 'api'
+    assert headers['X-Call'] == '1'
+    assert headers['Authorization'].startswith('Basic ')
+
+def test_form_data(base_url):
+    "Test that is_json=False sends form data"
+    with BaseHttpEndpoint(base_url) as endpoint:
+        assert endpoint.POST('/', {'a': 'b'}, is_json=False).json()['body'] == 'a=b'
+
+def test_shared_session_not_closed(base_url, local_server):
+    "Test that endpoints share a given session's pool and leave it open on close"
+    session = create_session(pool_size=2, headers={'X-Shared': 'yes'})
+    with BaseHttpEndpoint(base_url, session=session) as users, BaseHttpEndpoint(base_url, session=session) as orders:
+        assert users.GET('/users').json()['headers']['X-Shared'] == 'yes'
+        orders.GET('/orders')
+    assert len(local_server.connections) == 1
+    assert session.get(base_url).status_code == 200
+    session.close()
+
+def test_batch_ordered_results(base_url, local_server):
+    "Test that batch returns results in input order, dispatching payloads per verb"
+    with BaseHttpEndpoint(base_url) as endpoint:
+        results = endpoint.batch([
+            ('GET', '/users/1'),
+            ('GET', '/users', {'page': 2}),
+            ('POST', '/orders', {'id': 1}),
+            ('POST', '/forms', {'a': 'b'}, {'is_json': False}),
+            ('DELETE', '/orders/1'),
+        ], max_workers=4)
+
+    assert [result.index for result in results] == [0, 1, 2, 3, 4]
+    echoed = [result.response.json() for result in results]
+    assert echoed[0]['path'] == '/users/1'
+    assert echoed[1]['path'] == '/users?page=2'
+    assert json.loads(echoed[2]['body']) == {'id': 1}
+    assert echoed[3]['body'] == 'a=b'
+    assert echoed[4]['method'] == 'DELETE'
+    assert len(local_server.connections) <= 4
+
+def test_batch_captures_exceptions(base_url):
+    "Test that a failing request is reported in its result instead of raised"
+    with BaseHttpEndpoint(base_url) as endpoint:
+        results = endpoint.batch([('GET', '/ok'), ('BREW', '/coffee')])
+    assert results[0].exception is None
+    assert isinstance(results[1].exception, AttributeError)
+    assert results[1].response is None
+
+def test_batch_completion_order(base_url):
+    "Test that ordered=False yields every result as a generator"
+    with BaseHttpEndpoint(base_url, pool_size=2) as endpoint:
+        results = endpoint.batch([('GET', f'/users/{i}') for i in range(20)], max_workers=8, ordered=False)
+        assert not isinstance(results, list)
+        results = list(results)
+        assert endpoint.pool_size == 8
+    assert sorted(result.index for result in results) == list(range(20))
+    assert all(result.response.status_code == 200 for result in results)
+
+def test_unordered_batch_sends_without_iteration(base_url, local_server):
+    "Test that ordered=False sends every request even if the results are never read"
+    with BaseHttpEndpoint(base_url) as endpoint:
+        endpoint.batch([('GET', f'/unread/{i}') for i in range(5)], ordered=False)
+        deadline = time.monotonic() + 5
+        while len([request for request in local_server.requests if request.path.startswith('/unread/')]) < 5:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
@@ -0,0 +1,59 @@
+"""Import-time regression tests: public names resolve lazily and API-only use never loads Selenium"""
+import subprocess
+import sys
+import pytest
+import vorpal
+import vorpal.Base
+
+
+def modules_loaded_by(statement):
+    # A fresh interpreter, since this one has long since imported Selenium
+    script = f"import sys; {statement}; print('\\n'.join(sys.modules))"
+    output = subprocess.check_output([sys.executable, '-c', script], universal_newlines=True)
+    return set(output.split())
+
+
+def test_import_vorpal_loads_nothing_heavy():
+    modules = modules_loaded_by('import vorpal')
+    assert 'selenium' not in modules
+    assert 'requests' not in modules
+    assert 'vorpal.Base.custom_selenium_driver' not in modules
+
+
+@pytest.mark.parametrize('name', ['BaseHttpEndpoint', 'AsyncHttpEndpoint', 'RetryPolicy', 'wait_until'])
+def test_api_only_names_do_not_load_selenium_webdriver(name):
+    modules = modules_loaded_by(f'import vorpal; vorpal.{name}')
+    assert 'selenium.webdriver' not in modules
+
+
+def test_http_modules_in_base_do_not_load_selenium():
+    modules = modules_loaded_by('from vorpal.Base import BaseHttpEndpoint, HttpCache, TransferStats, '
+                                'AsyncHttpEndpoint')
+    assert not any(module.startswith('selenium') for module in modules)
+
+
+def test_webdriver_factory_does_not_load_simulated_browser():
+    modules = modules_loaded_by('from vorpal.Base import WebDriverFactory')
+    assert 'vorpal.Base.simulated_driver' not in modules
+    assert 'vorpal.Base.simulated_dom' not in modules
+
+
+def test_public_names_resolve():
+    for package in (vorpal, vorpal.Base):
+        for name in package.__all__:
+            assert getattr(package, name) is not None
+            assert name in dir(package)
+    from vorpal import webdriver, By, Keys, custom_selenium_driver
+    from vorpal.Base.custom_selenium_driver import CustomSeleniumDriver
+    assert By.CSS_SELECTOR == 'css selector'
+    assert Keys.ENTER
+    assert webdriver.Chrome
+    assert custom_selenium_driver.CustomSeleniumDriver is CustomSeleniumDriver
+    assert vorpal.WebDriverFactory is vorpal.Base.WebDriverFactory
+
+
+def test_unknown_name_raises_attribute_error():
+    with pytest.raises(AttributeError):
+        vorpal.NotAThing
+    with pytest.raises(ImportError):
+        from vorpal.Base import NotAThing
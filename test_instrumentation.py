@@ -0,0 +1,203 @@
+"""Unit tests for command and action instrumentation"""
+import json
+from unittest import mock
+import pytest
+from selenium.common.exceptions import ElementNotInteractableException, TimeoutException
+from vorpal import custom_selenium_driver, By, ExtendedWebElement, RetryPolicy
+from vorpal.Base import BasePage, Instrumentation, MemorySink, JsonLinesSink, PrometheusTextSink
+from vorpal.Base.instrumentation import LatencyHistogram, prometheus_text
+
+
+class FakeRemote:
+    "Stand-in for a selenium RemoteWebDriver: every call goes through execute(), like the real one"
+    def __init__(self):
+        self.commands = []
+        self.failures = {}
+
+    def execute(self, driver_command, params=None):
+        self.commands.append(driver_command)
+        if self.failures.get(driver_command):
+            raise self.failures[driver_command].pop(0)
+        return {'value': None}
+
+    def find_element(self, by, value):
+        self.execute('findElement', {'using': by, 'value': value})
+        element = mock.Mock(name='element')
+        element.click.side_effect = lambda: self.execute('clickElement', {'id': 'e1'})
+        element.is_displayed.side_effect = lambda: self.execute('isElementDisplayed', {'id': 'e1'})['value']
+        return element
+
+    def get(self, url):
+        self.execute('get', {'url': url})
+
+    @property
+    def current_url(self):
+        return self.execute('getCurrentUrl')['value']
+
+    def quit(self):
+        self.execute('quit')
+
+
+class FakeClock:
+    "Clock that advances one millisecond per reading"
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 0.001
+        return self.now
+
+
+@pytest.fixture
+def driver():
+    return custom_selenium_driver.CustomSeleniumDriver(FakeRemote())
+
+
+@pytest.fixture
+def sink():
+    return MemorySink()
+
+
+def test_disabled_by_default(driver):
+    original_execute = driver.driver.execute
+    assert driver.instrumentation is None
+    ExtendedWebElement(driver, 'button', '#go').click()
+    assert driver.driver.execute == original_execute
+
+
+def test_records_commands_with_element_context(driver, sink):
+    instrumentation = driver.enable_instrumentation(sink)
+    instrumentation.page = 'Login'
+    ExtendedWebElement(driver, 'button', '#go', By.CSS_SELECTOR).click()
+
+    kinds = [(record.kind, record.name) for record in sink.records]
+    assert kinds == [('command', 'findElement'), ('command', 'clickElement'), ('action', 'click')]
+    find, click_command, click_action = sink.records
+    assert find.element == 'button'
+    assert find.locator == 'css selector=#go'
+    assert click_command.element == 'button'
+    assert click_action.page == 'Login'
+    assert click_action.outcome == 'ok'
+    assert click_action.seconds >= click_command.seconds
+
+
+def test_property_actions_are_recorded(driver, sink):
+    driver.enable_instrumentation(sink)
+    ExtendedWebElement(driver, 'banner', '.banner').is_displayed
+    assert sink.records[-1].kind == 'action'
+    assert sink.records[-1].name == 'is_displayed'
+
+
+def test_retried_action_reports_attempts_and_outcome(driver, sink):
+    driver.enable_instrumentation(sink)
+    driver.driver.failures['clickElement'] = [ElementNotInteractableException('covered')] * 2
+    policy = RetryPolicy(timeout=5, initial_delay=0, jitter=0, sleep=lambda seconds: None)
+    ExtendedWebElement(driver, 'button', '#go', retry_policy=policy).click()
+
+    action = sink.records[-1]
+    assert (action.name, action.attempts, action.outcome) == ('click', 3, 'ok')
+    failed = [record for record in sink.records if record.outcome == 'ElementNotInteractableException']
+    assert len(failed) == 2
+    assert driver.instrumentation.histograms[('action', 'click')].as_dict()['retries'] == 2
+
+
+def test_failed_command_records_exception_name(driver, sink):
+    driver.enable_instrumentation(sink)
+    driver.driver.failures['findElement'] = [TimeoutException('slow')]
+    with pytest.raises(TimeoutException):
+        driver.driver.find_element(By.ID, 'x')
+    assert sink.records[-1].outcome == 'TimeoutException'
+    assert driver.instrumentation.histograms[('command', 'findElement')].errors == 1
+
+
+def test_waits_are_recorded(driver, sink):
+    driver.enable_instrumentation(sink)
+    with mock.patch.object(driver, '_poll_for', return_value=None):
+        driver.wait_for({'Element name': 'spinner', 'locator_type': 'id', 'locator': 'spin'}, 'invisible')
+    assert sink.records[-1][:2] == ('wait', 'wait_for:invisible')
+    assert sink.records[-1].element == 'spinner'
+
+
+def test_goto_sets_page(driver, sink):
+    class LoginPage(BasePage):
+        url = 'http://localhost/login'
+
+        def isCurrentPage(self):
+            return True
+
+    driver.enable_instrumentation(sink)
+    LoginPage(driver, 'Login').goto()
+    assert sink.records[-1].page == 'Login'
+    assert sink.records[-1].name == 'get'
+
+
+def test_disable_restores_execute(driver, sink):
+    driver.enable_instrumentation(sink)
+    driver.disable_instrumentation()
+    driver.driver.find_element(By.ID, 'x')
+    assert driver.instrumentation is None
+    assert 'execute' not in vars(driver.driver)
+    assert len(sink.records) == 0
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = LatencyHistogram(buckets=(0.01, 0.1, 1))
+    for seconds in (0.005, 0.05, 0.05, 0.5, 3):
+        histogram.observe(seconds)
+    assert histogram.cumulative() == [(0.01, 1), (0.1, 3), (1, 4), (float('inf'), 5)]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(1) == 3
+    assert histogram.count == 5
+
+
+def test_prometheus_text_format():
+    histogram = LatencyHistogram(buckets=(0.1,))
+    histogram.observe(0.05)
+    histogram.observe(0.2, ok=False)
+    text = prometheus_text({('command', 'get"Url'): histogram})
+    assert '# TYPE vorpal_webdriver_seconds histogram' in text
+    assert 'vorpal_webdriver_seconds_bucket{kind="command",name="get\\"Url",le="0.1"} 1' in text
+    assert 'vorpal_webdriver_seconds_bucket{kind="command",name="get\\"Url",le="+Inf"} 2' in text
+    assert 'vorpal_webdriver_seconds_count{kind="command",name="get\\"Url"} 2' in text
+    assert 'vorpal_webdriver_seconds_errors_total{kind="command",name="get\\"Url"} 1' in text
+
+
+def test_file_sinks_flush_on_quit(driver, tmp_path):
+    jsonl_path = tmp_path / 'commands.jsonl'
+    prom_path = tmp_path / 'vorpal.prom'
+    driver.enable_instrumentation(JsonLinesSink(str(jsonl_path)), PrometheusTextSink(str(prom_path)),
+                                  instrumentation=Instrumentation(clock=FakeClock()))
+    ExtendedWebElement(driver, 'button', '#go').click()
+    driver.quit()
+
+    records = [json.loads(line) for line in jsonl_path.read_text().splitlines()]
+    assert [record['name'] for record in records] == ['findElement', 'clickElement', 'click', 'quit']
+    assert records[0]['locator'] == 'css selector=#go'
+    assert records[0]['seconds'] == pytest.approx(0.001)
+    assert 'vorpal_webdriver_seconds_count{kind="action",name="click"} 1' in prom_path.read_text()
+
+
+def test_quit_leaves_shared_sinks_open(tmp_path):
+    sink = JsonLinesSink(str(tmp_path / 'commands.jsonl'))
+    instrumentation = Instrumentation([sink])
+    retired = custom_selenium_driver.CustomSeleniumDriver(FakeRemote())
+    retired.enable_instrumentation(instrumentation=instrumentation)
+    retired.quit()
+    # A replacement session (e.g. in a pool) keeps recording to the same sinks
+    replacement = custom_selenium_driver.CustomSeleniumDriver(FakeRemote())
+    replacement.enable_instrumentation(instrumentation=instrumentation)
+    replacement.get('http://localhost/')
+    replacement.quit()
+    instrumentation.close()
+    assert [json.loads(line)['name'] for line in (tmp_path / 'commands.jsonl').read_text().splitlines()] == \
+        ['quit', 'get', 'quit']
+
+
+def test_summary_lists_slowest_first():
+    instrumentation = Instrumentation()
+    instrumentation.record('command', 'fast', 0.01)
+    instrumentation.record('command', 'slow', 2.0)
+    lines = instrumentation.summary().splitlines()
+    assert 'slow' in lines[1]
+    assert 'fast' in lines[2]
+    assert instrumentation.as_dict()['command:slow']['count'] == 1
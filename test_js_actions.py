@@ -0,0 +1,116 @@
+"""Tests for the batched JavaScript action engine"""
+from unittest import mock
+import pytest
+from selenium.common.exceptions import StaleElementReferenceException, WebDriverException
+from vorpal import custom_selenium_driver, BasePage, Locator, SimulatedWebDriver
+from vorpal.Base import ActionResult, JavaScriptActionError, MemorySink
+from vorpal.Base.js_actions import run_element_script
+
+PAGE = """<title>Actions</title>
+<label for="remember">Remember me</label><input type="checkbox" id="remember">
+<div hidden><a id="hidden-link" href="/next">Next page</a></div>
+<p data-quote='say "hi"' id="quote">Quoted</p>
+<button id="save" disabled>Save</button>"""
+
+PAGES = {'http://app.test/': PAGE, 'http://app.test/next': '<title>Next</title>'}
+
+
+class ActionsPage(BasePage):
+    "Page object whose locators CSS cannot express"
+    url = 'http://app.test/'
+    remember = Locator('remember', 'id')
+    label = Locator('//label[@for="remember"]', 'xpath')
+    next_link = Locator('Next page', 'link_text')
+    quote = Locator('[data-quote=\'say "hi"\']')
+    save = Locator('save', 'id')
+
+    def isCurrentPage(self):
+        return True
+
+
+@pytest.fixture
+def driver():
+    driver = custom_selenium_driver.CustomSeleniumDriver(SimulatedWebDriver(PAGES), implicit_wait=0)
+    driver.get('http://app.test/')
+    return driver
+
+
+@pytest.fixture
+def page(driver):
+    return ActionsPage(driver, 'Actions')
+
+
+def test_click_js_supports_xpath_link_text_and_quotes(driver, page):
+    with driver.command_budget(max_commands=1):
+        page.label.click_js()
+    assert page.remember.snapshot().is_selected
+    page.quote.click_js()
+    # click() does not need the link to be visible
+    page.next_link.click_js()
+    assert driver.title == 'Next'
+
+
+def test_batch_runs_in_one_command_with_results(driver, page):
+    page.remember.element
+    with driver.command_budget(max_commands=1):
+        results = (driver.js_actions()
+                   .scroll_into_view(page.remember)
+                   .focus(page.remember)
+                   .set_attribute(page.quote, 'data-state', 'done')
+                   .dispatch_event(page.quote, 'refresh', {'source': 'test'})
+                   .set_attribute(page.quote, 'data-quote', None)
+                   .click(page.remember)
+                   .flush())
+    assert [(result.action, result.error) for result in results] == [
+        ('scroll_into_view', None), ('focus', None), ('set_attribute', None), ('dispatch_event', None),
+        ('set_attribute', None), ('click', None)]
+    assert results[1] == ActionResult('focus', 'remember', True, None)
+    assert page.quote.get_attribute('data-state') == 'done'
+    assert page.quote.get_attribute('data-quote') is None
+    assert page.remember.snapshot().is_selected
+
+
+def test_with_block_flushes_and_failures_are_reported(driver, page):
+    with driver.js_actions() as actions:
+        actions.click({'Element name': 'Remember', 'locator_type': 'id', 'locator': 'remember'})
+        assert len(actions) == 1
+    assert page.remember.snapshot().is_selected
+
+    actions = driver.js_actions().click({'Element name': 'Missing', 'locator_type': 'id', 'locator': 'missing'})
+    actions.focus(page.save).focus(ActionsPage.remember)
+    with pytest.raises(JavaScriptActionError) as error:
+        actions.flush()
+    assert isinstance(error.value, WebDriverException)
+    assert [(failure.name, failure.error) for failure in error.value.failures] == [('Missing', 'not found')]
+    assert [result.value for result in error.value.results] == [None, False, True]
+    assert len(actions) == 0
+
+    results = driver.js_actions(raise_on_failure=False).click({'Element name': 'Bad', 'locator_type': 'xpath',
+                                                               'locator': '//p['}).flush()
+    assert results[0].error is not None
+
+
+def test_stale_handles_are_found_again():
+    driver = mock.Mock(navigation_generation=0)
+    driver.execute_script.side_effect = [StaleElementReferenceException('stale'), [[None, 'new handle']]]
+    element = custom_selenium_driver.ExtendedWebElement(driver, 'Save', 'save', 'id', web_element='old handle')
+    spec = lambda entry, handle: [handle, entry[1]]
+    assert run_element_script(driver, 'script', [(element, 'x')], spec) == [[None, 'new handle']]
+    first, second = driver.execute_script.call_args_list
+    assert first.args == ('script', [['old handle', 'x']])
+    assert second.args == ('script', [[None, 'x']])
+    assert element.resolved_element == 'new handle'
+
+
+def test_targets_are_checked(driver):
+    with pytest.raises(TypeError):
+        driver.js_actions().click('#save')
+
+
+def test_batches_are_instrumented(driver, page):
+    sink = MemorySink()
+    driver.enable_instrumentation(sink)
+    page.remember.click_js()
+    assert [(record.kind, record.name, record.element) for record in sink.records] == [
+        ('command', 'w3cExecuteScript', 'remember'), ('action', 'js_actions', 'remember'),
+        ('action', 'click_js', 'remember')]
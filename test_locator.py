@@ -0,0 +1,102 @@
+"""Unit tests for the Locator descriptor"""
+from unittest import mock
+import pytest
+from vorpal import custom_selenium_driver, BasePage, By, ExtendedWebElement, Locator
+from vorpal.Base import scripts
+from vorpal.Base.locator import css_to_xpath, xpath_literal
+
+
+class LoginPage(BasePage):
+    "Page object declaring its elements with Locators"
+    url = 'http://localhost/login'
+    username = Locator('#username')
+    password = Locator('password', 'name')
+    submit = Locator('//button[@type="submit"]', 'xpath', name='Submit button')
+    rows = Locator('tr', By.TAG_NAME, nth_of_type=2)
+
+    def isCurrentPage(self):
+        return True
+
+
+class AdminLoginPage(LoginPage):
+    "Subclass adding a locator"
+    realm = Locator('realm', 'ID')
+
+
+@pytest.fixture
+def driver():
+    return custom_selenium_driver.CustomSeleniumDriver(mock.MagicMock())
+
+
+def test_locators_are_compiled_at_class_definition():
+    assert LoginPage.username.by == By.CSS_SELECTOR
+    assert LoginPage.password.by == By.NAME
+    assert LoginPage.password.css == '[name="password"]'
+    assert LoginPage.password.xpath == '//*[@name="password"]'
+    assert LoginPage.submit.css is None
+    assert LoginPage.submit.xpath == '//button[@type="submit"]'
+    assert AdminLoginPage.realm.by == By.ID
+    assert LoginPage.submit.name == 'Submit button'
+    assert LoginPage.username.name == 'username'
+
+
+@pytest.mark.parametrize('arguments,message', [
+    (('#x', 'css'), 'Unknown locator type'),
+    (('',), 'non-empty'),
+    (('//div[@id="x"', 'xpath'), 'unbalanced'),
+    (('a b', 'class'), 'contains spaces'),
+    (('#x', 'css_selector', None, 0), 'nth_of_type'),
+])
+def test_invalid_locators_fail_when_declared(arguments, message):
+    with pytest.raises(ValueError, match=message):
+        Locator(*arguments)
+
+
+def test_elements_are_created_once_per_page(driver):
+    page = LoginPage(driver, 'Login')
+    username = page.username
+    assert isinstance(username, ExtendedWebElement)
+    assert page.username is username
+    assert (username.name, username.locator, username.by) == ('username', '#username', By.CSS_SELECTOR)
+    assert page.rows.nth_of_type == 2
+    assert LoginPage(driver, 'Login').username is not username
+    driver.driver.find_element.assert_not_called()
+
+
+def test_locators_include_base_classes():
+    assert list(AdminLoginPage.locators()) == ['username', 'password', 'submit', 'rows', 'realm']
+
+
+def test_click_js_finds_any_locator_in_script(driver):
+    page = AdminLoginPage(driver, 'Admin login')
+    assert page.realm.css_selector == '#realm'
+    page.realm.click_js()
+    page.submit.click_js()
+    assert driver.driver.execute_script.call_args_list == [
+        mock.call(scripts.RUN_ACTIONS, [['click', [By.ID, 'realm', 1], []]]),
+        mock.call(scripts.RUN_ACTIONS, [['click', [By.XPATH, '//button[@type="submit"]', 1], []]]),
+    ]
+
+
+def test_driver_accepts_locators(driver):
+    element = driver.get_element(LoginPage.submit)
+    assert (element.name, element.by) == ('Submit button', By.XPATH)
+    assert driver.get_by_type(LoginPage.submit.as_dict()['locator_type']) == By.XPATH
+    assert LoginPage.rows.as_dict() == {'Element name': 'rows', 'locator_type': 'tag_name', 'locator': 'tr'}
+
+
+@pytest.mark.parametrize('css,xpath', [
+    ('#main', '//*[@id="main"]'),
+    ('div.card > a[href]', '//div[contains(concat(\' \', normalize-space(@class), \' \'), " card ")]/a[@href]'),
+    ('form input[type="text"]', '//form//input[@type="text"]'),
+    ('ul li:first-child', None),
+    ('a, b', None),
+])
+def test_css_to_xpath(css, xpath):
+    assert css_to_xpath(css) == xpath
+
+
+def test_xpath_literal_quotes():
+    assert xpath_literal('plain') == '"plain"'
+    assert xpath_literal('say "hi"') == "'say \"hi\"'"
+    assert xpath_literal('it\'s "x"') == 'concat("it\'s ", \'"\', "x", \'"\', "")'
@@ -1,7 +1,9 @@
 "Tests for page object implementation"
 import pytest
-from unittest.mock import Mock
-from vorpal import webdriver, custom_selenium_driver, BasePage
+from unittest.mock import Mock, PropertyMock, patch
+from vorpal import webdriver, custom_selenium_driver, BasePage, Locator, WaitTimeoutException
+from vorpal.Base import scripts
+from vorpal.Base.page import normalize_url
 
 class NoAbstractImplementation(BasePage):
     "Page object that doesn't implement abstract methods from BasePage"
@@ -39,3 +41,158 @@ def test_goto_works():
     page = PythonPage(mockdriver, 'Python Homepage')
     page.goto()
     mockdriver.get.assert_called_with("https://www.python.org")
+
+
+class PrefetchedPage(BasePage):
+    "Page object whose declared elements are resolved in one script after goto()"
+    url = "http://localhost/form"
+    prefetch_elements = True
+    username = Locator('#username')
+    password = Locator('password', 'name')
+    missing = Locator('//div[@id="later"]', 'xpath')
+
+    def isCurrentPage(self):
+        "Implements abstract method"
+        return True
+
+def test_goto_prefetches_declared_elements():
+    "Assert goto() resolves every declared element with a single execute_script and no find_element calls"
+    selenium_driver = Mock()
+    username_handle, password_handle = Mock(name='username'), Mock(name='password')
+    selenium_driver.execute_script.return_value = [username_handle, password_handle, None]
+    driver = custom_selenium_driver.CustomSeleniumDriver(selenium_driver)
+
+    page = PrefetchedPage(driver, 'Form').goto()
+    specs = selenium_driver.execute_script.call_args[0][1]
+    assert specs == [['css selector', '#username', 1], ['name', 'password', 1], ['xpath', '//div[@id="later"]', 1]]
+    assert page.username.element is username_handle
+    assert page.password.element is password_handle
+    selenium_driver.find_element.assert_not_called()
+    page.missing.element
+    selenium_driver.find_element.assert_called_once_with('xpath', '//div[@id="later"]')
+
+def test_prefetched_handles_expire_on_navigation():
+    "Assert handles prefetched for one page are re-found after the driver navigates"
+    selenium_driver = Mock()
+    selenium_driver.execute_script.return_value = [Mock(), Mock(), None]
+    driver = custom_selenium_driver.CustomSeleniumDriver(selenium_driver)
+    page = PrefetchedPage(driver, 'Form').goto()
+    driver.back()
+    page.username.element
+    selenium_driver.find_element.assert_called_once_with('css selector', '#username')
+
+
+class SearchPage(BasePage):
+    "Page object with a ready element for readiness tests"
+    url = "http://localhost/search"
+    results = Locator('#results')
+
+    def isCurrentPage(self):
+        "Implements abstract method"
+        return self.driver.title == 'Search'
+
+def test_goto_encodes_query_params():
+    "Assert goto() URL-encodes query parameters without a trailing separator"
+    mockdriver = Mock()
+    SearchPage(mockdriver, 'Search').goto(q='a b&c', tags=['x', 'y'])
+    mockdriver.get.assert_called_once_with("http://localhost/search?q=a+b%26c&tags=x&tags=y")
+
+def test_goto_query_params_dict_allows_reserved_names():
+    "Assert parameters named like goto() arguments can be passed through query_params"
+    mockdriver = Mock()
+    SearchPage(mockdriver, 'Search').goto({'force': 1}, page=2)
+    mockdriver.get.assert_called_once_with("http://localhost/search?force=1&page=2")
+
+def test_goto_skips_navigation_to_current_url():
+    "Assert goto() does nothing when already on the URL, unless forced, which doesn't read the current URL"
+    mockdriver = Mock()
+    mockdriver.current_url = "HTTP://LocalHost:80/search?q=x"
+    page = SearchPage(mockdriver, 'Search')
+    page.goto(q='x')
+    mockdriver.get.assert_not_called()
+
+    current_url = PropertyMock(return_value="http://localhost/home")
+    type(mockdriver).current_url = current_url
+    page.goto(q='x', force=True)
+    mockdriver.get.assert_called_once_with("http://localhost/search?q=x")
+    current_url.assert_not_called()
+
+def test_normalize_url():
+    "Assert URLs differing only in case, default port or an empty path compare equal"
+    assert normalize_url("http://x") == normalize_url("HTTP://X:80/") == "http://x/"
+    assert normalize_url("https://x:443/a?b#c") == "https://x/a?b#c"
+    assert normalize_url("http://x:8080/a") != normalize_url("http://x/a")
+
+def navigating_driver(documents_left_after=2):
+    "CustomSeleniumDriver whose page reports the old document gone after a few polls"
+    selenium_driver = Mock()
+    selenium_driver.current_url = "http://localhost/home"
+    polls = []
+
+    def execute_script(script, *args):
+        if script == scripts.LEFT_DOCUMENT:
+            polls.append(args[0])
+            return len(polls) >= documents_left_after
+        return None
+
+    selenium_driver.execute_script.side_effect = execute_script
+    return custom_selenium_driver.CustomSeleniumDriver(selenium_driver), selenium_driver, polls
+
+@pytest.fixture
+def no_sleep():
+    with patch('vorpal.Base.expected_condition.sleep'):
+        yield
+
+def test_goto_eager_navigates_from_script(no_sleep):
+    "Assert 'eager' readiness navigates with a marker script and returns once the old document is gone"
+    driver, selenium_driver, polls = navigating_driver()
+    generation = driver.navigation_generation
+    SearchPage(driver, 'Search').goto(ready='eager')
+
+    selenium_driver.get.assert_not_called()
+    navigate_call = selenium_driver.execute_script.call_args_list[0]
+    assert navigate_call[0][:2] == (scripts.NAVIGATE, "http://localhost/search")
+    assert polls == [navigate_call[0][2]] * 2
+    assert driver.navigation_generation == generation + 1
+
+def test_forced_goto_with_fragment_skips_current_url(no_sleep):
+    "Assert a forced goto to a URL with a fragment navigates without reading the current URL"
+    driver, selenium_driver, _ = navigating_driver(documents_left_after=1)
+    current_url = PropertyMock(return_value="http://localhost/search")
+    type(selenium_driver).current_url = current_url
+    page = SearchPage(driver, 'Search')
+    page.url = "http://localhost/search#results"
+    page.goto(force=True, ready='eager')
+    current_url.assert_not_called()
+    assert selenium_driver.execute_script.call_args_list[0][0][:2] == (scripts.NAVIGATE, page.url)
+
+def test_goto_waits_for_is_current_page(no_sleep):
+    "Assert 'page' readiness polls isCurrentPage() after leaving the old document"
+    driver, selenium_driver, _ = navigating_driver(documents_left_after=1)
+    title = PropertyMock(side_effect=['Home', 'Search'])
+    type(selenium_driver).title = title
+    SearchPage(driver, 'Search').goto(ready='page')
+    assert title.call_count == 2
+
+def test_goto_waits_for_element(no_sleep):
+    "Assert readiness given as a Locator waits for that element to be visible"
+    driver, _, _ = navigating_driver(documents_left_after=1)
+    with patch.object(driver, 'wait_for') as wait_for:
+        SearchPage(driver, 'Search').goto(ready=SearchPage.results, timeout=5)
+    locator, state = wait_for.call_args[0]
+    assert locator == {'Element name': 'results', 'locator_type': 'css_selector', 'locator': '#results'}
+    assert state == 'visible'
+    assert 0 < wait_for.call_args[1]['timeout'] <= 5
+
+def test_goto_times_out_if_never_ready():
+    "Assert goto() raises WaitTimeoutException when the old document never goes away"
+    driver, _, _ = navigating_driver(documents_left_after=10 ** 6)
+    with pytest.raises(WaitTimeoutException):
+        SearchPage(driver, 'Search').goto(ready='eager', timeout=0.2)
+
+def test_goto_rejects_unknown_readiness():
+    "Assert an unsupported readiness raises ValueError before navigating"
+    mockdriver = Mock()
+    with pytest.raises(ValueError):
+        SearchPage(mockdriver, 'Search').goto(ready='complete')
+    mockdriver.execute_script.assert_not_called()
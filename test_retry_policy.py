@@ -0,0 +1,98 @@
+"""Unit tests for RetryPolicy and retry_with_timeout"""
+from unittest import mock
+import pytest
+from selenium.common.exceptions import ElementNotInteractableException, NoSuchElementException
+from vorpal import ExtendedWebElement, RetryPolicy, RetryTimeoutException
+
+
+class FakeClock:
+    "Clock advanced by sleeps and by the simulated duration of each call"
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def policy(clock):
+    return RetryPolicy(timeout=5, initial_delay=0.1, multiplier=2, max_delay=1, jitter=0,
+                       clock=clock, sleep=clock.sleep)
+
+def test_success_first_attempt(policy):
+    assert policy.call('action', lambda: 'ok') == 'ok'
+    assert policy.statistics.as_dict()['action'] == {
+        'calls': 1, 'attempts': 1, 'retries': 0, 'timeouts': 0, 'seconds': 0.0}
+
+def test_exponential_backoff_with_cap(policy, clock):
+    func = mock.Mock(side_effect=[ElementNotInteractableException()] * 6 + ['ok'])
+    assert policy.call('action', func) == 'ok'
+    assert clock.sleeps == [0.1, 0.2, 0.4, 0.8, 1, 1]
+
+def test_deadline_includes_time_inside_call(policy, clock):
+    def slow_failure():
+        clock.now += 2
+        raise ElementNotInteractableException()
+
+    with pytest.raises(RetryTimeoutException) as error:
+        policy.call('click', slow_failure)
+
+    assert error.value.attempts == 3
+    assert isinstance(error.value.last_exception, ElementNotInteractableException)
+    assert clock.now < 7
+    assert policy.statistics.as_dict()['click']['timeouts'] == 1
+
+def test_non_retryable_raised_immediately(policy):
+    func = mock.Mock(side_effect=NoSuchElementException())
+    with pytest.raises(NoSuchElementException):
+        policy.call('action', func)
+    func.assert_called_once()
+
+def test_jitter_shrinks_delay(clock):
+    rng = mock.Mock()
+    rng.random.return_value = 1
+    policy = RetryPolicy(initial_delay=1, jitter=0.5, rng=rng)
+    assert policy.delay(0) == 0.5
+
+def test_policy_precedence(policy, clock):
+    driver = mock.MagicMock(name='driver')
+    driver.retry_policy = RetryPolicy(clock=clock, sleep=clock.sleep)
+    element_mock = driver.driver.find_element.return_value
+    element_mock.click.side_effect = [ElementNotInteractableException(), None]
+
+    e = ExtendedWebElement(driver, 'name', 'locator', retry_policy=policy)
+    e.click()
+    assert 'click' in policy.statistics.as_dict()
+    assert driver.retry_policy.statistics.as_dict() == {}
+
+    element_mock.click.side_effect = [ElementNotInteractableException(), None]
+    per_call = RetryPolicy(clock=clock, sleep=clock.sleep)
+    e.click(retry_policy=per_call)
+    assert per_call.statistics.as_dict()['click']['retries'] == 1
+
+def test_action_timeout_kwargs_not_passed_through(clock):
+    driver = mock.MagicMock(name='driver')
+    driver.retry_policy = RetryPolicy(clock=clock, sleep=clock.sleep)
+    element_mock = driver.driver.find_element.return_value
+    element_mock.click.side_effect = ElementNotInteractableException()
+
+    e = ExtendedWebElement(driver, 'name', 'locator')
+    with pytest.raises(RetryTimeoutException):
+        e.click(action_timeout=1, action_increment=0.25)
+    assert clock.sleeps == [0.25, 0.25, 0.25, 0.25]
+
+def test_export_statistics(policy, tmpdir):
+    policy.call('action', lambda: None)
+    path = str(tmpdir.join('retries.json'))
+    policy.statistics.export(path)
+    with open(path) as stats_file:
+        assert '"action"' in stats_file.read()
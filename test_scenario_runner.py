@@ -0,0 +1,79 @@
+"""Tests for ScenarioRunner sharding, work stealing and timing history"""
+import json
+import time
+from unittest import mock
+from vorpal.Base import ScenarioRunner, TimingDatabase
+from vorpal.Base.scenario_runner import plan_shards, RunReport, ScenarioResult
+
+
+class FakeFactory:
+    "Creates fake drivers without a browser"
+    def get_webdriver_instance(self, waiting_time=5):
+        return mock.MagicMock(name='driver')
+
+
+def sleeper(seconds):
+    def scenario(driver):
+        time.sleep(seconds)
+    return scenario
+
+def failing(driver):
+    raise AssertionError('element missing')
+
+def test_plan_shards_longest_first():
+    shards = plan_shards({'a': 5, 'b': 4, 'c': 3, 'd': 2, 'e': 2}, 2)
+    assert shards == [['a', 'd', 'e'], ['b', 'c']]
+
+def test_timing_database_moving_average(tmpdir):
+    path = str(tmpdir.join('timings.json'))
+    timings = TimingDatabase(path, smoothing=0.5)
+    assert timings.estimate('new') == 1.0
+    timings.update('login', 2.0)
+    timings.update('login', 4.0)
+    timings.update('search', 1.0)
+    timings.save()
+
+    reloaded = TimingDatabase(path)
+    assert reloaded.estimate('login') == 3.0
+    assert reloaded.estimate('unknown') == 3.0
+
+def test_report_ideal_critical_path():
+    results = [ScenarioResult('a', 0, 4.0, 'passed', None, False),
+               ScenarioResult('b', 1, 1.0, 'passed', None, False),
+               ScenarioResult('c', 1, 1.0, 'passed', None, True)]
+    report = RunReport(results, 5.0, 2)
+    assert report.ideal_seconds == 4.0
+    assert report.worker_seconds == {0: 4.0, 1: 2.0}
+    assert report.steals == 1
+    assert 'ideal critical path 4.00s' in report.summary()
+
+def test_run_updates_timings_and_reports_failures(tmpdir):
+    path = str(tmpdir.join('timings.json'))
+    runner = ScenarioRunner(FakeFactory(), workers=2, timing_path=path)
+    report = runner.run({'fast': sleeper(0.01), 'slow': sleeper(0.05), 'broken': failing})
+
+    assert sorted(result.name for result in report.results) == ['broken', 'fast', 'slow']
+    assert [result.name for result in report.failed] == ['broken']
+    assert 'element missing' in report.failed[0].error
+    with open(path) as timings_file:
+        assert set(json.load(timings_file)) == {'fast', 'slow'}
+
+def test_idle_worker_steals_work(tmpdir):
+    path = str(tmpdir.join('timings.json'))
+    # 'd' is planned behind 'long' on worker 0, so worker 1 should steal it once its own shard is done
+    with open(path, 'w') as timings_file:
+        json.dump({'long': 3, 'a': 1, 'b': 1, 'c': 1, 'd': 0.5}, timings_file)
+    scenarios = {'long': sleeper(0.5), 'a': sleeper(0.01), 'b': sleeper(0.01), 'c': sleeper(0.01),
+                 'd': sleeper(0.01)}
+
+    report = ScenarioRunner(FakeFactory(), workers=2, timing_path=path).run(scenarios)
+
+    assert not report.failed
+    assert report.steals >= 1
+    assert report.wall_seconds < 1.0
+
+def test_workers_that_cannot_start_are_reported(tmpdir):
+    factory = mock.MagicMock()
+    factory.get_webdriver_instance.side_effect = RuntimeError('no browser')
+    report = ScenarioRunner(factory, workers=1, timing_path=str(tmpdir.join('t.json'))).run({'a': sleeper(0)})
+    assert [result.name for result in report.failed] == ['a']
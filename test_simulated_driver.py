@@ -0,0 +1,220 @@
+"""Tests for the in-process simulated WebDriver, running page objects without a browser"""
+import os
+import pytest
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, \
+    InvalidSelectorException, WebDriverException, TimeoutException
+from vorpal import custom_selenium_driver, BasePage, Keys, Locator, SimulatedWebDriver, WebDriverFactory
+from vorpal.Base import MemorySink
+from vorpal.Base.simulated_dom import parse_html, select, rendered_text
+from vorpal.Base.simulated_xpath import evaluate
+from vorpal.Base.simulated_xpath import select as select_xpath
+from vorpal.Base.locator import to_xpath
+
+TEST_PAGE = 'file://' + os.path.abspath(os.path.join(os.path.dirname(__file__), 'test.html'))
+
+SHOP = """<!DOCTYPE html>
+<html><head><title>Shop</title><style>p { color: red }</style></head>
+<body>
+  <h1 class="title main">Products</h1>
+  <ul id="products">
+    <li class="product" data-sku="a1">Apple <b>red</b>
+    <li class="product sale" data-sku="b2">Banana
+    <li class="product" data-sku="c3" style="display: none">Cherry
+  </ul>
+  <form id="search" action="/results" method="get">
+    <label for="query">Search</label>
+    <input id="query" name="q" value="fruit" maxlength="10">
+    <input type="checkbox" name="fresh" value="yes" id="fresh" checked>
+    <input type="radio" name="size" value="s" id="small"><input type="radio" name="size" value="l" id="large" checked>
+    <select name="sort" id="sort"><option value="name">Name<option value="price">Price</select>
+    <textarea name="note" id="note">Hi &amp; bye</textarea>
+    <button type="submit" id="go" name="action" value="search">Go</button>
+    <button type="button" id="noop" disabled>Nothing</button>
+  </form>
+  <a id="about" href="about">About us</a>
+  <div hidden><span id="secret">Secret</span></div>
+</body></html>"""
+
+PAGES = {
+    'http://shop.test/': SHOP,
+    'http://shop.test/about': '<title>About</title><p id="mission">We sell fruit</p>',
+    'http://shop.test/results': lambda method, url, data: f'<title>Results</title><p id="echo">{url}</p>',
+}
+
+
+class ShopPage(BasePage):
+    "Page object for the simulated shop"
+    url = 'http://shop.test/'
+    heading = Locator('h1.title')
+    query = Locator('query', 'id')
+    fresh = Locator('//input[@name="fresh"]', 'xpath')
+    go = Locator('Go', 'link_text')
+    about = Locator('About us', 'link_text')
+
+    def isCurrentPage(self):
+        return self.driver.title == 'Shop'
+
+
+@pytest.fixture
+def browser():
+    return SimulatedWebDriver(PAGES)
+
+
+@pytest.fixture
+def driver(browser):
+    driver = custom_selenium_driver.CustomSeleniumDriver(browser, implicit_wait=0)
+    driver.get('http://shop.test/')
+    return driver
+
+
+def test_parser_closes_implied_tags():
+    document = parse_html(SHOP)
+    items = select(document, 'li')
+    assert [item.attributes['data-sku'] for item in items] == ['a1', 'b2', 'c3']
+    assert [option.value for option in select(document, 'option')] == ['name', 'price']
+    assert select(document, '#note')[0].value == 'Hi & bye'
+    assert rendered_text(select(document, 'ul')[0]) == 'Apple red\nBanana'
+
+
+@pytest.mark.parametrize('selector,expected', [
+    ('li.product.sale', ['b2']),
+    ('ul > li:first-child', ['a1']),
+    ('li:nth-child(2n+1)', ['a1', 'c3']),
+    ('li:not(.sale)', ['a1', 'c3']),
+    ('[data-sku^="b"], [data-sku$="3"]', ['b2', 'c3']),
+    ('li.sale ~ li', ['c3']),
+    ('li.sale + li', ['c3']),
+    ('body li:last-of-type', ['c3']),
+])
+def test_css_selectors(selector, expected):
+    document = parse_html(SHOP)
+    assert [item.attributes['data-sku'] for item in select(document, selector)] == expected
+
+
+@pytest.mark.parametrize('expression,expected', [
+    ('//li[2]', ['b2']),
+    ('//li[last()]', ['c3']),
+    ('(//li)[position() > 1]', ['b2', 'c3']),
+    ('//li[contains(., "Banana")]', ['b2']),
+    ('//b/ancestor::li', ['a1']),
+    ('//li[@data-sku="b2"]/preceding-sibling::li', ['a1']),
+    ('//ul/li[not(@style)][2]', ['b2']),
+    (to_xpath('class name', 'sale'), ['b2']),
+])
+def test_xpath_selection(expression, expected):
+    document = parse_html(SHOP)
+    assert [item.attributes['data-sku'] for item in select_xpath(document, expression)] == expected
+
+
+def test_xpath_values():
+    document = parse_html(SHOP)
+    assert evaluate('count(//li) + 1', document) == 4
+    assert evaluate('normalize-space(//h1)', document) == 'Products'
+    assert evaluate('string(//li[2]/@data-sku)', document) == 'b2'
+    with pytest.raises(InvalidSelectorException):
+        select_xpath(document, '//li/@class')
+    with pytest.raises(InvalidSelectorException):
+        select_xpath(document, '//li[')
+
+
+def test_webdriver_commands(browser):
+    browser.get(TEST_PAGE)
+    assert browser.title == 'Vorpal'
+    assert browser.find_element_by_id('test-h1').text == 'Test H1'
+    assert [item.text for item in browser.find_elements_by_xpath('//ul/li')] == ['li-1', 'li-2']
+    assert browser.find_element_by_css_selector('ul').find_element_by_tag_name('li').text == 'li-1'
+    with pytest.raises(NoSuchElementException):
+        browser.find_element_by_name('missing')
+    with pytest.raises(InvalidSelectorException):
+        browser.find_element_by_css_selector('li:hover(')
+    with pytest.raises(WebDriverException):
+        browser.get('http://unknown.test/')
+
+
+def test_element_state(driver):
+    query = driver.find_element_by_id('query')
+    assert query.get_attribute('value') == 'fruit'
+    assert driver.find_element_by_id('fresh').snapshot().is_selected
+    assert driver.find_element_by_id('fresh').get_attribute('checked') == 'true'
+    assert not driver.find_element_by_id('noop').is_enabled
+    assert not driver.find_element_by_id('secret').is_displayed
+    assert driver.driver.find_element_by_id('secret').text == ''
+    assert driver.find_element_by_id('about').get_attribute('href') == 'http://shop.test/about'
+    assert driver.find_element_by_id('sort').get_property('value') == 'name'
+
+
+def test_typing_and_clicking_update_the_form(driver, browser):
+    query = driver.find_element_by_id('query')
+    query.clear()
+    query.send_keys('melons and more')
+    assert query.get_attribute('value') == 'melons and'
+    driver.find_element_by_id('fresh').click()
+    driver.find_element_by_id('small').click()
+    driver.find_element_by_css_selector('option[value="price"]').click()
+
+    driver.find_element_by_id('go').click()
+
+    assert driver.current_url == 'http://shop.test/results?q=melons+and&size=s&sort=price&note=Hi+%26+bye&action=search'
+    assert driver.title == 'Results'
+
+
+def test_enter_submits_and_history_reloads(driver):
+    driver.find_element_by_name('q').send_keys(Keys.BACK_SPACE * 5 + 'kiwi' + Keys.ENTER)
+    assert driver.current_url.startswith('http://shop.test/results?q=kiwi&fresh=yes')
+    driver.back()
+    assert driver.title == 'Shop'
+    assert driver.find_element_by_name('q').get_attribute('value') == 'fruit'
+    driver.forward()
+    assert driver.title == 'Results'
+
+
+def test_page_objects_run_without_browser(driver):
+    page = ShopPage(driver, 'Shop').goto(force=True)
+    assert page.isCurrentPage()
+    assert page.heading.text == 'Products'
+    assert page.fresh.element.is_selected()
+    assert page.prefetch() == 4
+
+    products = driver.find_elements_by_class_name('product')
+    assert products.texts() == ['Apple red', 'Banana', 'Cherry']
+    assert products.attributes('data-sku') == ['a1', 'b2', 'c3']
+    assert [snapshot.is_displayed for snapshot in products.snapshots()] == [True, True, False]
+
+    page.about.click()
+    assert driver.title == 'About'
+
+
+def test_eager_goto_and_event_driven_waits(driver):
+    driver.get('http://shop.test/about')
+    page = ShopPage(driver, 'Shop').goto(ready='eager')
+    assert driver.current_url == 'http://shop.test/'
+    assert page.heading.snapshot().text == 'Products'
+
+    secret = {'Element name': 'Secret', 'locator_type': 'id', 'locator': 'secret'}
+    assert driver.wait_for(secret, 'present', event_driven=True).element.tag_name == 'span'
+    assert driver.wait_for(secret, 'invisible', event_driven=True) is None
+    with pytest.raises(TimeoutException):
+        driver.wait_for(secret, 'visible', timeout=0.1, event_driven=True)
+    assert driver.wait_for(secret, 'present', timeout=0.1, event_driven=False)
+
+
+def test_stale_handles_after_navigation(driver, browser):
+    handle = browser.find_element_by_id('query')
+    browser.refresh()
+    with pytest.raises(StaleElementReferenceException):
+        handle.get_attribute('value')
+
+
+def test_commands_are_instrumented(driver):
+    sink = MemorySink()
+    driver.enable_instrumentation(sink)
+    driver.find_element_by_css_selector('h1').text
+    assert {record.name for record in sink.records if record.kind == 'command'} >= {'findElement', 'getElementText'}
+
+
+def test_factory_creates_simulated_driver():
+    factory = WebDriverFactory('simulated', 'http://shop.test/', pages=PAGES)
+    driver = factory.get_webdriver_instance()
+    assert isinstance(driver.driver, SimulatedWebDriver)
+    assert driver.title == 'Shop'
+    driver.quit()
@@ -0,0 +1,138 @@
+"""Tests for streaming uploads and downloads on BaseHttpEndpoint"""
+import hashlib
+import io
+import json
+import tracemalloc
+import pytest
+from conftest import LocalServer, StandInHandler
+from vorpal import BaseHttpEndpoint
+from vorpal.Base import TransferStats
+
+PAYLOAD_SIZE = 8 * 1024 * 1024
+BLOCK = bytes(range(256)) * 256
+
+
+def payload_chunks():
+    for _ in range(PAYLOAD_SIZE // len(BLOCK)):
+        yield BLOCK
+
+
+class StreamingHandler(StandInHandler):
+    "Serves a large /export body and reports size and sha256 of uploaded bodies"
+
+    def respond(self):
+        if self.command == 'GET':
+            self.download()
+        else:
+            self.upload()
+
+    def download(self):
+        if self.path.startswith('/missing'):
+            self.send_body(404, b'')
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(PAYLOAD_SIZE))
+        self.end_headers()
+        for chunk in payload_chunks():
+            self.wfile.write(chunk)
+
+    def upload(self):
+        digest = hashlib.sha256()
+        size = 0
+        chunked = self.headers.get('Transfer-Encoding') == 'chunked'
+        if chunked:
+            while True:
+                length = int(self.rfile.readline().strip(), 16)
+                if length == 0:
+                    self.rfile.readline()
+                    break
+                data = self.rfile.read(length)
+                self.rfile.readline()
+                digest.update(data)
+                size += len(data)
+        else:
+            remaining = int(self.headers['Content-Length'])
+            while remaining:
+                data = self.rfile.read(min(remaining, 65536))
+                digest.update(data)
+                size += len(data)
+                remaining -= len(data)
+
+        self.send_body(200, json.dumps({'size': size, 'sha256': digest.hexdigest(), 'chunked': chunked}).encode())
+
+
+@pytest.fixture(scope="module")
+def endpoint():
+    with LocalServer(StreamingHandler) as server, BaseHttpEndpoint(server.base_url) as endpoint:
+        yield endpoint
+
+@pytest.fixture(scope="module")
+def expected_sha256():
+    digest = hashlib.sha256()
+    for chunk in payload_chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def test_stream_chunks(endpoint, expected_sha256):
+    chunks = endpoint.stream('/export', chunk_size=1024 * 1024, checksum='sha256')
+    sizes = [len(chunk) for chunk in chunks]
+    assert max(sizes) <= 1024 * 1024
+    assert chunks.stats.bytes == PAYLOAD_SIZE
+    assert chunks.stats.checksum == expected_sha256
+
+def test_download_to_file_bounded_memory(endpoint, expected_sha256, tmpdir):
+    path = str(tmpdir.join('export.bin'))
+    tracemalloc.start()
+    response = endpoint.download('/export', path, checksum='sha256')
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert peak < PAYLOAD_SIZE / 4
+    assert response.transfer.bytes == PAYLOAD_SIZE
+    assert response.transfer.checksum == expected_sha256
+    with open(path, 'rb') as downloaded:
+        assert hashlib.sha256(downloaded.read()).hexdigest() == expected_sha256
+
+def test_download_to_file_object(endpoint):
+    destination = io.BytesIO()
+    response = endpoint.download('/export', destination)
+    assert len(destination.getvalue()) == PAYLOAD_SIZE
+    assert response.transfer.checksum is None
+    assert response.transfer.throughput > 0
+
+def test_download_raises_on_error(endpoint):
+    destination = io.BytesIO()
+    with pytest.raises(Exception):
+        endpoint.download('/missing', destination)
+    assert destination.getvalue() == b''
+
+def test_download_requires_destination(endpoint):
+    with pytest.raises(TypeError):
+        endpoint.download('/export')
+
+def test_transfer_clock_starts_when_request_is_sent():
+    clock = iter([10.0, 12.0])
+    stats = TransferStats(clock=lambda: next(clock))
+    stats.start()
+    stats.update(b'x' * 100)
+    assert stats.seconds == 2.0
+    assert stats.throughput == 50.0
+
+def test_upload_from_file(endpoint, expected_sha256, tmpdir):
+    path = tmpdir.join('upload.bin')
+    path.write_binary(b''.join(payload_chunks()))
+    response = endpoint.upload('/imports', str(path), checksum='sha256')
+
+    assert response.json() == {'size': PAYLOAD_SIZE, 'sha256': expected_sha256, 'chunked': False}
+    assert response.transfer.checksum == expected_sha256
+
+def test_upload_from_generator(endpoint, expected_sha256):
+    response = endpoint.upload('/imports', payload_chunks(), method='PUT', checksum='sha256')
+
+    assert response.json() == {'size': PAYLOAD_SIZE, 'sha256': expected_sha256, 'chunked': True}
+    assert response.transfer.bytes == PAYLOAD_SIZE
+
+def test_upload_from_file_object(endpoint):
+    response = endpoint.upload('/imports', io.BytesIO(b'abc'))
+    assert response.json()['size'] == 3
+    assert response.json()['chunked'] is False
@@ -0,0 +1,125 @@
+"""Unit tests for WebDriverPool"""
+import threading
+from unittest import mock
+import pytest
+from selenium.common.exceptions import WebDriverException
+from vorpal import WebDriverPool
+from vorpal.Base import WebDriverPoolTimeout
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def factory():
+    factory = mock.MagicMock(name='factory')
+    factory.get_webdriver_instance.side_effect = lambda waiting_time: mock.MagicMock(name='driver')
+    return factory
+
+def test_prestart(factory):
+    pool = WebDriverPool(factory, size=3)
+    assert factory.get_webdriver_instance.call_count == 3
+    assert pool.stats()['idle'] == 3
+
+def test_lease_reuses_and_resets(factory):
+    pool = WebDriverPool(factory, size=1)
+    driver = pool.lease()
+    driver.driver.window_handles = ['main', 'popup']
+    pool.release(driver)
+
+    driver.driver.switch_to.window.assert_any_call('popup')
+    driver.driver.close.assert_called_once()
+    driver.execute_script.assert_called_once()
+    driver.delete_all_cookies.assert_called_once()
+    driver.get.assert_called_once_with('about:blank')
+
+    assert pool.lease() is driver
+    stats = pool.stats()
+    assert stats['leases'] == 2
+    assert stats['reuses'] == 1
+    assert stats['created'] == 1
+
+def test_session_context_manager(factory):
+    pool = WebDriverPool(factory, size=1)
+    with pool.session() as driver:
+        assert pool.stats()['in_use'] == 1
+    assert pool.stats()['idle'] == 1
+
+def test_crashed_session_replaced(factory):
+    pool = WebDriverPool(factory, size=1)
+    crashed = pool.lease()
+    pool.release(crashed)
+    type(crashed.driver).current_url = mock.PropertyMock(side_effect=WebDriverException('gone'))
+
+    driver = pool.lease()
+    assert driver is not crashed
+    crashed.quit.assert_called_once()
+    assert pool.stats()['replaced'] == 1
+
+def test_failed_reset_retires_session(factory):
+    pool = WebDriverPool(factory, size=1)
+    driver = pool.lease()
+    driver.get.side_effect = WebDriverException('crashed')
+    pool.release(driver)
+    driver.quit.assert_called_once()
+    assert pool.stats()['retired'] == 1
+
+def test_max_uses_and_lifetime(factory):
+    clock = FakeClock()
+    pool = WebDriverPool(factory, size=1, max_uses=2, max_lifetime=100, clock=clock)
+    first = pool.lease()
+    pool.release(first)
+    pool.release(pool.lease())
+    first.quit.assert_called_once()
+
+    second = pool.lease()
+    clock.now = 150
+    pool.release(second)
+    second.quit.assert_called_once()
+    assert pool.stats()['retired'] == 2
+
+def test_lease_times_out_when_exhausted(factory):
+    pool = WebDriverPool(factory, size=1)
+    pool.lease()
+    with pytest.raises(WebDriverPoolTimeout):
+        pool.lease(timeout=0.01)
+
+def test_waiting_lease_gets_returned_session(factory):
+    pool = WebDriverPool(factory, size=1)
+    driver = pool.lease()
+    timer = threading.Timer(0.05, pool.release, [driver])
+    timer.start()
+    assert pool.lease(timeout=5) is driver
+    assert pool.stats()['max_lease_wait_seconds'] > 0
+
+def test_lazy_creation_and_size_cap(factory):
+    pool = WebDriverPool(factory, size=2, prestart=0)
+    assert factory.get_webdriver_instance.call_count == 0
+    pool.lease()
+    pool.lease()
+    assert factory.get_webdriver_instance.call_count == 2
+
+def test_process_semaphore(factory):
+    semaphore = mock.MagicMock()
+    pool = WebDriverPool(factory, size=2, process_semaphore=semaphore)
+    assert semaphore.acquire.call_count == 2
+    pool.close()
+    assert semaphore.release.call_count == 2
+
+def test_forked_pool_forgets_parent_sessions(factory):
+    pool = WebDriverPool(factory, size=1)
+    parent_driver = pool.lease()
+    pool._pid = -1
+    child_driver = pool.lease()
+    assert child_driver is not parent_driver
+    parent_driver.quit.assert_not_called()
+
+def test_release_unknown_driver(factory):
+    pool = WebDriverPool(factory, size=1)
+    with pytest.raises(ValueError):
+        pool.release(mock.MagicMock())
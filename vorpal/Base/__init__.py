@@ -1,5 +1,81 @@
-from .page import BasePage
-from .webdriver_factory import WebDriverFactory
-from .element import ExtendedWebElement
-from .base_http_endpoint import BaseHttpEndpoint
-from .expected_condition import wait_until
\ No newline at end of file
+from typing import TYPE_CHECKING
+from .._lazy import lazy_exports
+
+# Public names and the modules defining them, imported on first access
+_EXPORTS = {
+    'BasePage': ('.page', 'BasePage'),
+    'WebDriverFactory': ('.webdriver_factory', 'WebDriverFactory'),
+    'WebDriverPool': ('.webdriver_pool', 'WebDriverPool'),
+    'WebDriverPoolTimeout': ('.webdriver_pool', 'WebDriverPoolTimeout'),
+    'SimulatedWebDriver': ('.simulated_driver', 'SimulatedWebDriver'),
+    'Cassette': ('.cassette', 'Cassette'),
+    'CassetteMismatch': ('.cassette', 'CassetteMismatch'),
+    'ReplayWebDriver': ('.replay_driver', 'ReplayWebDriver'),
+    'ScenarioRunner': ('.scenario_runner', 'ScenarioRunner'),
+    'ScenarioResult': ('.scenario_runner', 'ScenarioResult'),
+    'RunReport': ('.scenario_runner', 'RunReport'),
+    'TimingDatabase': ('.scenario_runner', 'TimingDatabase'),
+    'ExtendedWebElement': ('.element', 'ExtendedWebElement'),
+    'Locator': ('.locator', 'Locator'),
+    'ElementSnapshot': ('.element_snapshot', 'ElementSnapshot'),
+    'ElementCollection': ('.element_collection', 'ElementCollection'),
+    'BaseHttpEndpoint': ('.base_http_endpoint', 'BaseHttpEndpoint'),
+    'BatchResult': ('.base_http_endpoint', 'BatchResult'),
+    'HttpCache': ('.http_cache', 'HttpCache'),
+    'MemoryCacheBackend': ('.http_cache', 'MemoryCacheBackend'),
+    'DiskCacheBackend': ('.http_cache', 'DiskCacheBackend'),
+    'TransferStats': ('.streaming', 'TransferStats'),
+    'ChunkStream': ('.streaming', 'ChunkStream'),
+    'AsyncHttpEndpoint': ('.async_http_endpoint', 'AsyncHttpEndpoint'),
+    'AsyncHttpResponse': ('.async_http_endpoint', 'AsyncHttpResponse'),
+    'AsyncHttpError': ('.async_http_endpoint', 'AsyncHttpError'),
+    'wait_until': ('.expected_condition', 'wait_until'),
+    'wait_any': ('.expected_condition', 'wait_any'),
+    'wait_all': ('.expected_condition', 'wait_all'),
+    'WaitResult': ('.expected_condition', 'WaitResult'),
+    'WaitTimeoutException': ('.expected_condition', 'WaitTimeoutException'),
+    'RetryPolicy': ('.retry_policy', 'RetryPolicy'),
+    'RetryStatistics': ('.retry_policy', 'RetryStatistics'),
+    'RetryTimeoutException': ('.retry_policy', 'RetryTimeoutException'),
+    'ScreenshotWriter': ('.screenshot_writer', 'ScreenshotWriter'),
+    'Instrumentation': ('.instrumentation', 'Instrumentation'),
+    'InstrumentationRecord': ('.instrumentation', 'InstrumentationRecord'),
+    'MemorySink': ('.instrumentation', 'MemorySink'),
+    'JsonLinesSink': ('.instrumentation', 'JsonLinesSink'),
+    'PrometheusTextSink': ('.instrumentation', 'PrometheusTextSink'),
+    'CommandBudget': ('.command_budget', 'CommandBudget'),
+    'CommandBudgetExceeded': ('.command_budget', 'CommandBudgetExceeded'),
+    'within_budget': ('.command_budget', 'within_budget'),
+    'FieldResult': ('.form_fill', 'FieldResult'),
+    'FormFillError': ('.form_fill', 'FormFillError'),
+    'ActionBatch': ('.js_actions', 'ActionBatch'),
+    'ActionResult': ('.js_actions', 'ActionResult'),
+    'JavaScriptActionError': ('.js_actions', 'JavaScriptActionError'),
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .page import BasePage
+    from .webdriver_factory import WebDriverFactory
+    from .webdriver_pool import WebDriverPool, WebDriverPoolTimeout
+    from .simulated_driver import SimulatedWebDriver
+    from .cassette import Cassette, CassetteMismatch
+    from .replay_driver import ReplayWebDriver
+    from .scenario_runner import ScenarioRunner, ScenarioResult, RunReport, TimingDatabase
+    from .element import ExtendedWebElement
+    from .locator import Locator
+    from .element_snapshot import ElementSnapshot
+    from .element_collection import ElementCollection
+    from .base_http_endpoint import BaseHttpEndpoint, BatchResult
+    from .http_cache import HttpCache, MemoryCacheBackend, DiskCacheBackend
+    from .streaming import TransferStats, ChunkStream
+    from .async_http_endpoint import AsyncHttpEndpoint, AsyncHttpResponse, AsyncHttpError
+    from .expected_condition import wait_until, wait_any, wait_all, WaitResult, WaitTimeoutException
+    from .retry_policy import RetryPolicy, RetryStatistics, RetryTimeoutException
+    from .screenshot_writer import ScreenshotWriter
+    from .instrumentation import Instrumentation, InstrumentationRecord, MemorySink, JsonLinesSink, PrometheusTextSink
+    from .command_budget import CommandBudget, CommandBudgetExceeded, within_budget
+    from .form_fill import FieldResult, FormFillError
+    from .js_actions import ActionBatch, ActionResult, JavaScriptActionError
@@ -0,0 +1,223 @@
+"""
+Module containing asyncio base class for HTTP endpoints.
+Requires the optional 'aiohttp' dependency (pip install vorpal[async]).
+"""
+import base64
+import json as jsonlib
+from collections.abc import Mapping
+
+
+def normalize_params(params):
+    """
+    Query parameters as the (key, value) string pairs 'requests' would send:
+    None values are dropped, list values repeat the key, and other values are converted with str().
+    aiohttp itself rejects None, bool and other non-string values.
+    :param params: dict or sequence of (key, value) pairs; a str or bytes query string is returned unchanged
+    """
+    if params is None or isinstance(params, (str, bytes)):
+        return params
+    pairs = []
+    for key, values in (params.items() if isinstance(params, Mapping) else params):
+        if values is None:
+            continue
+        for value in (values if isinstance(values, (list, tuple)) else [values]):
+            if value is not None:
+                pairs.append((_to_str(key), _to_str(value)))
+    return pairs
+
+
+def _to_str(value) -> str:
+    return value.decode('utf-8') if isinstance(value, bytes) else str(value)
+
+
+class AsyncHttpResponse:
+    """
+    Fully-read response returned by AsyncHttpEndpoint.
+    Mirrors the parts of requests.Response that endpoint code typically uses.
+    """
+
+    def __init__(self, method: str, url: str, status_code: int, reason: str, headers, content: bytes,
+                 encoding: str = None):
+        self.method = method
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or 'utf-8'
+
+    def __repr__(self):
+        return f"<AsyncHttpResponse [{self.status_code}]>"
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
+    def json(self, **kwargs):
+        return jsonlib.loads(self.text, **kwargs)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise AsyncHttpError(f"{self.status_code} {self.reason} for {self.method} {self.url}", self)
+
+
+class AsyncHttpError(Exception):
+    """Raised by AsyncHttpResponse.raise_for_status() for 4xx/5xx responses."""
+
+    def __init__(self, message: str, response: AsyncHttpResponse):
+        super().__init__(message)
+        self.response = response
+
+
+class AsyncHttpEndpoint:
+    """
+    asyncio base class for HTTP endpoints, with the same surface as BaseHttpEndpoint.
+    Http endpoints should subclass this to fan requests out concurrently; each verb is a coroutine.
+    Requests share one pooled aiohttp.ClientSession, either owned by the endpoint or shared.
+    aiohttp docs: https://docs.aiohttp.org/
+    """
+
+    def __init__(self, base_url, session=None, pool_size: int = 100, headers: dict = None, auth=None,
+                 timeout: float = None):
+        """
+        Initializes the AsyncHttpEndpoint class.
+        :param base_url: base url for the endpoint as str (e.g. 'https://wwwi3logix.com')
+        :param session: (optional) shared aiohttp.ClientSession, which close() leaves open
+        :param pool_size: (optional) connection limit of the session created when none is given
+        :param headers: (optional) default headers for this endpoint's requests
+        :param auth: (optional) default (user, password) tuple for basic auth, or an aiohttp.BasicAuth
+        :param timeout: (optional) default total timeout in seconds for this endpoint's requests
+        """
+        # If the provided base_url ends with '/', snip that off
+        self.base_url = base_url if base_url[-1] != '/' else base_url[:-1]
+        self._owns_session = session is None
+        self.session = session
+        self.pool_size = pool_size
+        self.headers = dict(headers or {})
+        self.auth = auth
+        self.timeout = timeout
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Release pooled connections, unless the session was given to this endpoint by the caller."""
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        # aiohttp sessions must be created inside a running event loop, so create ours on first use
+        if self.session is None:
+            try:
+                import aiohttp
+            except ImportError as error:
+                raise ImportError("AsyncHttpEndpoint requires aiohttp: pip install vorpal[async]") from error
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+        return self.session
+
+    async def request(self, method: str, relative_path: str = '', **kwargs) -> AsyncHttpResponse:
+        """
+        Send a request to endpoint, applying this endpoint's default headers, auth and timeout
+        :param method: HTTP method (e.g. 'GET')
+        :param relative_path: (optional) path to endpoint relative to base_url (e.g. '/users')
+        :param **kwargs: (optional) additional keyword args to pass to aiohttp.ClientSession.request
+        :return: AsyncHttpResponse with the body already read
+        """
+        session = self._get_session()
+        import aiohttp
+
+        headers = dict(self.headers)
+        auth = kwargs.pop('auth', self.auth)
+        if isinstance(auth, tuple):
+            credentials = base64.b64encode(':'.join(auth).encode('latin1')).decode('ascii')
+            headers['Authorization'] = f'Basic {credentials}'
+        elif auth is not None:
+            headers['Authorization'] = auth.encode()
+        headers.update(kwargs.get('headers') or {})
+        if headers:
+            kwargs['headers'] = headers
+        timeout = kwargs.pop('timeout', self.timeout)
+        if isinstance(timeout, (int, float)):
+            kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+        elif timeout is not None:
+            kwargs['timeout'] = timeout
+        if 'params' in kwargs:
+            kwargs['params'] = normalize_params(kwargs['params'])
+
+        url = self.base_url + relative_path
+        async with session.request(method, url, **kwargs) as response:
+            content = await response.read()
+            return AsyncHttpResponse(method, str(response.url), response.status, response.reason,
+                                     response.headers, content, response.charset)
+
+    async def GET(self, relative_path='', query_params={}, **kwargs) -> AsyncHttpResponse:
+        """
+        Send GET request to endpoint
+        :param relative_path: (optional) path to endpoint relative to base_url (e.g. '/users')
+        :param query_params: (optional) query parameters in key:value dict
+        :param **kwargs: (optional) additional keyword args to pass to aiohttp
+        :return: AsyncHttpResponse
+        """
+        return await self.request('GET', relative_path, params=query_params, **kwargs)
+
+    async def POST(self, relative_path='', data = {}, is_json=True, **kwargs) -> AsyncHttpResponse:
+        """
+        Send POST request to endpoint
+        :param relative_path: (optional) path to endpoint relative to base_url (e.g. '/users')
+        :param data: (optional) request data as dict
+        :param is_json: (optional) sends data as JSON if true, else as form data
+        :param **kwargs: (optional) additional keyword args to pass to aiohttp
+        :return: AsyncHttpResponse
+        """
+        # If not is_json, we assume data is from a form
+        if is_json:
+            return await self.request('POST', relative_path, json=data, **kwargs)
+        else:
+            return await self.request('POST', relative_path, data=data, **kwargs)
+
+    async def PUT(self, relative_path='', data = {}, is_json=True, **kwargs) -> AsyncHttpResponse:
+        """
+        Send PUT request to endpoint
+        :param relative_path: (optional) path to endpoint relative to base_url (e.g. '/users')
+        :param data: (optional) request data as dict
+        :param is_json: (optional) sends data as JSON if true, else as form data
+        :param **kwargs: (optional) additional keyword args to pass to aiohttp
+        :return: AsyncHttpResponse
+        """
+        # If not is_json, we assume data is from a form
+        if is_json:
+            return await self.request('PUT', relative_path, json=data, **kwargs)
+        else:
+            return await self.request('PUT', relative_path, data=data, **kwargs)
+
+    async def PATCH(self, relative_path='', data = {}, is_json=True, **kwargs) -> AsyncHttpResponse:
+        """
+        Send PATCH request to endpoint
+        :param relative_path: (optional) path to endpoint relative to base_url (e.g. '/users')
+        :param data: (optional) request data as dict
+        :param is_json: (optional) sends data as JSON if true, else as form data
+        :param **kwargs: (optional) additional keyword args to pass to aiohttp
+        :return: AsyncHttpResponse
+        """
+        # If not is_json, we assume data is from a form
+        if is_json:
+            return await self.request('PATCH', relative_path, json=data, **kwargs)
+        else:
+            return await self.request('PATCH', relative_path, data=data, **kwargs)
+
+    async def DELETE(self, relative_path='', **kwargs) -> AsyncHttpResponse:
+        """
+        Send DELETE request to endpoint
+        :param relative_path: (optional) path to endpoint relative to base_url (e.g. '/users')
+        :param **kwargs: (optional) additional keyword args to pass to aiohttp
+        :return: AsyncHttpResponse
+        """
+        return await self.request('DELETE', relative_path, **kwargs)
@@ -2,33 +2,173 @@
 Module containing base class for HTTP endpoints.
 """
 
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+from requests.adapters import HTTPAdapter
+from .http_cache import HttpCache
+from .streaming import TransferStats, ChunkStream, CountingReader, counted_chunks
+
+# Default chunk size for streamed uploads and downloads
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Outcome of one request sent by BaseHttpEndpoint.batch(); exactly one of response/exception is set
+BatchResult = namedtuple('BatchResult', ['index', 'request', 'response', 'exception'])
+
+
+def create_session(pool_size: int = 10, headers: dict = None, auth=None) -> requests.Session:
+    """
+    Create a keep-alive requests.Session whose connection pool can be shared by several endpoints.
+    :param pool_size: (optional) maximum number of pooled connections per host
+    :param headers: (optional) default headers sent with every request
+    :param auth: (optional) default auth sent with every request (anything 'requests' accepts as auth)
+    :return: requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if headers:
+        session.headers.update(headers)
+    if auth is not None:
+        session.auth = auth
+    return session
+
 
 class BaseHttpEndpoint:
     """
     Base class for HTTP endpoints.
     Http endpoints should subclass this.
     Base methods return request objects from 'requests' library.
+    Requests are sent through a pooled, keep-alive requests.Session, either owned by the endpoint or shared.
     Requests libary docs: http://docs.python-requests.org/en/master/
     """
 
-    def __init__(self, base_url):
+    def __init__(self, base_url, session: requests.Session = None, pool_size: int = 10, headers: dict = None,
+                 auth=None, timeout=None, cache: HttpCache = None):
         """
         Initializes the BaseHttpEndpoint class.
         :param base_url: base url for the endpoint as str (e.g. 'https://wwwi3logix.com')
+        :param session: (optional) shared requests.Session (see create_session), which close() leaves open
+        :param pool_size: (optional) connection pool size of the session created when none is given
+        :param headers: (optional) default headers for this endpoint's requests
+        :param auth: (optional) default auth for this endpoint's requests
+        :param timeout: (optional) default timeout in seconds (or (connect, read) tuple) for this endpoint's requests
+        :param cache: (optional) HttpCache serving and revalidating GET responses (may be shared between endpoints)
         """
         # If the provided base_url ends with '/', snip that off
         self.base_url = base_url if base_url[-1] != '/' else base_url[:-1]
+        self._owns_session = session is None
+        self.pool_size = pool_size
+        self.session = create_session(pool_size) if session is None else session
+        self.headers = dict(headers or {})
+        self.auth = auth
+        self.timeout = timeout
+        self.cache = cache
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release pooled connections, unless the session was given to this endpoint by the caller."""
+        if self._owns_session:
+            self.session.close()
+
+    def batch(self, requests_to_send, max_workers: int = 8, ordered: bool = True):
+        """
+        Send many requests concurrently on a thread pool sharing this endpoint's connection pool.
+        Exceptions raised by a request are captured in its BatchResult instead of being raised.
+        :param requests_to_send: iterable of (method, relative_path[, payload[, kwargs]]) tuples, where payload is
+            query_params for GET, data for POST/PUT/PATCH and not allowed for DELETE
+            (e.g. [('GET', '/users/1'), ('POST', '/orders', {'id': 1}), ('DELETE', '/orders/1')])
+        :param max_workers: (optional) maximum number of requests in flight
+        :param ordered: (optional) if true return a list in input order, else a generator in completion order
+        :return: list (or generator) of BatchResult
+        """
+        requests_to_send = [tuple(request) for request in requests_to_send]
+        if self._owns_session and max_workers > self.pool_size:
+            # Grow the pool so concurrent requests don't open and discard extra connections. The previous adapter
+            # may still be in use by other threads, so it is left to be closed when garbage-collected
+            self.pool_size = max_workers
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+
+        # Every request is submitted before returning, so they are sent even if the results are never read
+        futures = self._submit_batch(requests_to_send, max_workers)
+        results = self._completed_batch(requests_to_send, futures)
+        if ordered:
+            return sorted(results, key=lambda result: result.index)
+        return results
+
+    def _submit_batch(self, requests_to_send, max_workers) -> dict:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = {executor.submit(self._send_batched, request): index
+                   for index, request in enumerate(requests_to_send)}
+        # Submitted requests still run; the worker threads exit once they are done
+        executor.shutdown(wait=False)
+        return futures
+
+    @staticmethod
+    def _completed_batch(requests_to_send, futures):
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = BatchResult(index, requests_to_send[index], future.result(), None)
+            except Exception as exception:
+                result = BatchResult(index, requests_to_send[index], None, exception)
+            yield result
+
+    def _send_batched(self, request):
+        method, relative_path, *rest = request
+        payload = rest[0] if rest else None
+        kwargs = rest[1] if len(rest) > 1 else {}
+        verb = getattr(self, method.upper())
+        if payload is None:
+            return verb(relative_path, **kwargs)
+        return verb(relative_path, payload, **kwargs)
+
+    def request(self, method: str, relative_path: str = '', **kwargs):
+        """
+        Send a request to endpoint through the session, applying this endpoint's default headers, auth and timeout
+        :param method: HTTP method (e.g. 'GET')
+        :param relative_path: (optional) path to endpoint relative to base_url (e.g. '/users')
+        :param **kwargs: (optional) additional keyword args to pass to requests.Session.request
+        :return: response object from 'requests' library
+        """
+        if self.headers:
+            kwargs['headers'] = {**self.headers, **(kwargs.get('headers') or {})}
+        if self.auth is not None:
+            kwargs.setdefault('auth', self.auth)
+        if self.timeout is not None:
+            kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, self.base_url + relative_path, **kwargs)
 
-    def GET(self, relative_path='', query_params={}, **kwargs):
+    def GET(self, relative_path='', query_params={}, use_cache=True, **kwargs):
         """
         Send GET request to endpoint
         :param relative_path: (optional) path to endpoint relative to base_url (e.g. '/users')
         :param query_params: (optional) query parameters in key:value dict
+        :param use_cache: (optional) set to False to bypass self.cache for this call
         :param **kwargs: (optional) additional keyword args to pass to requests.get
         :return: response object from 'requests' library
         """
-        return requests.get(self.base_url + relative_path, params=query_params, **kwargs)
+        if self.cache is None or not use_cache:
+            return self.request('GET', relative_path, params=query_params, **kwargs)
+
+        def send(conditional_headers):
+            headers = {**conditional_headers, **(kwargs.get('headers') or {})}
+            return self.request('GET', relative_path, params=query_params, **{**kwargs, 'headers': headers})
+
+        # Cache entries are keyed by the effective headers and auth, so endpoints with different credentials
+        # can share a cache
+        headers = {**self.session.headers, **self.headers, **(kwargs.get('headers') or {})}
+        auth = kwargs.get('auth', self.auth if self.auth is not None else self.session.auth)
+        return self.cache.fetch(self.base_url + relative_path, query_params, send, headers, auth)
     
     def POST(self, relative_path='', data = {}, is_json=True, **kwargs):
         """
@@ -41,9 +181,9 @@ class BaseHttpEndpoint:
         """
         # If not is_json, we assume data is from a form
         if is_json:
-            return requests.post(self.base_url + relative_path, json=data, **kwargs)
+            return self.request('POST', relative_path, json=data, **kwargs)
         else:
-            return requests.post(self.base_url + relative_path, data=data, **kwargs)
+            return self.request('POST', relative_path, data=data, **kwargs)
     
     def PUT(self, relative_path='', data = {}, is_json=True, **kwargs):
         """
@@ -56,9 +196,9 @@ class BaseHttpEndpoint:
         """
         # If not is_json, we assume data is from a form
         if is_json:
-            return requests.put(self.base_url + relative_path, json=data, **kwargs)
+            return self.request('PUT', relative_path, json=data, **kwargs)
         else:
-            return requests.put(self.base_url + relative_path, data=data, **kwargs)
+            return self.request('PUT', relative_path, data=data, **kwargs)
     
     def PATCH(self, relative_path='', data = {}, is_json=True, **kwargs):
         """
@@ -71,9 +211,9 @@ class BaseHttpEndpoint:
         """
         # If not is_json, we assume data is from a form
         if is_json:
-            return requests.patch(self.base_url + relative_path, json=data, **kwargs)
+            return self.request('PATCH', relative_path, json=data, **kwargs)
         else:
-            return requests.patch(self.base_url + relative_path, data=data, **kwargs)
+            return self.request('PATCH', relative_path, data=data, **kwargs)
 
     def DELETE(self, relative_path='', **kwargs):
         """
@@ -82,4 +222,95 @@ class BaseHttpEndpoint:
         :param **kwargs: (optional) additional keyword args to pass to requests.delete
         :return: response object from 'requests' library
         """
-        return requests.delete(self.base_url + relative_path, **kwargs)
+        return self.request('DELETE', relative_path, **kwargs)
+
+    # Streaming transfers keep memory bounded by chunk_size regardless of body size
+    def stream(self, relative_path='', query_params={}, method='GET', chunk_size=STREAM_CHUNK_SIZE, checksum=None,
+               **kwargs) -> ChunkStream:
+        """
+        Send request to endpoint and iterate over the response body in chunks instead of buffering it
+        :param relative_path: (optional) path to endpoint relative to base_url (e.g. '/exports/1')
+        :param query_params: (optional) query parameters in key:value dict
+        :param method: (optional) HTTP method, GET by default
+        :param chunk_size: (optional) maximum bytes per chunk
+        :param checksum: (optional) hashlib algorithm name for a running checksum (e.g. 'sha256')
+        :param **kwargs: (optional) additional keyword args to pass to requests
+        :return: ChunkStream yielding bytes; .response is the response and .stats its TransferStats
+        """
+        stats = TransferStats(checksum)
+        stats.start()
+        response = self.request(method, relative_path, params=query_params, stream=True, **kwargs)
+        return ChunkStream(response, chunk_size, stats)
+
+    def download(self, relative_path='', destination=None, query_params={}, method='GET',
+                 chunk_size=STREAM_CHUNK_SIZE, checksum=None, raise_for_status=True, **kwargs):
+        """
+        Stream the response body of a request straight to a file
+        :param relative_path: (optional) path to endpoint relative to base_url (e.g. '/exports/1')
+        :param destination: file path or writable binary file-like object
+        :param query_params: (optional) query parameters in key:value dict
+        :param method: (optional) HTTP method, GET by default
+        :param chunk_size: (optional) maximum bytes held in memory at once
+        :param checksum: (optional) hashlib algorithm name for a running checksum (e.g. 'sha256')
+        :param raise_for_status: (optional) raise before writing anything if the response is an error
+        :param **kwargs: (optional) additional keyword args to pass to requests
+        :return: response object from 'requests' library (body already consumed), with .transfer set to TransferStats
+        :raises TypeError: if no destination is given
+        """
+        if destination is None:
+            raise TypeError("download() requires a destination file path or writable file-like object")
+        chunks = self.stream(relative_path, query_params, method, chunk_size, checksum, **kwargs)
+        with chunks:
+            if raise_for_status:
+                chunks.response.raise_for_status()
+            if isinstance(destination, (str, os.PathLike)):
+                with open(destination, 'wb') as output_file:
+                    for chunk in chunks:
+                        output_file.write(chunk)
+            else:
+                for chunk in chunks:
+                    destination.write(chunk)
+
+        chunks.response.transfer = chunks.stats
+        return chunks.response
+
+    def upload(self, relative_path='', source=None, method='POST', chunk_size=STREAM_CHUNK_SIZE, checksum=None,
+               **kwargs):
+        """
+        Send request to endpoint with a body streamed from a file or generator
+        :param relative_path: (optional) path to endpoint relative to base_url (e.g. '/imports')
+        :param source: file path, readable binary file-like object, or iterable of bytes chunks
+            (files are sent with Content-Length, iterables with chunked transfer encoding)
+        :param method: (optional) HTTP method, POST by default
+        :param chunk_size: (optional) maximum bytes read into memory at once
+        :param checksum: (optional) hashlib algorithm name for a running checksum (e.g. 'sha256')
+        :param **kwargs: (optional) additional keyword args to pass to requests
+        :return: response object from 'requests' library, with .transfer set to TransferStats of the uploaded body
+        """
+        stats = TransferStats(checksum)
+        stats.start()
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as input_file:
+                body = CountingReader(input_file, stats, os.fstat(input_file.fileno()).st_size, chunk_size)
+                response = self.request(method, relative_path, data=body, **kwargs)
+        elif hasattr(source, 'read'):
+            body = CountingReader(source, stats, _remaining_length(source), chunk_size)
+            if body.length is None:
+                body = counted_chunks(iter(lambda: source.read(chunk_size), b''), stats)
+            response = self.request(method, relative_path, data=body, **kwargs)
+        else:
+            response = self.request(method, relative_path, data=counted_chunks(source, stats), **kwargs)
+
+        response.transfer = stats
+        return response
+
+
+def _remaining_length(file_object):
+    """Bytes left to read in a seekable file-like object, or None if unknown."""
+    try:
+        position = file_object.tell()
+        end = file_object.seek(0, os.SEEK_END)
+        file_object.seek(position)
+        return end - position
+    except (AttributeError, OSError, ValueError):
+        return None
@@ -0,0 +1,387 @@
+"""
+Module containing record/replay of WebDriver commands and HTTP exchanges.
+A Cassette captures the traffic of a CustomSeleniumDriver and of BaseHttpEndpoints to a compact file,
+and serves it back later without a browser or server, so failing tests can be rerun in milliseconds.
+"""
+import base64
+import copy
+import gzip
+import json
+import os
+import threading
+from collections import defaultdict, namedtuple
+from urllib.parse import urlsplit, parse_qsl, unquote
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Cassette file format version, written in the first line
+FORMAT_VERSION = 1
+
+MODES = ('once', 'replay', 'record', 'new_episodes')
+
+# WebDriver commands answered even when missing from a cassette: the session was usually started
+# before recording began, and quitting has no result worth recording
+_NEW_SESSION = 'newSession'
+_QUIT = 'quit'
+
+# One recorded exchange; key is the normalized request it is matched on, see webdriver_key() and http_key()
+Interaction = namedtuple('Interaction', ['channel', 'key', 'response'])
+
+
+class CassetteMismatch(Exception):
+    """Raised in replay when a request has no recorded response."""
+
+    def __init__(self, channel: str, request: str, closest: list):
+        self.channel = channel
+        self.request = request
+        self.closest = closest
+        message = f"No recorded {channel} response for {request}"
+        if closest:
+            message += '; closest recorded: ' + '; '.join(closest)
+        super().__init__(message)
+
+
+def normalize_path(path: str) -> str:
+    """URL path with percent-escapes decoded, duplicate slashes collapsed and no trailing slash."""
+    return '/' + '/'.join(segment for segment in unquote(path).split('/') if segment)
+
+
+def _normalize_body(body, content_type: str):
+    if body is None or not isinstance(body, (bytes, str)):
+        # Streamed bodies (files, generators) can't be read without consuming them
+        return None
+    text = body.decode('utf-8', 'replace') if isinstance(body, bytes) else body
+    if 'json' in (content_type or ''):
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text
+    if 'x-www-form-urlencoded' in (content_type or ''):
+        return sorted(parse_qsl(text, keep_blank_values=True))
+    return text
+
+
+def http_key(request: requests.PreparedRequest, match_host: bool = False) -> str:
+    """
+    Normalized form of a request used to match it against a cassette:
+    method, path, sorted query parameters and the body (parsed when JSON or form data).
+    Headers are ignored, so tokens and dates don't break replays.
+    :param request: prepared request
+    :param match_host: (optional) also match scheme, host and port
+    """
+    url = urlsplit(request.url)
+    key = {'method': request.method.upper(), 'path': normalize_path(url.path),
+           'query': sorted(parse_qsl(url.query, keep_blank_values=True)),
+           'body': _normalize_body(request.body, request.headers.get('Content-Type'))}
+    if match_host:
+        key['host'] = f'{url.scheme}://{url.netloc}'
+    return json.dumps(key, sort_keys=True)
+
+
+def webdriver_key(command: str, params: dict) -> str:
+    """Normalized form of a WebDriver command: its name and parameters without the session id."""
+    params = {name: value for name, value in (params or {}).items() if name != 'sessionId'}
+    return json.dumps({'command': command, 'params': params}, sort_keys=True, default=str)
+
+
+def _describe(channel: str, key: str) -> str:
+    fields = json.loads(key)
+    if channel == 'webdriver':
+        return f"{fields['command']} {json.dumps(fields['params'], sort_keys=True)}"
+    query = '&'.join(f'{name}={value}' for name, value in fields['query'])
+    description = f"{fields['method']} {fields.get('host', '')}{fields['path']}" + (f'?{query}' if query else '')
+    if fields['body'] is not None:
+        description += f" body={json.dumps(fields['body'], sort_keys=True)}"
+    return description
+
+
+def _differences(channel: str, key: str, other: str) -> list:
+    fields, other_fields = json.loads(key), json.loads(other)
+    names = ('command', 'params') if channel == 'webdriver' else ('method', 'host', 'path', 'query', 'body')
+    return [name for name in names if fields.get(name) != other_fields.get(name)]
+
+
+class Cassette:
+    """
+    Recorded WebDriver and HTTP traffic, matched on normalized requests.
+
+    Modes:
+        'once' - replay if the file exists, otherwise record (default)
+        'replay' - only replay; a request missing from the cassette raises CassetteMismatch
+        'record' - send everything live and rewrite the cassette
+        'new_episodes' - replay recorded HTTP exchanges and record new ones live (partial re-recording);
+            WebDriver traffic is re-recorded as a whole, since a live browser can't skip the replayed commands
+
+    Each request consumes the next recorded response for its normalized form, so repeated identical requests
+    (e.g. polling) replay in recorded order; when they run out, the last response is repeated.
+
+    with Cassette('cassettes/login.jsonl.gz') as cassette:
+        driver = cassette.driver(WebDriverFactory('chrome', base_url).get_webdriver_instance)
+        api = cassette.wrap_endpoint(UsersEndpoint(base_url))
+    """
+
+    def __init__(self, path: str, mode: str = 'once', match_host: bool = False, rerecord=None):
+        """
+        :param path: cassette file; compressed with gzip when it ends in '.gz'
+        :param mode: (optional) one of MODES, see above
+        :param match_host: (optional) also match the scheme, host and port of HTTP requests
+        :param rerecord: (optional) function(prepared request) -> bool selecting HTTP requests sent live and
+            re-recorded even though the cassette has them (in 'new_episodes' mode)
+        :raises ValueError: for an unknown mode
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected one of {MODES}")
+        self.path = path
+        self.match_host = match_host
+        self.rerecord = rerecord
+        self.exists = os.path.exists(path)
+        self.mode = ('replay' if self.exists else 'record') if mode == 'once' else mode
+        self.recorded = []
+        self.played = 0
+        self.repeats = 0
+        self.mismatches = []
+        self._interactions = self.load(path) if self.exists and self.mode != 'record' else []
+        self._queues = defaultdict(list)
+        self._last = {}
+        for interaction in self._interactions:
+            self._queues[(interaction.channel, interaction.key)].append(interaction)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.save()
+
+    def __len__(self):
+        return len(self._interactions)
+
+    @property
+    def replaying(self) -> bool:
+        """Whether WebDriver traffic is served from the cassette instead of a browser."""
+        return self.mode == 'replay'
+
+    # SECTION: storage
+
+    @staticmethod
+    def _open(path: str, mode: str, compressed: bool = None):
+        if path.endswith('.gz') if compressed is None else compressed:
+            return gzip.open(path, mode + 't', encoding='utf-8')
+        return open(path, mode, encoding='utf-8')
+
+    @classmethod
+    def load(cls, path: str) -> list:
+        """
+        Interactions stored in a cassette file.
+        :raises ValueError: if the file is not a cassette of a supported version
+        """
+        with cls._open(path, 'r') as cassette_file:
+            header = json.loads(cassette_file.readline() or '{}')
+            if header.get('vorpal_cassette') != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} vorpal cassette")
+            return [Interaction(*json.loads(line)) for line in cassette_file if line.strip()]
+
+    def save(self) -> None:
+        """Write the recorded traffic, merged with the replayed traffic in 'new_episodes' mode; no-op in replay."""
+        if self.mode == 'replay' or (not self.recorded and self.exists):
+            return
+        interactions = self.recorded
+        if self.mode == 'new_episodes':
+            rerecorded = {interaction.key for interaction in self.recorded}
+            recorded_channels = {interaction.channel for interaction in self.recorded}
+            kept = [interaction for interaction in self._interactions
+                    if interaction.channel not in recorded_channels or
+                    (interaction.channel == 'http' and interaction.key not in rerecorded)]
+            interactions = kept + self.recorded
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f'{self.path}.{os.getpid()}.tmp'
+        with self._open(temporary, 'w', self.path.endswith('.gz')) as cassette_file:
+            cassette_file.write(json.dumps({'vorpal_cassette': FORMAT_VERSION}) + '\n')
+            for interaction in interactions:
+                cassette_file.write(json.dumps(list(interaction), separators=(',', ':')) + '\n')
+        os.replace(temporary, self.path)
+        self.exists = True
+
+    # SECTION: matching
+
+    def play(self, channel: str, key: str):
+        """
+        Next recorded response for a normalized request, or None if the cassette has none.
+        :param channel: 'webdriver' or 'http'
+        :param key: normalized request, see webdriver_key() and http_key()
+        """
+        with self._lock:
+            queue = self._queues.get((channel, key))
+            if queue:
+                interaction = queue.pop(0)
+                self._last[(channel, key)] = interaction
+                self.played += 1
+                return copy.deepcopy(interaction.response)
+            if (channel, key) in self._last:
+                self.repeats += 1
+                return copy.deepcopy(self._last[(channel, key)].response)
+        return None
+
+    def record(self, channel: str, key: str, response) -> None:
+        with self._lock:
+            self.recorded.append(Interaction(channel, key, copy.deepcopy(response)))
+
+    def mismatch(self, channel: str, key: str) -> CassetteMismatch:
+        """CassetteMismatch describing the request and the recorded requests closest to it."""
+        candidates = sorted({interaction.key for interaction in self._interactions if interaction.channel == channel},
+                            key=lambda other: len(_differences(channel, key, other)))
+        closest = [f"{_describe(channel, other)} ({', '.join(_differences(channel, key, other))} differ)"
+                   for other in candidates[:3]]
+        error = CassetteMismatch(channel, _describe(channel, key), closest)
+        with self._lock:
+            self.mismatches.append(error)
+        return error
+
+    def unused(self) -> list:
+        """Descriptions of recorded requests that were never replayed, e.g. after the test changed."""
+        with self._lock:
+            return [_describe(interaction.channel, interaction.key)
+                    for queue in self._queues.values() for interaction in queue]
+
+    # SECTION: WebDriver
+
+    def wrap_driver(self, driver):
+        """
+        Record the WebDriver traffic of a live CustomSeleniumDriver (or Selenium WebDriver).
+        :param driver: CustomSeleniumDriver or Selenium WebDriver
+        :return: driver
+        """
+        selenium_driver = getattr(driver, 'driver', driver)
+        if not isinstance(selenium_driver.command_executor, CassetteExecutor):
+            selenium_driver.command_executor = CassetteExecutor(self, selenium_driver.command_executor)
+        return driver
+
+    def driver(self, factory=None, **driver_kwargs):
+        """
+        CustomSeleniumDriver bound to this cassette: a browserless replay driver when replaying,
+        otherwise the live driver returned by factory, recording.
+        :param factory: function returning a live CustomSeleniumDriver (e.g. WebDriverFactory.get_webdriver_instance)
+        :param **driver_kwargs: (optional) CustomSeleniumDriver arguments for the replay driver
+        :raises ValueError: if recording is needed but no factory was given
+        """
+        if self.replaying:
+            from .custom_selenium_driver import CustomSeleniumDriver
+            from .replay_driver import ReplayWebDriver
+            return CustomSeleniumDriver(ReplayWebDriver(self), **driver_kwargs)
+        if factory is None:
+            raise ValueError(f"Cassette {self.path} records in mode {self.mode!r}, which needs a live driver factory")
+        return self.wrap_driver(factory())
+
+    # SECTION: HTTP
+
+    def wrap_endpoint(self, endpoint):
+        """
+        Record or replay the HTTP traffic of a BaseHttpEndpoint (or requests.Session).
+        Adapters are mounted on the session, so endpoints sharing it are covered too.
+        :param endpoint: BaseHttpEndpoint or requests.Session
+        :return: endpoint
+        """
+        session = getattr(endpoint, 'session', endpoint)
+        for prefix in ('http://', 'https://'):
+            live = session.get_adapter(prefix)
+            if not isinstance(live, CassetteAdapter):
+                session.mount(prefix, CassetteAdapter(self, live))
+        return endpoint
+
+
+class CassetteExecutor:
+    """
+    Selenium command executor recording a live executor's responses to a Cassette, or replaying them.
+    """
+
+    def __init__(self, cassette: Cassette, live=None):
+        """
+        :param cassette: Cassette
+        :param live: (optional) command executor of a live session, required unless replaying
+        """
+        self.cassette = cassette
+        self.live = live
+        self.w3c = getattr(live, 'w3c', True)
+
+    def __getattr__(self, name):
+        live = self.__dict__.get('live')
+        if live is None:
+            raise AttributeError(name)
+        return getattr(live, name)
+
+    def execute(self, command: str, params: dict) -> dict:
+        key = webdriver_key(command, params)
+        if self.cassette.replaying:
+            response = self.cassette.play('webdriver', key)
+            if response is not None:
+                return response
+            if command == _NEW_SESSION:
+                return {'value': {'sessionId': 'replay', 'capabilities': {'browserName': 'replay'}}}
+            if command == _QUIT:
+                return {'value': None}
+            raise self.cassette.mismatch('webdriver', key)
+        response = self.live.execute(command, params)
+        self.cassette.record('webdriver', key, response)
+        return response
+
+
+class CassetteAdapter(BaseAdapter):
+    """
+    requests transport adapter replaying HTTP responses from a Cassette and recording live ones.
+    """
+
+    def __init__(self, cassette: Cassette, live: BaseAdapter = None):
+        """
+        :param cassette: Cassette
+        :param live: (optional) adapter sending requests over the network, required unless replaying
+        """
+        super().__init__()
+        self.cassette = cassette
+        self.live = live
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        cassette = self.cassette
+        key = http_key(request, cassette.match_host)
+        forced = cassette.mode == 'new_episodes' and cassette.rerecord is not None and cassette.rerecord(request)
+        if cassette.mode in ('replay', 'new_episodes') and not forced:
+            recorded = cassette.play('http', key)
+            if recorded is not None:
+                return self.build_response(request, recorded)
+            if cassette.mode == 'replay':
+                raise cassette.mismatch('http', key)
+            cassette.mismatch('http', key)
+
+        response = self.live.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+        # Reading the body here keeps it available to the caller, streamed or not
+        content = response.content
+        recorded = {'url': response.url, 'status_code': response.status_code, 'reason': response.reason,
+                    'headers': dict(response.headers), 'encoding': response.encoding}
+        try:
+            recorded['text'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            recorded['base64'] = base64.b64encode(content).decode('ascii')
+        cassette.record('http', key, recorded)
+        return response
+
+    def build_response(self, request, recorded: dict) -> requests.Response:
+        """requests.Response for a recorded response, as if it had just been received."""
+        response = requests.Response()
+        response.request = request
+        response.connection = self
+        response.url = recorded['url']
+        response.status_code = recorded['status_code']
+        response.reason = recorded['reason']
+        response.headers = CaseInsensitiveDict(recorded['headers'])
+        response.encoding = recorded['encoding']
+        response._content = (recorded['text'].encode('utf-8') if 'text' in recorded
+                             else base64.b64decode(recorded['base64']))
+        response._content_consumed = True
+        response.from_cassette = True
+        return response
+
+    def close(self):
+        if self.live is not None:
+            self.live.close()
@@ -0,0 +1,134 @@
+"""
+Module containing round-trip budgets: limits on the WebDriver commands and time a block of page-object code may use.
+"""
+import copy
+import time
+from collections import Counter, defaultdict
+from contextlib import ContextDecorator
+from functools import wraps
+from .instrumentation import InstrumentationRecord
+
+
+class CommandBudgetExceeded(AssertionError):
+    """Raised when a budgeted block issues more commands or takes longer than allowed."""
+
+    def __init__(self, message: str, budget: 'CommandBudget'):
+        super().__init__(message)
+        self.budget = budget
+
+
+class CommandBudget(ContextDecorator):
+    """
+    Counts the WebDriver commands and time spent inside a block and fails when they exceed the limits.
+    Commands are observed through the driver's Instrumentation, which is enabled for the duration of the block
+    when the driver has none; when it is shared (e.g. by the drivers of a pool), only this driver's commands count.
+    The failure lists the commands by name and by the element they were issued for.
+
+    with driver.command_budget(max_commands=5, max_seconds=1.0, name='login'):
+        login_page.login(user)
+    """
+
+    def __init__(self, driver, max_commands: int = None, max_seconds: float = None, name: str = None,
+                 clock=time.perf_counter):
+        """
+        :param driver: CustomSeleniumDriver whose commands are counted
+        :param max_commands: (optional) most WebDriver commands the block may issue
+        :param max_seconds: (optional) most seconds the block may take
+        :param name: (optional) name of the budgeted flow, used in the failure message
+        :param clock: (optional) monotonic clock function
+        """
+        self.driver = driver
+        self.max_commands = max_commands
+        self.max_seconds = max_seconds
+        self.name = name
+        self.clock = clock
+        self.commands = Counter()
+        self.command_seconds = defaultdict(float)
+        self.seconds = 0.0
+        self._start = None
+        self._instrumentation = None
+        self._owns_instrumentation = False
+        self._session = None
+
+    @property
+    def command_count(self) -> int:
+        """Commands issued inside the block so far."""
+        return sum(self.commands.values())
+
+    def emit(self, record: InstrumentationRecord) -> None:
+        if record.kind != 'command' or record.session != self._session:
+            return
+        key = (record.name, record.element or record.locator or '-')
+        self.commands[key] += 1
+        self.command_seconds[key] += record.seconds
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _recreate_cm(self):
+        # A fresh budget for each call of a decorated function, so calls (and recursion) don't share counts
+        return copy.copy(self)
+
+    def __enter__(self):
+        self.commands = Counter()
+        self.command_seconds = defaultdict(float)
+        self._instrumentation = self.driver.instrumentation
+        self._owns_instrumentation = self._instrumentation is None
+        if self._owns_instrumentation:
+            self._instrumentation = self.driver.enable_instrumentation()
+        self._session = self._instrumentation.session_of(self.driver.driver)
+        self._instrumentation.add_sink(self)
+        self._start = self.clock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.seconds = self.clock() - self._start
+        self._instrumentation.remove_sink(self)
+        if self._owns_instrumentation:
+            self.driver.disable_instrumentation()
+        if exc_type is None:
+            self.check()
+        return False
+
+    def exceeded(self) -> bool:
+        """Whether the block used more commands or time than allowed."""
+        return ((self.max_commands is not None and self.command_count > self.max_commands) or
+                (self.max_seconds is not None and self.seconds > self.max_seconds))
+
+    def check(self) -> None:
+        """
+        :raises CommandBudgetExceeded: if the block went over budget
+        """
+        if self.exceeded():
+            raise CommandBudgetExceeded('Command budget exceeded ' + self.report(), self)
+
+    def report(self) -> str:
+        """Totals against the limits, followed by the commands by name and element, most frequent first."""
+        limits = f" (max {self.max_commands})" if self.max_commands is not None else ''
+        seconds = f" (max {self.max_seconds}s)" if self.max_seconds is not None else ''
+        lines = [f"in {self.name or 'block'}: {self.command_count} commands{limits}, {self.seconds:.3f}s{seconds}",
+                 f"{'count':>6} {'seconds':>8}  {'command':<28} element"]
+        for (command, element), count in sorted(self.commands.items(), key=lambda item: (-item[1], item[0])):
+            lines.append(f"{count:>6} {self.command_seconds[(command, element)]:>8.3f}  {command:<28} {element}")
+        return '\n'.join(lines)
+
+
+def within_budget(max_commands: int = None, max_seconds: float = None, name: str = None):
+    """
+    Decorator to run a page-object (or element) method under a CommandBudget of its self.driver.
+    :param max_commands: (optional) most WebDriver commands one call may issue
+    :param max_seconds: (optional) most seconds one call may take
+    :param name: (optional) name used in the failure message (default: the method's qualified name)
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapped(self, *args, **kwargs):
+            with self.driver.command_budget(max_commands, max_seconds, name or func.__qualname__):
+                return func(self, *args, **kwargs)
+
+        return wrapped
+
+    return decorator
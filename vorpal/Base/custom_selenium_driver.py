@@ -3,21 +3,58 @@ Package: Base
 CustomSeleniumDriver class implementation.
 Methods for adding the new functionality to selenium methods.
 """
-from selenium.common.exceptions import NoSuchElementException, ElementNotSelectableException, ElementNotVisibleException
+from selenium.common.exceptions import NoSuchElementException, ElementNotSelectableException, ElementNotVisibleException, \
+    StaleElementReferenceException, TimeoutException, UnknownMethodException, WebDriverException
 from selenium.webdriver.support import expected_conditions as ec
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium import webdriver
 from .element import ExtendedWebElement
+from .element_collection import ElementCollection
+from .retry_policy import RetryPolicy
+from .instrumentation import Instrumentation
+from .command_budget import CommandBudget
+from .form_fill import fill_form
+from .js_actions import ActionBatch
+from .screenshot_writer import ScreenshotWriter
+from .locator import Locator, LOCATOR_TYPES
+from . import scripts
+from collections import Counter
 import time
 import os
 
+# Fragments of error messages meaning the driver can't run async scripts at all
+UNSUPPORTED_SCRIPT_ERRORS = ('unknown command', 'unknown method', 'unsupported', 'not supported', 'not implemented')
+
 
 class CustomSeleniumDriver:
 
-    def __init__(self, driver, implicit_wait=5) -> None:
+    # States accepted by wait_for()
+    WAIT_STATES = ('present', 'visible', 'clickable', 'invisible', 'text', 'attribute', 'changed')
+    # Script timeout of a new W3C session, restored after an event-driven wait when none was set explicitly
+    DEFAULT_SCRIPT_TIMEOUT = 30
+
+    def __init__(self, driver, implicit_wait=5, retry_policy: RetryPolicy = None,
+                 event_driven_waits: bool = False, screenshot_root: str = None,
+                 screenshot_writer: ScreenshotWriter = None) -> None:
         self.driver = driver
         self.implicit_wait = implicit_wait
+        # Wait in the page with a MutationObserver (one command per wait) instead of polling, see wait_for()
+        self.event_driven_waits = event_driven_waits
+        # Cleared the first time the browser rejects execute_async_script so later waits poll straight away
+        self.async_waits_supported = True
+        self._script_timeout = None
+        # Default retry policy for element actions; its statistics collect retries for the whole session
+        self.retry_policy = retry_policy or RetryPolicy()
+        # Number of stale-element re-resolves per element name, see record_reresolve()
+        self.reresolve_counts = Counter()
+        # Timing of commands and actions, see enable_instrumentation(); None keeps it out of the call path
+        self.instrumentation = None
+        # Incremented by get/back/forward/refresh; element handles resolved in an older generation are re-found
+        self.navigation_generation = 0
+        # Directory take_screen_shot() paths are relative to (default: this package, as before)
+        self.screenshot_root = screenshot_root or os.path.dirname(__file__)
+        self.screenshot_writer = screenshot_writer or ScreenshotWriter()
 
     def get_by_type(self, locator: str) -> By:
         """
@@ -25,18 +62,17 @@ class CustomSeleniumDriver:
         :param locator: Attribute Type of specific element.
         :return: BY.VALUE attribute.
         """
-        locator = locator.lower()
-        locators = {'id': By.ID, 'xpath': By.XPATH, 'css_selector': By.CSS_SELECTOR, 'name': By.NAME,
-                    'link_text': By.LINK_TEXT, 'class': By.CLASS_NAME}
-
-        return locators[locator]
+        return LOCATOR_TYPES[locator.lower()]
 
     def get_element(self, locator: dict) -> ExtendedWebElement:
         """
         Find specific element on current web page.
-        :param locator: {'Element name': Name, 'locator_type': 'xpath', 'locator': 'path to element'} of attribute.
+        :param locator: {'Element name': Name, 'locator_type': 'xpath', 'locator': 'path to element'} of attribute,
+            or a Locator.
         :return: Selenium element.
         """
+        if isinstance(locator, Locator):
+            return locator.element(self)
 
         element_name = locator['Element name']
         locator_type = locator['locator_type']
@@ -45,34 +81,29 @@ class CustomSeleniumDriver:
         by_type = self.get_by_type(locator_type.lower())
         return ExtendedWebElement(self, element_name, locator_info, by_type)
 
-    def get_elements(self, locator: dict) -> list([ExtendedWebElement]):
+    def get_elements(self, locator: dict) -> ElementCollection:
         """
         Find specific elements on current web page.
         :param locator: {Name, Value, Type} of attribute.
-        :return: List of Selenium element.
+        :return: ElementCollection of the matching elements, resolved with one command.
         """
         by_type = self.get_by_type(locator['locator_type'].lower())
-        return self.find_elements(by_type, locator['locator'])
+        return self.find_elements(by_type, locator['locator'], locator.get('Element name'))
 
-    def take_screen_shot(self, log_message: str, directory: str = "../Screenshots/") -> None:
+    def take_screen_shot(self, log_message: str, directory: str = "../Screenshots/") -> str:
         """
-        Takes screen shot of current page and saves to the Screenshot directory.
+        Takes screen shot of current page and saves it to the Screenshot directory in the background.
+        Only the capture command runs in the calling thread; decoding and the disk write are done by
+        self.screenshot_writer, which skips an image identical to the previous one and is flushed by quit().
         :param log_message: Message provided for logging.
-        :param directory: The directory name for screenshots.
-        :return: N/A
+        :param directory: The directory name for screenshots, relative to self.screenshot_root.
+        :return: path the screenshot is written to; the previous screenshot's path if this one is identical to it.
         """
 
         file_name = log_message + "." + str(round(time.time() * 1000)) + ".png"
+        destination_file = os.path.normpath(os.path.join(self.screenshot_root, directory, file_name))
 
-        current_directory = os.path.dirname(__file__)
-        file_path = directory + file_name
-        destination_file = os.path.join(current_directory, file_path)
-        destination_directory = os.path.join(current_directory, directory)
-
-        if not os.path.exists(destination_directory):
-            os.makedirs(destination_directory)
-
-        self.driver.save_screenshot(destination_file)
+        return self.screenshot_writer.submit(destination_file, self.driver.get_screenshot_as_base64())
 
     def element_explicit_wait(self, locator: dict, timeout: int = 10, frequency: float = 0.5) -> ExtendedWebElement:
         """
@@ -82,8 +113,90 @@ class CustomSeleniumDriver:
         :param frequency: Frequency at which webdriver checks to see if element is active.
         :return: WebElement object
         """
+        return self.wait_for(locator, 'clickable', timeout=timeout, frequency=frequency)
+
+    def wait_for(self, locator: dict, state: str = 'clickable', expected=None, timeout: float = 10,
+                 frequency: float = 0.5, event_driven: bool = None) -> ExtendedWebElement:
+        """
+        Wait for an element on current page to reach a state.
+        Event-driven waits run a MutationObserver in the page and return as soon as the DOM changes to match,
+        in a single command. They fall back to polling through WebDriverWait if async scripts are unavailable.
+        :param locator: locator of an element.
+        :param state: one of WAIT_STATES:
+            'present', 'visible', 'clickable', 'invisible' (absent or hidden),
+            'text' (text contains expected), 'attribute' (expected is a (name, value) pair),
+            'changed' (text or attributes differ from when the wait started).
+        :param expected: (optional) expected text or (name, value) pair for the 'text' and 'attribute' states.
+        :param timeout: Maximum number of seconds to wait.
+        :param frequency: Frequency at which webdriver checks the element when polling.
+        :param event_driven: (optional) overrides self.event_driven_waits for this call.
+        :return: ExtendedWebElement, or None for the 'invisible' state
+        :raises TimeoutException: if the state is not reached within timeout
+        """
+        if state not in self.WAIT_STATES:
+            raise ValueError(f"Unsupported wait state '{state}', expected one of {self.WAIT_STATES}")
 
         by_type = self.get_by_type(locator['locator_type'])
+        name, value = locator['Element name'], locator['locator']
+        if self.instrumentation is not None:
+            return self.instrumentation.call('wait', f'wait_for:{state}', name, f'{by_type}={value}', self._wait_for,
+                                             name, by_type, value, state, expected, timeout, frequency, event_driven)
+        return self._wait_for(name, by_type, value, state, expected, timeout, frequency, event_driven)
+
+    def _wait_for(self, name, by_type, value, state, expected, timeout, frequency, event_driven) -> ExtendedWebElement:
+        """Implementation of wait_for()."""
+        event_driven = self.event_driven_waits if event_driven is None else event_driven
+
+        if event_driven and self.async_waits_supported:
+            previous_timeout = self._script_timeout
+            raise_timeout = previous_timeout is None or previous_timeout < timeout + 1
+            if raise_timeout:
+                self.set_script_timeout(timeout + 1)
+            try:
+                result = self.driver.execute_async_script(
+                    scripts.WAIT_FOR_ELEMENT, by_type, value, state, expected, int(timeout * 1000))
+            except TimeoutException:
+                raise
+            except WebDriverException as error:
+                # Only give up on async scripts for the session when the driver lacks them; any other failure
+                # (a script error mid-navigation, a stale document) falls back to polling for this call only
+                message = (error.msg or '').lower()
+                if isinstance(error, UnknownMethodException) or \
+                        any(fragment in message for fragment in UNSUPPORTED_SCRIPT_ERRORS):
+                    self.async_waits_supported = False
+            else:
+                if result['status'] == 'timeout':
+                    raise TimeoutException(f"Timed out after {timeout}s waiting for {name or value} to be {state}")
+                if result['status'] == 'ok':
+                    web_element = result.get('element')
+                    if web_element is None:
+                        return None
+                    return ExtendedWebElement(self, name, value, by_type, web_element=web_element)
+                # The page could not evaluate this locator (status 'error'), poll from here instead
+            finally:
+                if raise_timeout:
+                    self.set_script_timeout(self.DEFAULT_SCRIPT_TIMEOUT if previous_timeout is None
+                                            else previous_timeout)
+
+        return self._poll_for(name, by_type, value, state, expected, timeout, frequency)
+
+    def _poll_for(self, name, by_type, value, state, expected, timeout, frequency) -> ExtendedWebElement:
+        """Polling implementation of wait_for()."""
+        located = (by_type, value)
+        if state == 'changed':
+            baseline = self._fingerprint(by_type, value)
+            condition = lambda driver: self._fingerprint(by_type, value) != baseline
+        elif state == 'attribute':
+            condition = lambda driver: driver.find_element(*located).get_attribute(expected[0]) == expected[1]
+        else:
+            condition = {
+                'present': lambda: ec.presence_of_element_located(located),
+                'visible': lambda: ec.visibility_of_element_located(located),
+                'clickable': lambda: ec.element_to_be_clickable(located),
+                'invisible': lambda: ec.invisibility_of_element_located(located),
+                'text': lambda: self._text_condition(name, by_type, value, expected),
+            }[state]()
+
         wait = WebDriverWait(
             self.driver,
             timeout=timeout,
@@ -93,8 +206,97 @@ class CustomSeleniumDriver:
                 ElementNotSelectableException,
                 ElementNotVisibleException])
 
-        wait.until(ec.element_to_be_clickable((by_type, locator['locator'])))
-        return ExtendedWebElement(self, locator['Element name'], locator['locator'], by_type)
+        result = wait.until(condition)
+        if state == 'invisible':
+            return None
+        web_element = result if state in ('present', 'visible', 'clickable', 'text') else None
+        return ExtendedWebElement(self, name, value, by_type, web_element=web_element)
+
+    def _text_condition(self, name, by_type, value, expected):
+        # ExtendedWebElement.text, like the event-driven wait: an input's value counts as its text
+        def condition(driver):
+            try:
+                web_element = driver.find_element(by_type, value)
+                text = ExtendedWebElement(self, name, value, by_type, web_element=web_element).text
+            except StaleElementReferenceException:
+                return False
+            return web_element if expected in text else False
+        return condition
+
+    def _fingerprint(self, by_type, value):
+        web_elements = self.driver.find_elements(by_type, value)
+        return web_elements[0].get_attribute('outerHTML') if web_elements else None
+
+    def record_reresolve(self, element_name: str) -> None:
+        """
+        Count a stale-element re-resolve so pages that churn the DOM can be found.
+        :param element_name: name (or by=locator) of the re-resolved element.
+        """
+        self.reresolve_counts[element_name] += 1
+
+    def enable_instrumentation(self, *sinks, instrumentation: Instrumentation = None) -> Instrumentation:
+        """
+        Start recording every WebDriver command, element action and wait of this driver.
+        :param *sinks: (optional) sinks receiving each record, e.g. MemorySink(), JsonLinesSink(path)
+        :param instrumentation: (optional) existing Instrumentation to share, e.g. between the drivers of a pool
+        :return: the active Instrumentation, whose histograms aggregate per-command latencies
+        """
+        if self.instrumentation is not None:
+            self.disable_instrumentation()
+        instrumentation = instrumentation or Instrumentation()
+        for sink in sinks:
+            instrumentation.add_sink(sink)
+        instrumentation.install(self.driver)
+        self.instrumentation = instrumentation
+        return instrumentation
+
+    def disable_instrumentation(self) -> None:
+        """Stop recording and flush the sinks."""
+        if self.instrumentation is None:
+            return
+        self.instrumentation.uninstall(self.driver)
+        self.instrumentation.flush()
+        self.instrumentation = None
+
+    def command_budget(self, max_commands: int = None, max_seconds: float = None, name: str = None) -> CommandBudget:
+        """
+        Limit the WebDriver commands and time of a block, as a context manager or a function decorator.
+        Exceeding either limit raises CommandBudgetExceeded with the commands broken down by name and element.
+        For page-object methods, see the within_budget() decorator.
+        :param max_commands: (optional) most WebDriver commands the block may issue
+        :param max_seconds: (optional) most seconds the block may take
+        :param name: (optional) name of the budgeted flow, used in the failure message
+        :return: CommandBudget
+        """
+        return CommandBudget(self, max_commands, max_seconds, name)
+
+    def fill_form(self, fields, keystrokes=(), raise_on_failure: bool = True) -> list:
+        """
+        Set many form fields with a single execute_script call instead of clear() and send_keys() per field.
+        Values go through the native value setter followed by bubbling 'input' and 'change' events (checkboxes and
+        radios are clicked), so frameworks like React see the change. Fields without a resolved handle are found in
+        the same script.
+        :param fields: {field: value} or [(field, value), ...]; a field is an ExtendedWebElement, a Locator or a
+            locator dict (only in the list form). Values: text for text controls, True/False for checkboxes and
+            radios, a radio value for a radio group, an option value or text (a list for multi-selects) for selects.
+        :param keystrokes: (optional) fields (as given in fields) set with set_value() instead, for controls that
+            react to real key events; file inputs always are
+        :param raise_on_failure: (optional) raise FormFillError when a field could not be set
+        :return: list of FieldResult(name, value, error) in field order
+        """
+        if self.instrumentation is not None:
+            return self.instrumentation.call('action', 'fill_form', None, None, fill_form,
+                                             self, fields, keystrokes, raise_on_failure)
+        return fill_form(self, fields, keystrokes, raise_on_failure)
+
+    def js_actions(self, raise_on_failure: bool = True) -> ActionBatch:
+        """
+        Queue of element actions (click, scroll_into_view, focus, set_attribute, dispatch_event) run together in
+        one execute_script call by flush(), or when the with block ends.
+        :param raise_on_failure: (optional) raise JavaScriptActionError when an action failed in the page
+        :return: ActionBatch
+        """
+        return ActionBatch(self, raise_on_failure)
 
     def scroll_window(self, direction: str) -> None:
         """
@@ -121,7 +323,10 @@ class CustomSeleniumDriver:
         return self.driver.name
 
     def get(self, url):
-        self.driver.get(url)
+        try:
+            self.driver.get(url)
+        finally:
+            self.invalidate_elements()
 
     def execute_script(self, script, *args):
         return self.driver.execute_script(script, *args)
@@ -134,7 +339,15 @@ class CustomSeleniumDriver:
         return self.driver.current_url
 
     def quit(self):
-        self.driver.quit()
+        try:
+            self.driver.quit()
+        finally:
+            self.screenshot_writer.close()
+            if self.instrumentation is not None:
+                # Only flush: the sinks may be shared (e.g. by the drivers of a pool), so whoever created the
+                # Instrumentation closes it
+                self.instrumentation.uninstall(self.driver)
+                self.instrumentation.flush()
 
     def maximize_window(self):
         self.driver.maximize_window()
@@ -175,51 +388,59 @@ class CustomSeleniumDriver:
 
     # SECTION: Web element collections
 
-    def find_elements(self, by, value):
-        element_count = len(self.driver.find_elements(by, value))
-        return [ExtendedWebElement(self, None, value, by, index) for index in range(1, element_count + 1)]
+    def find_elements(self, by, value, element_name=None):
+        return ElementCollection.find(self, by, value, element_name)
 
-    def find_elements_by_class_name(self, name):
-        element_count = len(self.driver.find_elements_by_class_name(self, name))
-        return [ExtendedWebElement(self, None, name, By.CLASS_NAME, index) for index in range(1, element_count + 1)]
+    def find_elements_by_class_name(self, name, element_name=None):
+        return self.find_elements(By.CLASS_NAME, name, element_name)
 
-    def find_elements_by_css_selector(self, css_selector):
-        element_count = len(self.driver.find_elements_by_css_selector(self, css_selector))
-        return [ExtendedWebElement(self, None, css_selector, By.CSS_SELECTOR, index) for index in range(1, element_count + 1)]
+    def find_elements_by_css_selector(self, css_selector, element_name=None):
+        return self.find_elements(By.CSS_SELECTOR, css_selector, element_name)
 
-    def find_elements_by_id(self, id):
-        element_count = len(self.driver.find_elements_by_id(self, id))
-        return [ExtendedWebElement(self, None, id, By.ID, index) for index in range(1, element_count + 1)]
+    def find_elements_by_id(self, id, element_name=None):
+        return self.find_elements(By.ID, id, element_name)
 
-    def find_elements_by_link_text(self, link_text):
-        element_count = len(self.driver.find_elements_by_link_text(self, link_text))
-        return [ExtendedWebElement(self, None, link_text, By.LINK_TEXT, index) for index in range(1, element_count + 1)]
+    def find_elements_by_link_text(self, link_text, element_name=None):
+        return self.find_elements(By.LINK_TEXT, link_text, element_name)
 
-    def find_elements_by_name(self, name):
-        element_count = len(self.driver.find_elements_by_name(self, name))
-        return [ExtendedWebElement(self, None, name, By.NAME, index) for index in range(1, element_count + 1)]
+    def find_elements_by_name(self, name, element_name=None):
+        return self.find_elements(By.NAME, name, element_name)
 
-    def find_elements_by_partial_link_text(self, partial_link_text):
-        element_count = len(self.driver.find_elements_by_partial_link_text(self, partial_link_text))
-        return [ExtendedWebElement(self, None, partial_link_text, By.PARTIAL_LINK_TEXT, index) for index in range(1, element_count + 1)]
+    def find_elements_by_partial_link_text(self, partial_link_text, element_name=None):
+        return self.find_elements(By.PARTIAL_LINK_TEXT, partial_link_text, element_name)
 
-    def find_elements_by_tag_name(self, tag_name):
-        element_count = len(self.driver.find_elements_by_tag_name(self, tag_name))
-        return [ExtendedWebElement(self, None, tag_name, By.TAG_NAME, index) for index in range(1, element_count + 1)]
+    def find_elements_by_tag_name(self, tag_name, element_name=None):
+        return self.find_elements(By.TAG_NAME, tag_name, element_name)
 
-    def find_elements_by_xpath(self, xpath):
-        element_count = len(self.driver.find_elements_by_xpath(self, xpath))
-        return [ExtendedWebElement(self, None, xpath, By.XPATH, index) for index in range(1, element_count + 1)]
+    def find_elements_by_xpath(self, xpath, element_name=None):
+        return self.find_elements(By.XPATH, xpath, element_name)
 
     # SECTION: Navigation
+    def invalidate_elements(self) -> None:
+        """
+        Start a new navigation generation: every element and collection re-finds its handle on next use.
+        Called by get/back/forward/refresh; call it after navigating by other means (e.g. a link click) to avoid
+        a stale-element round trip.
+        """
+        self.navigation_generation += 1
+
     def back(self):
-        self.driver.back()
+        try:
+            self.driver.back()
+        finally:
+            self.invalidate_elements()
 
     def forward(self):
-        self.driver.forward()
+        try:
+            self.driver.forward()
+        finally:
+            self.invalidate_elements()
 
     def refresh(self):
-        self.driver.refresh()
+        try:
+            self.driver.refresh()
+        finally:
+            self.invalidate_elements()
 
     # SECTION: Options
     def get_cookies(self):
@@ -243,6 +464,7 @@ class CustomSeleniumDriver:
 
     def set_script_timeout(self, time_to_wait):
         self.driver.set_script_timeout(time_to_wait)
+        self._script_timeout = time_to_wait
 
     def set_page_load_timeout(self, time_to_wait):
         self.driver.set_page_load_timeout(time_to_wait)
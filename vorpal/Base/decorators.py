@@ -1,22 +1,82 @@
-from time import sleep
-from selenium.common.exceptions import InvalidElementStateException, ElementNotVisibleException, \
-    ElementNotInteractableException, ElementNotSelectableException, ElementClickInterceptedException
+from functools import wraps
+from selenium.common.exceptions import StaleElementReferenceException
+from .retry_policy import RetryPolicy, DEFAULT_RETRY_POLICY
+from .instrumentation import instrumentation_for
+
+
+def resolve_retry_policy(element, retry_policy: RetryPolicy = None, action_timeout: float = None,
+                         action_increment: float = None) -> RetryPolicy:
+    """
+    Pick the retry policy for one call: the call's own policy, else the element's, else the driver's, else the default.
+    :param element: object whose method is being retried (usually an ExtendedWebElement)
+    :param retry_policy: (optional) per-call RetryPolicy
+    :param action_timeout: (optional) per-call timeout override
+    :param action_increment: (optional) per-call fixed delay between attempts
+    :return: RetryPolicy
+    """
+    if not isinstance(retry_policy, RetryPolicy):
+        retry_policy = getattr(element, 'retry_policy', None)
+    if not isinstance(retry_policy, RetryPolicy):
+        retry_policy = getattr(getattr(element, 'driver', None), 'retry_policy', None)
+    if not isinstance(retry_policy, RetryPolicy):
+        retry_policy = DEFAULT_RETRY_POLICY
+
+    overrides = {}
+    if action_timeout:
+        overrides['timeout'] = action_timeout
+    if action_increment is not None:
+        # A fixed increment keeps the original constant-delay behaviour
+        overrides.update(initial_delay=action_increment, max_delay=action_increment, multiplier=1, jitter=0)
+    return retry_policy.with_overrides(**overrides) if overrides else retry_policy
+
 
 def retry_with_timeout(func):
-    """Decorator to retry function every :action_increment seconds, up to action_timeout seconds"""
+    """
+    Decorator to retry function under a RetryPolicy until its deadline passes.
+    With instrumentation enabled, the whole action is recorded along with its number of attempts.
+    Accepts per-call retry_policy, action_timeout and action_increment keyword arguments,
+    which are consumed here and not passed on to the function.
+    """
+    @wraps(func)
+    def wrapped(self, *args, **kwargs):
+        retry_policy = resolve_retry_policy(self,
+                                            kwargs.pop('retry_policy', None),
+                                            kwargs.pop('action_timeout', None),
+                                            kwargs.pop('action_increment', None))
+        instrumentation = instrumentation_for(self)
+        if instrumentation is None:
+            return retry_policy.call(func.__name__, func, self, *args, **kwargs)
+
+        def attempt(*args, **kwargs):
+            instrumentation.count_attempt()
+            return func(*args, **kwargs)
+        return instrumentation.call('action', func.__name__, self.name, f'{self.by}={self.locator}',
+                                    retry_policy.call, func.__name__, attempt, self, *args, **kwargs)
+
+    return wrapped
+
+
+def recover_stale(func):
+    """Decorator to re-resolve a stale element (via self.reresolve()) and retry the action once"""
+    @wraps(func)
+    def wrapped(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        except StaleElementReferenceException:
+            self.reresolve()
+            return func(self, *args, **kwargs)
+
+    return wrapped
+
+
+def instrumented(func):
+    """Decorator to record an element or collection method as an 'action' when instrumentation is enabled"""
+    @wraps(func)
     def wrapped(self, *args, **kwargs):
-        timeout = kwargs.get('action_timeout', 5) or 5
-        increment = kwargs.get('action_increment', 0.5)
-        total = 0
-        while total < timeout:
-            try:
-                return func(self, *args, **kwargs)
-            except (InvalidElementStateException,
-                    ElementNotVisibleException,
-                    ElementNotInteractableException,
-                    ElementNotSelectableException,
-                    ElementClickInterceptedException):
-                sleep(increment)
-                total += increment
+        instrumentation = instrumentation_for(self)
+        if instrumentation is None:
+            return func(self, *args, **kwargs)
+        return instrumentation.call('action', func.__name__, self.name, f'{self.by}={self.locator}',
+                                    func, self, *args, **kwargs)
 
     return wrapped
@@ -1,10 +1,14 @@
 """
 Module containing wrapper class for Selenium Web.
 """
+from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.remote.webelement import WebElement, By
 from selenium.webdriver.common.action_chains import ActionChains
-from .decorators import retry_with_timeout
-
+from selenium.webdriver.support.ui import WebDriverWait
+from .decorators import retry_with_timeout, recover_stale, instrumented
+from .element_snapshot import ElementSnapshot
+from .retry_policy import RetryPolicy
+from . import scripts
 
 
 class ExtendedWebElement:
@@ -12,7 +16,9 @@ class ExtendedWebElement:
     Extends web elements with additional functionality.
     """
 
-    def __init__(self, driver, name: str, locator: str, by: By = By.CSS_SELECTOR, nth_of_type=1):
+    def __init__(self, driver, name: str, locator: str, by: By = By.CSS_SELECTOR, nth_of_type=1,
+                 use_snapshot: bool = False, snapshot_attributes=(), web_element: WebElement = None,
+                 retry_policy: RetryPolicy = None, css_selector: str = None):
         """
         Initializes ExtendedWebElement with Selenium WebElement.
         :param driver: CustomSeleniumDriver
@@ -20,28 +26,105 @@ class ExtendedWebElement:
         :param locator: property value
         :param by: (optional) property by which to find element (default CSS)
         :param nth_of_type: (optional) index of element in list of elements if more than one expected to match locator
+        :param use_snapshot: (optional) serve state properties from a single cached snapshot() round trip
+        :param snapshot_attributes: (optional) attribute names collected with every snapshot
+        :param web_element: (optional) already-resolved Selenium WebElement, skips the initial lookup
+        :param retry_policy: (optional) RetryPolicy for this element's actions, overrides the driver's
+        :param css_selector: (optional) precomputed CSS equivalent of the locator
         """
         self.driver = driver
         self.name = name
         self.locator = locator
         self.by = by
         self.nth_of_type = nth_of_type
-        self.__element = None
+        self.use_snapshot = use_snapshot
+        self.snapshot_attributes = tuple(snapshot_attributes)
+        self.retry_policy = retry_policy
+        self.css_selector = css_selector
+        self.__element = web_element
+        self.__snapshot = None
+        # Navigation generation of the driver when the handle was resolved, see CustomSeleniumDriver.get()
+        self.__generation = getattr(driver, 'navigation_generation', 0)
 
     @property
     def element(self):
-        if self.__element is None:
-            if self.nth_of_type == 1:
-                self.__element = self.driver.driver.find_element(self.by, self.locator)
-            else:
-                self.__element = self.driver.driver.find_elements(self.by, self.locator)[self.nth_of_type - 1]
+        if self.__element is None or self.__generation != self.driver.navigation_generation:
+            self.attach(self._find())
+
+        return self.__element
+
+    @property
+    def resolved_element(self) -> WebElement:
+        """The handle found on the current page, or None when it has yet to be found (no lookup is made)."""
+        if self.__generation != self.driver.navigation_generation:
+            return None
+        return self.__element
+
+    def attach(self, web_element: WebElement) -> None:
+        """
+        Use an already-resolved handle (e.g. from BasePage.prefetch()) for the current page.
+        :param web_element: Selenium WebElement
+        """
+        self.__element = web_element
+        self.__snapshot = None
+        self.__generation = getattr(self.driver, 'navigation_generation', 0)
+
+    def _find(self) -> WebElement:
+        if self.nth_of_type == 1:
+            return self.driver.driver.find_element(self.by, self.locator)
+        return self.driver.driver.find_elements(self.by, self.locator)[self.nth_of_type - 1]
+
+    def reresolve(self) -> WebElement:
+        """
+        Discard the cached (stale) handle and find the element again from by/locator/nth_of_type.
+        Waits up to the driver's implicit_wait for the element to reappear and records the re-resolve on the driver.
+        :return: the new Selenium WebElement
+        """
+        self.__element = None
+        self.__snapshot = None
+        self.driver.record_reresolve(self.name or f'{self.by}={self.locator}')
 
+        wait = WebDriverWait(self.driver.driver, timeout=self.driver.implicit_wait,
+                             ignored_exceptions=[NoSuchElementException, IndexError])
+        self.attach(wait.until(lambda _: self._find()))
         return self.__element
 
+    # Snapshots
+    @instrumented
+    @recover_stale
+    def snapshot(self, attributes=()) -> ElementSnapshot:
+        """
+        Collect text, value, tag, visibility, enabled/selected state, rect and attributes in one execute_script call.
+        The result is cached and serves the state properties while use_snapshot is enabled.
+        :param attributes: (optional) attribute names to collect in addition to self.snapshot_attributes
+        :return: ElementSnapshot
+        """
+        names = list(self.snapshot_attributes)
+        names.extend(name for name in attributes if name not in names)
+        result = self.driver.execute_script(scripts.SNAPSHOT_ELEMENT, self.element, names)
+        self.__snapshot = ElementSnapshot.from_script_result(result)
+        return self.__snapshot
+
+    @property
+    def cached_snapshot(self) -> ElementSnapshot:
+        """The most recent snapshot, taking one if none is cached or the driver navigated since."""
+        if self.__snapshot is None or self.__generation != self.driver.navigation_generation:
+            self.snapshot()
+        return self.__snapshot
+
+    def invalidate_snapshot(self):
+        """Discard the cached snapshot so the next read fetches fresh state."""
+        self.__snapshot = None
+
     # Overwritten methods from WebElement
     @property
+    @instrumented
+    @recover_stale
     def text(self):
         """The text (or value if input) of the element."""
+        if self.use_snapshot:
+            return self.cached_snapshot.display_text
+
         text = ''
         if self.element.tag_name == 'input':
             text = self.element.get_attribute('value')
@@ -55,78 +138,132 @@ class ExtendedWebElement:
         return text.strip()
 
     @property
+    @recover_stale
     def text_raw(self):
         """The raw 'text' attribute of an element, regardless of tag_name"""
         return self.element.text
 
     @retry_with_timeout
+    @recover_stale
     def set_value(self, text_value: str):
         """
         Set value in text field, clearing preexisting content.
         :param text_value: Text value to element
         """
+        self.invalidate_snapshot()
         self.element.clear()
         self.element.send_keys(text_value)
 
+    @instrumented
     def click_js(self):
-        """Click element using javascript (does not require element visibility)"""
-        css_selector = self.convert_locator_to_css()
-        self.driver.execute_script(f'document.querySelector("{css_selector}").click()')
+        """
+        Click element using javascript (does not require element visibility).
+        Takes one script call: the resolved handle is passed to it, or the element is found by the script itself.
+        For several actions in one call, see CustomSeleniumDriver.js_actions().
+        """
+        # Imported here: js_actions resolves its targets through locator, which imports this module
+        from .js_actions import ActionBatch
+        ActionBatch(self.driver).click(self).flush()
 
     @retry_with_timeout
+    @recover_stale
     def double_click(self):
+        self.invalidate_snapshot()
         actions = ActionChains(self.driver)
         actions.double_click(self.element)
         actions.perform()
 
     # Simple pass-throughs from WebElement
     @retry_with_timeout
+    @recover_stale
     def click(self):
+        self.invalidate_snapshot()
         self.element.click()
 
     @property
+    @instrumented
+    @recover_stale
     def tag_name(self):
+        if self.use_snapshot:
+            return self.cached_snapshot.tag_name
         return self.element.tag_name
 
+    @instrumented
+    @recover_stale
     def submit(self):
+        self.invalidate_snapshot()
         self.element.submit()
 
     @retry_with_timeout
+    @recover_stale
     def clear(self):
+        self.invalidate_snapshot()
         self.element.clear()
 
+    @instrumented
+    @recover_stale
     def get_property(self, name):
         return self.element.get_property(name)
 
+    @instrumented
+    @recover_stale
     def get_attribute(self, name):
+        if self.use_snapshot and self.cached_snapshot.has_attribute(name):
+            return self.cached_snapshot.get_attribute(name)
         return self.element.get_attribute(name)
 
     @property
+    @instrumented
+    @recover_stale
     def is_selected(self):
+        if self.use_snapshot:
+            return self.cached_snapshot.is_selected
         return self.element.is_selected
 
     @property
+    @instrumented
+    @recover_stale
     def is_enabled(self):
+        if self.use_snapshot:
+            return self.cached_snapshot.is_enabled
         return self.element.is_enabled()
 
     @retry_with_timeout
+    @recover_stale
     def send_keys(self, value):
+        self.invalidate_snapshot()
         self.element.send_keys(value)
 
     @property
+    @instrumented
+    @recover_stale
     def is_displayed(self):
+        if self.use_snapshot:
+            return self.cached_snapshot.is_displayed
         return self.element.is_displayed()
 
     @property
+    @instrumented
+    @recover_stale
     def size(self):
+        if self.use_snapshot:
+            return self.cached_snapshot.size
         return self.element.size
 
     @property
+    @instrumented
+    @recover_stale
     def location(self):
+        if self.use_snapshot:
+            return self.cached_snapshot.location
         return self.element.location
 
     @property
+    @instrumented
+    @recover_stale
     def rect(self):
+        if self.use_snapshot:
+            return self.cached_snapshot.rect
         return self.element.rect
 
     # Other methods
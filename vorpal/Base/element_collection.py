@@ -0,0 +1,170 @@
+"""
+Module containing a collection of web elements resolved with a single lookup.
+"""
+from collections.abc import Sequence
+from typing import Callable
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from .decorators import recover_stale, instrumented
+from .element import ExtendedWebElement
+from .element_snapshot import ElementSnapshot
+from . import scripts
+
+
+class ElementCollection(Sequence):
+    """
+    Ordered collection of ExtendedWebElements matching one locator.
+    All handles are resolved with one find_elements command, and the vectorized reads
+    (texts, attributes, visible, rects, snapshots, filter) each cost a single script call.
+    """
+
+    def __init__(self, driver, name: str, locator: str, by: By, web_elements: list, indices: list = None,
+                 total: int = None):
+        """
+        Initializes ElementCollection with already-resolved Selenium WebElements.
+        :param driver: CustomSeleniumDriver
+        :param name: human-friendly name for the elements
+        :param locator: property value
+        :param by: property by which the elements were found
+        :param web_elements: Selenium WebElements in document order
+        :param indices: (optional) position of each handle in the full match set, used as nth_of_type
+        :param total: (optional) size of the full match set when indices is given (default: one past the last index)
+        """
+        self.driver = driver
+        self.name = name
+        self.locator = locator
+        self.by = by
+        self.web_elements = list(web_elements)
+        self.indices = list(indices) if indices is not None else list(range(len(self.web_elements)))
+        if total is None:
+            total = len(self.web_elements) if indices is None else max(self.indices, default=-1) + 1
+        # Size of the full match set the positional indices refer to
+        self.total = total
+        self.generation = getattr(driver, 'navigation_generation', 0)
+        # Whether this is every match of the locator (not a slice or filter result)
+        self.complete = indices is None
+
+    @classmethod
+    def find(cls, driver, by: By, locator: str, name: str = None) -> 'ElementCollection':
+        """
+        Resolve every element matching the locator with one command.
+        :param driver: CustomSeleniumDriver
+        :param by: property by which to find elements
+        :param locator: property value
+        :param name: (optional) human-friendly name for the elements
+        :return: ElementCollection
+        """
+        return cls(driver, name, locator, by, driver.driver.find_elements(by, locator))
+
+    def __len__(self):
+        self._check_navigation()
+        return len(self.web_elements)
+
+    def __getitem__(self, index):
+        self._check_navigation()
+        if isinstance(index, slice):
+            return self._subset(range(len(self))[index])
+
+        web_element = self.web_elements[index]
+        return ExtendedWebElement(self.driver, self.name, self.locator, self.by,
+                                  self.indices[index] + 1, web_element=web_element)
+
+    def __repr__(self):
+        return f"<ElementCollection {self.name or self.locator!r} ({len(self)} elements)>"
+
+    def _subset(self, positions) -> 'ElementCollection':
+        positions = list(positions)
+        return ElementCollection(self.driver, self.name, self.locator, self.by,
+                                 [self.web_elements[i] for i in positions],
+                                 [self.indices[i] for i in positions], self.total)
+
+    def reresolve(self) -> None:
+        """
+        Re-query the locator after the handles went stale, keeping the elements at their original positions.
+        Waits up to the driver's implicit_wait for the locator to match as many elements as before, and records the
+        re-resolve on the driver.
+        :raises StaleElementReferenceException: if the number of matches changed, so the positions no longer hold
+        """
+        self.driver.record_reresolve(self.name or f'{self.by}={self.locator}')
+
+        def same_size(_):
+            web_elements = self.driver.driver.find_elements(self.by, self.locator)
+            return web_elements if len(web_elements) == self.total else None
+
+        try:
+            web_elements = WebDriverWait(self.driver.driver, timeout=self.driver.implicit_wait).until(same_size)
+        except TimeoutException:
+            raise StaleElementReferenceException(
+                f"{self.name or self.locator} matched {self.total} elements before going stale and a different "
+                f"number after {self.driver.implicit_wait}s") from None
+        self._attach(web_elements)
+
+    def _requery(self, every_match: bool = False) -> None:
+        web_elements = self.driver.driver.find_elements(self.by, self.locator)
+        if every_match:
+            self.indices = list(range(len(web_elements)))
+            self.total = len(web_elements)
+        self.indices = [index for index in self.indices if index < len(web_elements)]
+        self._attach(web_elements)
+
+    def _attach(self, web_elements: list) -> None:
+        self.web_elements = [web_elements[index] for index in self.indices]
+        self.generation = getattr(self.driver, 'navigation_generation', 0)
+
+    def _check_navigation(self) -> None:
+        # Handles found before the driver navigated belong to the previous page
+        if self.generation != self.driver.navigation_generation:
+            self._requery(every_match=self.complete)
+
+    @recover_stale
+    def _map_script(self, script: str, *args) -> list:
+        self._check_navigation()
+        if not self.web_elements:
+            return []
+        return self.driver.execute_script(script, self.web_elements, *args)
+
+    # Vectorized reads
+    @instrumented
+    def texts(self) -> list:
+        """The text (or value if input) of every element, as ExtendedWebElement.text would return it."""
+        return self._map_script(scripts.COLLECTION_TEXTS)
+
+    @instrumented
+    def attributes(self, name: str) -> list:
+        """
+        Value of one attribute for every element.
+        :param name: attribute name
+        :return: list of str (or None where the attribute is missing)
+        """
+        return self._map_script(scripts.COLLECTION_ATTRIBUTES, name)
+
+    @instrumented
+    def rects(self) -> list:
+        """Rect dict ({'x', 'y', 'width', 'height'}) of every element."""
+        return self._map_script(scripts.COLLECTION_RECTS)
+
+    @instrumented
+    def snapshots(self, attributes=()) -> list:
+        """
+        ElementSnapshot of every element.
+        :param attributes: (optional) attribute names to collect with each snapshot
+        :return: list of ElementSnapshot
+        """
+        results = self._map_script(scripts.SNAPSHOT_ELEMENTS, list(attributes))
+        return [ElementSnapshot.from_script_result(result) for result in results]
+
+    def visible(self) -> 'ElementCollection':
+        """Subset of elements currently displayed."""
+        displayed = self._map_script(scripts.COLLECTION_DISPLAYED)
+        return self._subset(i for i, is_displayed in enumerate(displayed) if is_displayed)
+
+    def filter(self, predicate: Callable[[ElementSnapshot], bool], attributes=()) -> 'ElementCollection':
+        """
+        Subset of elements whose snapshot satisfies predicate.
+        :param predicate: function taking an ElementSnapshot and returning bool
+        :param attributes: (optional) attribute names the predicate needs from the snapshot
+        :return: ElementCollection
+        """
+        snapshots = self.snapshots(attributes)
+        return self._subset(i for i, snapshot in enumerate(snapshots) if predicate(snapshot))
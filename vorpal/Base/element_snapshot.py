@@ -0,0 +1,67 @@
+"""
+Module containing an immutable, point-in-time view of a web element's state.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+
+class ElementSnapshot(namedtuple('ElementSnapshot', [
+        'tag_name', 'text', 'value', 'inner_text', 'is_displayed', 'is_enabled', 'is_selected', 'rect',
+        'attributes'])):
+    """
+    Immutable state of a web element collected in a single round trip.
+    Build instances with ElementSnapshot.from_script_result() from the result of scripts.SNAPSHOT_ELEMENT.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_script_result(cls, result: dict) -> 'ElementSnapshot':
+        """
+        Builds a snapshot from the dict returned by the snapshot script.
+        :param result: dict returned by execute_script(scripts.SNAPSHOT_ELEMENT, ...)
+        :return: ElementSnapshot
+        """
+        rect = result.get('rect') or {}
+        return cls(
+            tag_name=result.get('tag_name'),
+            text=result.get('text') or '',
+            value=result.get('value'),
+            inner_text=result.get('inner_text'),
+            is_displayed=bool(result.get('is_displayed')),
+            is_enabled=bool(result.get('is_enabled')),
+            is_selected=bool(result.get('is_selected')),
+            rect=MappingProxyType({key: rect.get(key, 0) for key in ('x', 'y', 'width', 'height')}),
+            attributes=MappingProxyType(dict(result.get('attributes') or {})))
+
+    @property
+    def display_text(self) -> str:
+        """The text (or value if input) of the element, matching ExtendedWebElement.text."""
+        text = self.value if self.tag_name == 'input' else self.text
+
+        # If still no text, fall back to 'innerText'
+        if text is None or len(text) == 0:
+            text = self.inner_text or ''
+
+        return text.strip()
+
+    @property
+    def size(self) -> dict:
+        return {'height': self.rect['height'], 'width': self.rect['width']}
+
+    @property
+    def location(self) -> dict:
+        return {'x': self.rect['x'], 'y': self.rect['y']}
+
+    def has_attribute(self, name: str) -> bool:
+        """Whether the attribute was requested when the snapshot was taken."""
+        return name in self.attributes
+
+    def get_attribute(self, name: str):
+        """
+        Value of a requested attribute.
+        :param name: attribute name, which must have been requested when the snapshot was taken
+        :return: attribute value as str, or None if the element does not have it
+        """
+        if name not in self.attributes:
+            raise KeyError(f"Attribute '{name}' was not requested when the snapshot was taken")
+        return self.attributes[name]
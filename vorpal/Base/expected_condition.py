@@ -1,14 +1,110 @@
 """Methods to handle waiting for a condition to be true"""
-from time import sleep
+from collections import namedtuple
+from time import sleep, monotonic
 from typing import Callable
+from selenium.common.exceptions import TimeoutException
+
+# Result of wait_any: position, function and (truthy) return value of the condition that fired
+WaitResult = namedtuple('WaitResult', ['index', 'condition', 'value'])
+
+
+class WaitTimeoutException(TimeoutException):
+    """Raised when conditions are not met before the wait's deadline."""
+
+    def __init__(self, message: str, elapsed: float, polls: int, last_exception: Exception = None):
+        super().__init__(message)
+        self.elapsed = elapsed
+        self.polls = polls
+        self.last_exception = last_exception
+
+
+def _poll(conditions, require_all, timeout_seconds, polling_frequency_seconds, backoff, max_polling_seconds,
+          ignored_exceptions):
+    """
+    Evaluate conditions once per poll cycle until satisfied or the monotonic deadline passes.
+    :return: list of values (require_all) or WaitResult (any)
+    """
+    start = monotonic()
+    deadline = start + timeout_seconds
+    interval = polling_frequency_seconds
+    polls = 0
+    last_exception = None
+    while True:
+        polls += 1
+        values = []
+        for index, condition in enumerate(conditions):
+            try:
+                value = condition()
+            except ignored_exceptions as exception:
+                last_exception = exception
+                value = None
+
+            if require_all:
+                if not value:
+                    break
+                values.append(value)
+            elif value:
+                return WaitResult(index, condition, value)
+        else:
+            if require_all:
+                return values
+
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            elapsed = monotonic() - start
+            names = ', '.join(getattr(condition, '__name__', repr(condition)) for condition in conditions)
+            raise WaitTimeoutException(
+                f"Timed out after {elapsed:.2f}s ({polls} polls) waiting for {'all' if require_all else 'any'} of: {names}",
+                elapsed, polls, last_exception)
+
+        sleep(min(interval, remaining))
+        interval *= backoff
+        if max_polling_seconds is not None:
+            interval = min(interval, max_polling_seconds)
 
 
 def wait_until(
         condition_function: Callable[[], bool],
         timeout_seconds: float=5,
-        polling_frequency_seconds: float=0.5) -> None:
+        polling_frequency_seconds: float=0.5,
+        backoff: float=1,
+        max_polling_seconds: float=None,
+        ignored_exceptions: tuple=()):
+    """
+    Wait until condition_function returns a truthy value.
+    :param condition_function: function called once per poll
+    :param timeout_seconds: (optional) deadline measured on a monotonic clock
+    :param polling_frequency_seconds: (optional) first delay between polls
+    :param backoff: (optional) factor applied to the delay after each poll
+    :param max_polling_seconds: (optional) upper bound of the delay between polls
+    :param ignored_exceptions: (optional) exception types treated as a falsy result
+    :return: the truthy value returned by condition_function
+    :raises WaitTimeoutException: if the deadline passes first
+    """
+    return _poll([condition_function], False, timeout_seconds, polling_frequency_seconds, backoff,
+                 max_polling_seconds, tuple(ignored_exceptions)).value
+
+
+def wait_any(*conditions: Callable[[], bool], timeout_seconds: float=5, polling_frequency_seconds: float=0.5,
+             backoff: float=1, max_polling_seconds: float=None, ignored_exceptions: tuple=()) -> WaitResult:
+    """
+    Wait until any of the conditions returns a truthy value, checking every condition in each poll cycle.
+    Useful when a page can end in one of several states (e.g. success banner, error toast, redirect).
+    Accepts the same keyword arguments as wait_until.
+    :return: WaitResult naming the condition that fired
+    :raises WaitTimeoutException: if the deadline passes first
+    """
+    return _poll(conditions, False, timeout_seconds, polling_frequency_seconds, backoff,
+                 max_polling_seconds, tuple(ignored_exceptions))
+
 
-    time_waited = 0
-    while not condition_function():
-        sleep(polling_frequency_seconds)
-        time_waited += polling_frequency_seconds
+def wait_all(*conditions: Callable[[], bool], timeout_seconds: float=5, polling_frequency_seconds: float=0.5,
+             backoff: float=1, max_polling_seconds: float=None, ignored_exceptions: tuple=()) -> list:
+    """
+    Wait until all of the conditions return a truthy value in the same poll cycle.
+    Accepts the same keyword arguments as wait_until.
+    :return: list of the values returned by each condition
+    :raises WaitTimeoutException: if the deadline passes first
+    """
+    return _poll(conditions, True, timeout_seconds, polling_frequency_seconds, backoff,
+                 max_polling_seconds, tuple(ignored_exceptions))
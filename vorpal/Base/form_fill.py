@@ -0,0 +1,67 @@
+"""
+Module containing bulk form filling: many fields set with a single execute_script call.
+"""
+from collections import namedtuple
+from collections.abc import Mapping
+from .element import ExtendedWebElement
+from .js_actions import run_element_script
+from .locator import Locator, as_element
+from . import scripts
+
+# Outcome of one field of fill_form(); error is None when the value was set
+FieldResult = namedtuple('FieldResult', ['name', 'value', 'error'])
+
+
+class FormFillError(Exception):
+    """Raised by fill_form() when one or more fields could not be set."""
+
+    def __init__(self, results: list):
+        self.results = results
+        self.failures = [result for result in results if result.error is not None]
+        super().__init__('Could not fill ' + '; '.join(f"{failure.name}: {failure.error}"
+                                                       for failure in self.failures))
+
+
+def fill_form(driver, fields, keystrokes=(), raise_on_failure: bool = True) -> list:
+    """
+    Set text inputs, textareas, selects, checkboxes and radios in one execute_script call, see
+    CustomSeleniumDriver.fill_form().
+    :return: list of FieldResult in field order
+    """
+    pairs = list(fields.items() if isinstance(fields, Mapping) else fields)
+    elements = [as_element(driver, field) for field, _ in pairs]
+    typed = {id(_typed_element(elements, pairs, field)) for field in keystrokes}
+
+    scripted = [(element, value) for element, (_, value) in zip(elements, pairs) if id(element) not in typed]
+    outcomes = {}
+    if scripted:
+        results = run_element_script(driver, scripts.FILL_FORM, scripted, _spec)
+        for (element, _), (error, _) in zip(scripted, results):
+            outcomes[id(element)] = error
+
+    report = []
+    for element, (_, value) in zip(elements, pairs):
+        error = outcomes.get(id(element), scripts.FILL_NEEDS_KEYSTROKES)
+        if error == scripts.FILL_NEEDS_KEYSTROKES:
+            try:
+                element.set_value(value)
+                error = None
+            except Exception as exception:
+                error = f"{type(exception).__name__}: {exception}".strip()
+        report.append(FieldResult(element.name or f'{element.by}={element.locator}', value, error))
+
+    if raise_on_failure and any(result.error is not None for result in report):
+        raise FormFillError(report)
+    return report
+
+
+def _typed_element(elements, pairs, field) -> ExtendedWebElement:
+    for element, (key, _) in zip(elements, pairs):
+        if key is field or (not isinstance(field, (ExtendedWebElement, Locator)) and key == field):
+            return element
+    raise KeyError(f"Keystroke field {field!r} is not one of the fields to fill")
+
+
+def _spec(field: tuple, handle) -> list:
+    element, value = field
+    return [handle, element.by, element.locator, element.nth_of_type, value]
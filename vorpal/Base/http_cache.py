@@ -0,0 +1,249 @@
+"""
+Module containing an opt-in response cache for BaseHttpEndpoint.GET with ETag/Last-Modified revalidation.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from collections import namedtuple, OrderedDict
+from threading import Lock
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# One cached response; stored_at is a wall-clock timestamp so disk entries can be shared between processes
+CacheEntry = namedtuple('CacheEntry', ['url', 'status_code', 'reason', 'headers', 'content', 'encoding', 'stored_at'])
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU store bounded by total body size and (optionally) number of entries.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: int = None):
+        """
+        :param max_bytes: (optional) upper bound of the summed body sizes
+        :param max_entries: (optional) upper bound of the number of entries
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str) -> CacheEntry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key).content)
+            if len(entry.content) > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self.size += len(entry.content)
+            while self.size > self.max_bytes or (self.max_entries is not None and len(self._entries) > self.max_entries):
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.content)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key).content)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class DiskCacheBackend:
+    """
+    SQLite-backed LRU store that several processes can share through the same file.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        :param path: database file path, created if missing
+        :param max_bytes: (optional) upper bound of the summed body sizes
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        with self._connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, url TEXT, status_code INTEGER, '
+                'reason TEXT, headers TEXT, content BLOB, encoding TEXT, stored_at REAL, accessed_at REAL)')
+
+    def _connect(self):
+        # A short-lived connection per operation keeps the backend usable from any thread or process
+        return sqlite3.connect(self.path, timeout=30)
+
+    def __len__(self):
+        with self._connect() as connection:
+            return connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def get(self, key: str) -> CacheEntry:
+        with self._connect() as connection:
+            row = connection.execute(
+                'SELECT url, status_code, reason, headers, content, encoding, stored_at FROM responses WHERE key = ?',
+                (key,)).fetchone()
+            if row is None:
+                return None
+            connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        url, status_code, reason, headers, content, encoding, stored_at = row
+        return CacheEntry(url, status_code, reason, json.loads(headers), bytes(content), encoding, stored_at)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, entry.url, entry.status_code, entry.reason, json.dumps(dict(entry.headers)),
+                 sqlite3.Binary(entry.content), entry.encoding, entry.stored_at, time.time()))
+            # Evict least recently used entries until the store fits in max_bytes
+            total = connection.execute('SELECT COALESCE(SUM(LENGTH(content)), 0) FROM responses').fetchone()[0]
+            for old_key, size in connection.execute(
+                    'SELECT key, LENGTH(content) FROM responses ORDER BY accessed_at, rowid').fetchall():
+                if total <= self.max_bytes:
+                    break
+                connection.execute('DELETE FROM responses WHERE key = ?', (old_key,))
+                total -= size
+
+    def delete(self, key: str) -> None:
+        with self._connect() as connection:
+            connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+
+    def clear(self) -> None:
+        with self._connect() as connection:
+            connection.execute('DELETE FROM responses')
+
+
+class HttpCache:
+    """
+    GET response cache with a freshness TTL and conditional revalidation.
+    Fresh entries are served without a request. Stale entries that carry an ETag or Last-Modified
+    are revalidated with If-None-Match / If-Modified-Since, and a 304 serves the cached body.
+    """
+
+    def __init__(self, backend=None, ttl: float = 300, clock=time.time, shared: bool = False):
+        """
+        :param backend: (optional) MemoryCacheBackend (default) or DiskCacheBackend
+        :param ttl: (optional) seconds an entry is served without revalidation
+        :param clock: (optional) wall-clock time function
+        :param shared: (optional) the cache serves several users (e.g. a DiskCacheBackend used by other
+            processes), so responses marked Cache-Control: private are not stored
+        """
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+        self.clock = clock
+        self.shared = shared
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    @staticmethod
+    def key(url: str, query_params=None, headers=None, auth=None) -> str:
+        """
+        Cache key for a GET of url with query_params: the full URL with parameters in sorted order, followed by
+        a digest of the request headers and auth when there are any, so requests sent with different
+        credentials or headers (e.g. Authorization, Accept) never share an entry.
+        :param headers: (optional) headers the request is sent with
+        :param auth: (optional) auth the request is sent with (anything 'requests' accepts as auth)
+        """
+        params = sorted(query_params.items()) if isinstance(query_params, dict) else query_params
+        key = requests.Request('GET', url, params=params).prepare().url
+        headers = sorted((name.lower(), str(value)) for name, value in (headers or {}).items() if value is not None)
+        if headers or auth is not None:
+            identity = json.dumps([headers, _auth_identity(auth)])
+            key += ' ' + hashlib.sha256(identity.encode('utf-8')).hexdigest()
+        return key
+
+    def stats(self) -> dict:
+        """Counters as {'hits', 'misses', 'revalidations'}."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'revalidations': self.revalidations}
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def fetch(self, url: str, query_params, send, headers=None, auth=None):
+        """
+        Serve a GET from the cache or through send.
+        :param url: full URL without query string
+        :param query_params: query parameters of the request
+        :param send: function taking extra headers and returning a requests.Response
+        :param headers: (optional) headers the request is sent with, part of the cache key
+        :param auth: (optional) auth the request is sent with, part of the cache key
+        :return: requests.Response (with from_cache set to True when served from the cache)
+        """
+        key = self.key(url, query_params, headers, auth)
+        entry = self.backend.get(key)
+        if entry is not None and self.clock() - entry.stored_at < self.ttl:
+            self._count('hits')
+            return self._to_response(entry)
+
+        conditional_headers = {}
+        if entry is not None:
+            headers = CaseInsensitiveDict(entry.headers)
+            if 'ETag' in headers:
+                conditional_headers['If-None-Match'] = headers['ETag']
+            if 'Last-Modified' in headers:
+                conditional_headers['If-Modified-Since'] = headers['Last-Modified']
+
+        response = send(conditional_headers)
+        if response.status_code == 304 and entry is not None and conditional_headers:
+            self._count('revalidations')
+            headers = dict(entry.headers)
+            headers.update(response.headers)
+            entry = entry._replace(headers=headers, stored_at=self.clock())
+            self.backend.set(key, entry)
+            return self._to_response(entry)
+
+        self._count('misses')
+        if response.status_code == 200 and self._storable(response):
+            self.backend.set(key, CacheEntry(response.url, response.status_code, response.reason,
+                                             dict(response.headers), response.content, response.encoding,
+                                             self.clock()))
+        response.from_cache = False
+        return response
+
+    def _storable(self, response: requests.Response) -> bool:
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        if 'no-store' in cache_control or (self.shared and 'private' in cache_control):
+            return False
+        # The key covers every header the request was sent with; cookies (added from the session's jar)
+        # and 'Vary: *' are the only variations it can't tell apart
+        vary = {name.strip().lower() for name in response.headers.get('Vary', '').split(',')}
+        return not vary & {'*', 'cookie'}
+
+    @staticmethod
+    def _to_response(entry: CacheEntry) -> requests.Response:
+        response = requests.Response()
+        response.url = entry.url
+        response.status_code = entry.status_code
+        response.reason = entry.reason
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response._content = entry.content
+        response.encoding = entry.encoding
+        response.from_cache = True
+        return response
+
+
+def _auth_identity(auth):
+    # Basic and digest auth objects are identified by their credentials, so equal auth shares entries;
+    # other auth objects only share entries with themselves
+    if auth is None or isinstance(auth, (tuple, list)):
+        return auth
+    if hasattr(auth, 'username') and hasattr(auth, 'password'):
+        return [type(auth).__name__, auth.username, auth.password]
+    return repr(auth)
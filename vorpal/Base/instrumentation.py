@@ -0,0 +1,349 @@
+"""
+Module containing opt-in timing instrumentation for WebDriver commands and vorpal actions.
+Disabled drivers (instrumentation is None) pay one attribute lookup per action and nothing per command.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple, deque
+
+# Upper bounds (seconds) of the latency histogram buckets; an implicit +Inf bucket follows the last one
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# One measured call. kind is 'command' (WebDriver wire command), 'action' (vorpal element action) or 'wait';
+# outcome is 'ok' or the name of the exception raised; attempts counts retries of retried actions;
+# session labels the driver a command was issued through, so drivers sharing an Instrumentation can be told apart
+InstrumentationRecord = namedtuple('InstrumentationRecord', ['kind', 'name', 'seconds', 'element', 'locator', 'page',
+                                                             'outcome', 'attempts', 'timestamp', 'session'],
+                                   defaults=(None,))
+
+
+class LatencyHistogram:
+    """
+    Cumulative latency histogram with fixed bucket bounds, as used by Prometheus.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self.attempts = 0
+
+    def observe(self, seconds: float, ok: bool = True, attempts: int = 1) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.errors += not ok
+        self.attempts += attempts
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """
+        Approximate quantile: the upper bound of the bucket holding the q-th observation (capped at the maximum).
+        :param q: quantile between 0 and 1
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def cumulative(self) -> list:
+        """[(upper bound, observations <= bound)], ending with (inf, count)."""
+        totals = []
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            totals.append((bound, seen))
+        return totals
+
+    def as_dict(self) -> dict:
+        return {'count': self.count, 'sum': self.sum, 'mean': self.mean, 'max': self.max,
+                'p50': self.quantile(0.5), 'p95': self.quantile(0.95), 'errors': self.errors,
+                'retries': self.attempts - self.count}
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(histograms: dict, metric: str = 'vorpal_webdriver_seconds') -> str:
+    """
+    Render histograms in the Prometheus text exposition format.
+    :param histograms: {(kind, name): LatencyHistogram}
+    :param metric: (optional) metric name
+    :return: str
+    """
+    lines = [f'# HELP {metric} Duration of WebDriver commands and vorpal actions.', f'# TYPE {metric} histogram']
+    for (kind, name), histogram in sorted(histograms.items()):
+        labels = f'kind="{_escape_label(kind)}",name="{_escape_label(name)}"'
+        for bound, count in histogram.cumulative():
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{metric}_bucket{{{labels},le="{le}"}} {count}')
+        lines.append(f'{metric}_sum{{{labels}}} {histogram.sum!r}')
+        lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+    lines.append(f'# HELP {metric}_errors_total Calls that raised an exception.')
+    lines.append(f'# TYPE {metric}_errors_total counter')
+    for (kind, name), histogram in sorted(histograms.items()):
+        lines.append(f'{metric}_errors_total{{kind="{_escape_label(kind)}",name="{_escape_label(name)}"}} '
+                     f'{histogram.errors}')
+    return '\n'.join(lines) + '\n'
+
+
+class MemorySink:
+    """Keeps records in memory, optionally only the most recent max_records."""
+
+    def __init__(self, max_records: int = None):
+        self.records = deque(maxlen=max_records)
+
+    def emit(self, record: InstrumentationRecord) -> None:
+        self.records.append(record)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class JsonLinesSink:
+    """Appends one JSON object per record to a file."""
+
+    def __init__(self, path: str):
+        """
+        :param path: file path, created if missing and appended to otherwise
+        """
+        self.path = path
+        self._file = open(path, 'a')
+
+    def emit(self, record: InstrumentationRecord) -> None:
+        self._file.write(json.dumps(record._asdict()) + '\n')
+
+    def flush(self) -> None:
+        if not self._file.closed:
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class PrometheusTextSink:
+    """
+    Aggregates records into histograms and writes them in the Prometheus text format on flush(),
+    atomically, so a node_exporter textfile collector never reads a partial file.
+    """
+
+    def __init__(self, path: str, buckets=DEFAULT_BUCKETS, metric: str = 'vorpal_webdriver_seconds'):
+        """
+        :param path: .prom file path, rewritten on every flush
+        :param buckets: (optional) histogram bucket upper bounds in seconds
+        :param metric: (optional) metric name
+        """
+        self.path = path
+        self.buckets = buckets
+        self.metric = metric
+        self.histograms = {}
+
+    def emit(self, record: InstrumentationRecord) -> None:
+        key = (record.kind, record.name)
+        if key not in self.histograms:
+            self.histograms[key] = LatencyHistogram(self.buckets)
+        self.histograms[key].observe(record.seconds, record.outcome == 'ok', record.attempts)
+
+    def flush(self) -> None:
+        temporary_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(temporary_path, 'w') as metrics_file:
+            metrics_file.write(prometheus_text(self.histograms, self.metric))
+        os.replace(temporary_path, self.path)
+
+    def close(self) -> None:
+        self.flush()
+
+
+class Instrumentation:
+    """
+    Records WebDriver commands and vorpal actions with their duration, element, page and outcome,
+    aggregates them into per-command latency histograms and forwards every record to the sinks.
+    Commands issued while an element action runs are attributed to that element.
+    """
+
+    def __init__(self, sinks=(), buckets=DEFAULT_BUCKETS, clock=time.perf_counter):
+        """
+        :param sinks: (optional) objects with emit(record), flush() and close(), e.g. MemorySink, JsonLinesSink,
+            PrometheusTextSink
+        :param buckets: (optional) histogram bucket upper bounds in seconds
+        :param clock: (optional) monotonic clock function
+        """
+        self.sinks = list(sinks)
+        self.buckets = buckets
+        self.clock = clock
+        self.histograms = {}
+        # Name of the page the records belong to, set by BasePage.goto() or by the caller
+        self.page = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._installed = {}
+
+    def add_sink(self, sink) -> None:
+        with self._lock:
+            self.sinks.append(sink)
+
+    def remove_sink(self, sink) -> None:
+        with self._lock:
+            self.sinks.remove(sink)
+
+    def _stack(self) -> list:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def record(self, kind: str, name: str, seconds: float, element: str = None, locator: str = None,
+               outcome: str = 'ok', attempts: int = 1, timestamp: float = None,
+               session: str = None) -> InstrumentationRecord:
+        """
+        Add one measurement to the histograms and the sinks.
+        :return: InstrumentationRecord
+        """
+        record = InstrumentationRecord(kind, name, seconds, element, locator, self.page, outcome, attempts,
+                                       time.time() if timestamp is None else timestamp, session)
+        with self._lock:
+            key = (kind, name)
+            if key not in self.histograms:
+                self.histograms[key] = LatencyHistogram(self.buckets)
+            self.histograms[key].observe(seconds, outcome == 'ok', attempts)
+            for sink in self.sinks:
+                sink.emit(record)
+        return record
+
+    def call(self, kind: str, name: str, element: str, locator: str, func, *args, **kwargs):
+        """
+        Call func and record its duration and outcome.
+        Calls made by func (e.g. WebDriver commands) inherit element and locator when they have none.
+        :return: func's return value
+        """
+        return self._measure(kind, name, element, locator, None, func, args, kwargs)
+
+    def _measure(self, kind, name, element, locator, session, func, args, kwargs):
+        stack = self._stack()
+        if stack:
+            element = element or stack[-1][0]
+            locator = locator or stack[-1][1]
+        frame = [element, locator, 0]
+        stack.append(frame)
+        timestamp = time.time()
+        start = self.clock()
+        outcome = 'ok'
+        try:
+            return func(*args, **kwargs)
+        except BaseException as error:
+            outcome = type(error).__name__
+            raise
+        finally:
+            seconds = self.clock() - start
+            stack.pop()
+            self.record(kind, name, seconds, element, locator, outcome, max(frame[2], 1), timestamp, session)
+
+    def count_attempt(self) -> None:
+        """Count one attempt of the innermost call, so retried actions report their attempts."""
+        stack = self._stack()
+        if stack:
+            stack[-1][2] += 1
+
+    def install(self, driver) -> None:
+        """
+        Record every command of a Selenium WebDriver by wrapping its execute() method.
+        Element commands go through the parent driver's execute(), so they are recorded too.
+        :param driver: selenium RemoteWebDriver
+        """
+        with self._lock:
+            if id(driver) in self._installed:
+                return
+            session = self._session_label(driver)
+            self._installed[id(driver)] = (driver, session)
+        original = driver.execute
+
+        def execute(driver_command, params=None):
+            locator = None
+            if params and 'using' in params:
+                locator = f"{params['using']}={params.get('value')}"
+            return self._measure('command', driver_command, None, locator, session, original,
+                                 (driver_command, params), {})
+
+        driver.execute = execute
+
+    def uninstall(self, driver) -> None:
+        """Restore the driver's own execute() method."""
+        with self._lock:
+            installed = self._installed.pop(id(driver), None)
+        if installed is not None:
+            del driver.execute
+
+    def session_of(self, driver) -> str:
+        """
+        Label carried in the session field of the records of an installed driver's commands.
+        :param driver: selenium RemoteWebDriver
+        :return: str, or None if the driver is not installed
+        """
+        installed = self._installed.get(id(driver))
+        return installed[1] if installed is not None else None
+
+    def _session_label(self, driver) -> str:
+        # The WebDriver session id, made unique among the installed drivers (replayed sessions share one)
+        session_id = getattr(driver, 'session_id', None)
+        label = session_id if isinstance(session_id, str) else f'driver-{id(driver):x}'
+        labels = {session for _, session in self._installed.values()}
+        if label in labels:
+            label = f'{label}-{id(driver):x}'
+        return label
+
+    def summary(self) -> str:
+        """Table of histograms, slowest total time first."""
+        with self._lock:
+            rows = sorted(self.histograms.items(), key=lambda item: -item[1].sum)
+        lines = [f"{'kind':<8} {'name':<32} {'count':>6} {'total s':>9} {'mean ms':>9} {'p95 ms':>9} {'errors':>6}"]
+        for (kind, name), histogram in rows:
+            lines.append(f"{kind:<8} {name:<32} {histogram.count:>6} {histogram.sum:>9.3f} "
+                         f"{histogram.mean * 1000:>9.1f} {histogram.quantile(0.95) * 1000:>9.1f} {histogram.errors:>6}")
+        return '\n'.join(lines)
+
+    def as_dict(self) -> dict:
+        """Histograms as {'kind:name': {count, sum, mean, max, p50, p95, errors, retries}}."""
+        with self._lock:
+            return {f'{kind}:{name}': histogram.as_dict() for (kind, name), histogram in self.histograms.items()}
+
+    def flush(self) -> None:
+        with self._lock:
+            for sink in self.sinks:
+                sink.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            for sink in self.sinks:
+                sink.close()
+
+
+def instrumentation_for(owner) -> Instrumentation:
+    """
+    Active Instrumentation of a driver, or of the driver an element or collection belongs to.
+    :param owner: CustomSeleniumDriver, ExtendedWebElement or ElementCollection
+    :return: Instrumentation, or None when disabled
+    """
+    instrumentation = getattr(owner, 'instrumentation', None)
+    if not isinstance(instrumentation, Instrumentation):
+        instrumentation = getattr(getattr(owner, 'driver', None), 'instrumentation', None)
+    return instrumentation if isinstance(instrumentation, Instrumentation) else None
@@ -0,0 +1,143 @@
+"""
+Module containing the JavaScript action engine: element actions queued and run in the page with one script call.
+"""
+from collections import namedtuple
+from selenium.common.exceptions import StaleElementReferenceException, WebDriverException
+from .instrumentation import instrumentation_for
+from .locator import as_element
+from . import scripts
+
+# Outcome of one queued action; error is None when it ran, value is what the action returned in the page
+ActionResult = namedtuple('ActionResult', ['action', 'name', 'value', 'error'])
+
+
+def run_element_script(driver, script: str, entries: list, spec) -> list:
+    """
+    Run a script over many elements in one execute_script call. Handles already resolved are passed to the script,
+    which finds the other elements from their locators; if a passed handle went stale, the script runs once more
+    with every element found again. Handles the script returns are attached to their elements.
+    :param driver: CustomSeleniumDriver
+    :param script: script taking the list of specs as arguments[0] and returning one result per spec,
+        whose last item is the element's handle (or None)
+    :param entries: list of tuples whose first item is an ExtendedWebElement
+    :param spec: function(entry, handle) -> the entry's script argument; handle is None when the script must find it
+    :return: the script's results in entry order
+    """
+    try:
+        results = driver.execute_script(script, [spec(entry, entry[0].resolved_element) for entry in entries])
+    except StaleElementReferenceException:
+        # A handle went stale since it was resolved: find every element again in the page
+        results = driver.execute_script(script, [spec(entry, None) for entry in entries])
+
+    for (element, *_), result in zip(entries, results):
+        element.invalidate_snapshot()
+        if result[-1] is not None:
+            element.attach(result[-1])
+    return results
+
+
+class JavaScriptActionError(WebDriverException):
+    """Raised by ActionBatch.flush() when one or more actions failed in the page."""
+
+    def __init__(self, results: list):
+        self.results = results
+        self.failures = [result for result in results if result.error is not None]
+        super().__init__('; '.join(f"{failure.action} {failure.name}: {failure.error}" for failure in self.failures))
+
+
+class ActionBatch:
+    """
+    Queue of element actions run in the page by a single execute_script call.
+    Elements whose handle is already resolved are passed to the script as arguments; the others are found in the
+    page from their locator (any strategy, XPath through document.evaluate), so no action costs an extra lookup
+    and locators are never pasted into the script source.
+
+    with driver.js_actions() as actions:
+        actions.scroll_into_view(page.submit).focus(page.submit).click(page.submit)
+    """
+
+    def __init__(self, driver, raise_on_failure: bool = True):
+        """
+        :param driver: CustomSeleniumDriver the actions run on
+        :param raise_on_failure: (optional) flush() raises JavaScriptActionError when an action failed
+        """
+        self.driver = driver
+        self.raise_on_failure = raise_on_failure
+        self.actions = []
+
+    def __len__(self):
+        return len(self.actions)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        return False
+
+    def _queue(self, action: str, target, *arguments) -> 'ActionBatch':
+        self.actions.append((as_element(self.driver, target), action, list(arguments)))
+        return self
+
+    # Actions; each returns the batch so calls can be chained
+    def click(self, target) -> 'ActionBatch':
+        """Click with HTMLElement.click(), which does not require the element to be visible."""
+        return self._queue('click', target)
+
+    def scroll_into_view(self, target, block: str = 'center') -> 'ActionBatch':
+        """
+        Scroll the element into the viewport.
+        :param block: (optional) vertical alignment: 'start', 'center', 'end' or 'nearest'
+        """
+        return self._queue('scroll_into_view', target, block)
+
+    def focus(self, target) -> 'ActionBatch':
+        """Focus the element; the result value tells whether it became the active element."""
+        return self._queue('focus', target)
+
+    def set_attribute(self, target, name: str, value) -> 'ActionBatch':
+        """
+        Set an attribute of the element.
+        :param value: new value (converted to a string), or None to remove the attribute
+        """
+        return self._queue('set_attribute', target, name, value)
+
+    def dispatch_event(self, target, event_type: str, detail=None) -> 'ActionBatch':
+        """
+        Dispatch a bubbling, cancelable CustomEvent on the element; the result value is False if a listener
+        cancelled it.
+        :param detail: (optional) JSON-serializable event detail
+        """
+        return self._queue('dispatch_event', target, event_type, detail)
+
+    def flush(self) -> list:
+        """
+        Run the queued actions in order with one execute_script call and empty the queue.
+        An action that fails does not stop the ones after it.
+        :return: list of ActionResult in queue order
+        :raises JavaScriptActionError: if raise_on_failure and an action failed
+        """
+        actions, self.actions = self.actions, []
+        if not actions:
+            return []
+        instrumentation = instrumentation_for(self.driver)
+        if instrumentation is not None:
+            names = {element.name for element, _, _ in actions}
+            element = names.pop() if len(names) == 1 else None
+            return instrumentation.call('action', 'js_actions', element, None, self._run, actions)
+        return self._run(actions)
+
+    def _run(self, actions: list) -> list:
+        results = run_element_script(self.driver, scripts.RUN_ACTIONS, actions, self._spec)
+        report = [ActionResult(action, element.name or f'{element.by}={element.locator}', value, error)
+                  for (element, action, _), (error, value, _) in zip(actions, results)]
+        if self.raise_on_failure and any(result.error is not None for result in report):
+            raise JavaScriptActionError(report)
+        return report
+
+    @staticmethod
+    def _spec(action: tuple, handle) -> list:
+        element, name, arguments = action
+        target = handle if handle is not None else [element.by, element.locator, element.nth_of_type]
+        return [name, target, arguments]
@@ -0,0 +1,220 @@
+"""
+Module containing the declarative Locator descriptor for BasePage subclasses.
+"""
+import re
+from selenium.webdriver.common.by import By
+from .element import ExtendedWebElement
+
+# Locator type names accepted in locator dicts and by Locator, mapped to Selenium's By strategies
+LOCATOR_TYPES = {'id': By.ID, 'xpath': By.XPATH, 'css_selector': By.CSS_SELECTOR, 'name': By.NAME,
+                 'link_text': By.LINK_TEXT, 'class': By.CLASS_NAME, 'tag_name': By.TAG_NAME,
+                 'partial_link_text': By.PARTIAL_LINK_TEXT}
+
+# By strategies a Locator also accepts directly (e.g. By.TAG_NAME)
+_BY_VALUES = set(LOCATOR_TYPES.values())
+
+_IDENTIFIER = re.compile(r'^-?[_a-zA-Z][_a-zA-Z0-9-]*$')
+# One compound CSS selector made of a tag, #id, .class and [attribute] / [attribute="value"] parts
+_SIMPLE_PART = re.compile(r'#(?P<id>[-\w]+)|\.(?P<cls>[-\w]+)|\[(?P<attr>[-\w]+)(?:=(?P<quote>["\']?)(?P<value>[^"\'\]]*)(?P=quote))?\]')
+_COMPOUND = re.compile(r'^(?P<tag>[a-zA-Z][-\w]*|\*)?(?P<parts>(?:' + _SIMPLE_PART.pattern + r')*)$')
+
+
+def _unbalanced(selector: str) -> str:
+    """First unclosed or unexpected bracket or quote in a CSS or XPath selector, or None if balanced."""
+    closing = {'[': ']', '(': ')'}
+    expected = []
+    quote = None
+    for character in selector:
+        if quote:
+            if character == quote:
+                quote = None
+        elif character in '"\'':
+            quote = character
+        elif character in closing:
+            expected.append(closing[character])
+        elif character in ')]':
+            if not expected or expected.pop() != character:
+                return character
+    if quote:
+        return quote
+    return expected[-1] if expected else None
+
+
+def xpath_literal(value: str) -> str:
+    """Quote value as an XPath string literal, using concat() when it contains both quote characters."""
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return 'concat(' + ', \'"\', '.join(f'"{part}"' for part in value.split('"')) + ')'
+
+
+def css_to_xpath(css_selector: str) -> str:
+    """
+    XPath equivalent of a simple CSS selector (compound selectors joined by descendant or child combinators).
+    :param css_selector: CSS selector
+    :return: XPath string, or None if the selector uses features outside that subset
+    """
+    steps = []
+    axis = '//'
+    for token in re.split(r'\s*(>)\s*|\s+', css_selector.strip()):
+        if token is None or token == '':
+            continue
+        if token == '>':
+            if not steps or axis == '/':
+                return None
+            axis = '/'
+            continue
+        compound = _COMPOUND.match(token)
+        if compound is None:
+            return None
+        predicates = []
+        for part in _SIMPLE_PART.finditer(compound.group('parts')):
+            if part.group('id'):
+                predicates.append(f"@id={xpath_literal(part.group('id'))}")
+            elif part.group('cls'):
+                predicates.append(f"contains(concat(' ', normalize-space(@class), ' '), "
+                                  f"{xpath_literal(' ' + part.group('cls') + ' ')})")
+            elif part.group('value') is not None:
+                predicates.append(f"@{part.group('attr')}={xpath_literal(part.group('value'))}")
+            else:
+                predicates.append(f"@{part.group('attr')}")
+        steps.append(axis + (compound.group('tag') or '*') + ''.join(f'[{predicate}]' for predicate in predicates))
+        axis = '//'
+    if not steps or axis == '/':
+        return None
+    return ''.join(steps)
+
+
+def to_css(by: str, locator: str) -> str:
+    """
+    CSS selector equivalent of a locator.
+    :return: CSS selector, or None for strategies CSS cannot express (XPath, link text)
+    """
+    if by == By.CSS_SELECTOR or by == By.TAG_NAME:
+        return locator
+    if by == By.ID:
+        return f'#{locator}' if _IDENTIFIER.match(locator) else f'[id="{locator}"]'
+    if by == By.CLASS_NAME:
+        return f'.{locator}'
+    if by == By.NAME:
+        return f'[name="{locator}"]'
+    return None
+
+
+def to_xpath(by: str, locator: str) -> str:
+    """
+    XPath equivalent of a locator.
+    :return: XPath string, or None for CSS selectors outside the supported subset
+    """
+    if by == By.XPATH:
+        return locator
+    if by == By.ID:
+        return f'//*[@id={xpath_literal(locator)}]'
+    if by == By.NAME:
+        return f'//*[@name={xpath_literal(locator)}]'
+    if by == By.CLASS_NAME:
+        return f"//*[contains(concat(' ', normalize-space(@class), ' '), {xpath_literal(' ' + locator + ' ')})]"
+    if by == By.TAG_NAME:
+        return f'//{locator}'
+    if by == By.LINK_TEXT:
+        return f'//a[normalize-space(.)={xpath_literal(locator)}]'
+    if by == By.PARTIAL_LINK_TEXT:
+        return f'//a[contains(., {xpath_literal(locator)})]'
+    return css_to_xpath(locator)
+
+
+class Locator:
+    """
+    Class-level element declaration for BasePage subclasses, validated and compiled when the class is defined.
+    Accessing it on a page returns an ExtendedWebElement created on first access and reused afterwards.
+
+    class LoginPage(BasePage):
+        username = Locator('#username')
+        submit = Locator('//button[@type="submit"]', 'xpath', name='Submit button')
+    """
+
+    def __init__(self, locator: str, locator_type: str = 'css_selector', name: str = None, nth_of_type: int = 1,
+                 use_snapshot: bool = False, snapshot_attributes=(), retry_policy=None):
+        """
+        :param locator: property value (e.g. '#username')
+        :param locator_type: (optional) one of LOCATOR_TYPES ('css_selector', 'xpath', 'id', ...) or a By strategy
+        :param name: (optional) human-friendly name for the element (default: the attribute name)
+        :param nth_of_type: (optional) index of element in list of elements if more than one expected to match
+        :param use_snapshot: (optional) see ExtendedWebElement
+        :param snapshot_attributes: (optional) see ExtendedWebElement
+        :param retry_policy: (optional) RetryPolicy for this element's actions
+        :raises ValueError: for an unknown locator type, an empty or unbalanced locator or an invalid nth_of_type
+        """
+        if str(locator_type).lower() in LOCATOR_TYPES:
+            by = LOCATOR_TYPES[str(locator_type).lower()]
+        elif locator_type in _BY_VALUES:
+            by = locator_type
+        else:
+            raise ValueError(f"Unknown locator type {locator_type!r}, expected one of {sorted(LOCATOR_TYPES)}")
+        if not isinstance(locator, str) or not locator.strip():
+            raise ValueError(f"Locator must be a non-empty string, got {locator!r}")
+        if by in (By.CSS_SELECTOR, By.XPATH) and _unbalanced(locator):
+            raise ValueError(f"Locator {locator!r} has an unbalanced {_unbalanced(locator)!r}")
+        if by == By.CLASS_NAME and len(locator.split()) > 1:
+            raise ValueError(f"Class name locator {locator!r} contains spaces, use a CSS selector instead")
+        if not isinstance(nth_of_type, int) or nth_of_type < 1:
+            raise ValueError(f"nth_of_type must be a positive integer, got {nth_of_type!r}")
+
+        self.locator = locator
+        self.locator_type = locator_type
+        self.by = by
+        self.name = name
+        self.nth_of_type = nth_of_type
+        self.use_snapshot = use_snapshot
+        self.snapshot_attributes = tuple(snapshot_attributes)
+        self.retry_policy = retry_policy
+        self.css = to_css(by, locator)
+        self.xpath = to_xpath(by, locator)
+        self.attribute = None
+
+    def __set_name__(self, owner, attribute: str):
+        self.attribute = attribute
+        if self.name is None:
+            self.name = attribute
+
+    def __repr__(self):
+        return f"<Locator {self.name} {self.by}={self.locator!r}>"
+
+    def __get__(self, page, owner=None):
+        if page is None:
+            return self
+        element = self.element(page.driver)
+        # Stored under the attribute name, so later lookups bypass this (non-data) descriptor entirely
+        page.__dict__[self.attribute] = element
+        return element
+
+    def element(self, driver) -> ExtendedWebElement:
+        """
+        New ExtendedWebElement for this locator.
+        :param driver: CustomSeleniumDriver
+        """
+        return ExtendedWebElement(driver, self.name, self.locator, self.by, self.nth_of_type,
+                                  use_snapshot=self.use_snapshot, snapshot_attributes=self.snapshot_attributes,
+                                  retry_policy=self.retry_policy, css_selector=self.css)
+
+    def as_dict(self) -> dict:
+        """Locator dict accepted by CustomSeleniumDriver.get_element, wait_for and friends."""
+        locator_type = next((name for name, by in LOCATOR_TYPES.items() if by == self.by), self.by)
+        return {'Element name': self.name, 'locator_type': locator_type, 'locator': self.locator}
+
+
+def as_element(driver, target) -> ExtendedWebElement:
+    """
+    ExtendedWebElement for any of the ways vorpal accepts an element.
+    :param driver: CustomSeleniumDriver
+    :param target: ExtendedWebElement, Locator, or locator dict (see CustomSeleniumDriver.get_element)
+    :return: ExtendedWebElement
+    """
+    if isinstance(target, ExtendedWebElement):
+        return target
+    if isinstance(target, Locator):
+        return target.element(driver)
+    if isinstance(target, dict):
+        return driver.get_element(target)
+    raise TypeError(f"Expected an ExtendedWebElement, a Locator or a locator dict, not {type(target).__name__}")
@@ -1,12 +1,38 @@
 """
 Module containing base class for HTTP endpoints.
 """
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from urllib.parse import urlencode, urldefrag, urlsplit, urlunsplit
+from selenium.common.exceptions import WebDriverException
+from .expected_condition import wait_until
+from .instrumentation import Instrumentation
+from .locator import Locator
+from . import scripts
+
+
+def normalize_url(url: str) -> str:
+    """URL with the scheme and host lowercased, the default port dropped and an empty path written as '/'."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    default_port = {'http': ':80', 'https': ':443'}.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, parts.fragment))
+
 
 class BasePage(ABC):
     # Url for the page
     # Optional, but required for .goto() method
     url = None
+    # Resolve every declared Locator with one script right after goto(), see prefetch()
+    prefetch_elements = False
+    # When goto() considers the page ready, see goto()
+    ready = 'load'
+    # Seconds goto() waits for readiness other than 'load'
+    ready_timeout = 10
 
     def __init__(self, driver, page_name):
         """
@@ -16,26 +42,149 @@ class BasePage(ABC):
         self.driver = driver
         self.name = page_name
 
-    def goto(self, **kwargs):
+    @classmethod
+    def locators(cls) -> dict:
         """
-        Uses driver to navigate to self.url if set, otherwise raises Exception
-        :param **kwargs: keyword arguments converted into key=value query parameters
+        Locators declared on this page class and its bases.
+        :return: {attribute name: Locator}
+        """
+        declared = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if isinstance(value, Locator):
+                    declared[name] = value
+                else:
+                    # A subclass may replace an inherited locator with something else
+                    declared.pop(name, None)
+        return declared
+
+    def prefetch(self) -> int:
+        """
+        Resolve the handles of all declared Locators in a single execute_script round trip.
+        Elements missing from the page are left to be found on first use.
+        :return: number of elements found
+        """
+        locators = self.locators()
+        if not locators:
+            return 0
+        handles = self.driver.execute_script(
+            scripts.PREFETCH_ELEMENTS, [[locator.by, locator.locator, locator.nth_of_type] for locator in locators.values()])
+        found = 0
+        for attribute, handle in zip(locators, handles):
+            if handle is not None:
+                getattr(self, attribute).attach(handle)
+                found += 1
+        return found
+
+    def fill_form(self, fields, keystrokes=(), raise_on_failure: bool = True) -> list:
+        """
+        Set many fields of this page in one script call, see CustomSeleniumDriver.fill_form().
+        :param fields: {field: value}; a field may also be the name of one of this page's Locators
+        :param keystrokes: (optional) fields set by typing instead
+        :param raise_on_failure: (optional) raise FormFillError when a field could not be set
+        :return: list of FieldResult
+        """
+        resolve = lambda field: getattr(self, field) if isinstance(field, str) else field
+        pairs = fields.items() if isinstance(fields, Mapping) else fields
+        return self.driver.fill_form([(resolve(field), value) for field, value in pairs],
+                                     [resolve(field) for field in keystrokes], raise_on_failure)
+
+    def url_with(self, query_params: dict = None) -> str:
+        """
+        self.url with URL-encoded query parameters appended.
+        :param query_params: (optional) {key: value}; list values repeat the key
+        """
+        if not query_params:
+            return self.url
+        separator = '&' if '?' in self.url else '?'
+        return self.url + separator + urlencode(query_params, doseq=True)
+
+    def goto(self, query_params: dict = None, force: bool = False, ready=None, timeout: float = None, **kwargs):
+        """
+        Uses driver to navigate to self.url if set, otherwise raises Exception.
+        Navigation is skipped when the driver is already on the URL (compared after normalize_url()).
+        :param query_params: (optional) query parameters in key:value dict, for keys that clash with the arguments below
+        :param force: (optional) navigate even if the driver is already on the URL
+        :param ready: (optional) when the page counts as ready (default: self.ready):
+            'load' - driver.get, which waits for the load event (or whatever the session's pageLoadStrategy allows),
+            'eager' - the new document is parsed (DOMContentLoaded); subresources may still be loading,
+            'page' - self.isCurrentPage() returns truthy,
+            a Locator or locator dict - that element is visible,
+            a function - called with the page until it returns truthy.
+            Anything but 'load' starts the navigation from JavaScript and stops waiting as soon as it is met;
+            use a session created with page_load_strategy='eager' or 'none' so the driver itself doesn't block.
+        :param timeout: (optional) seconds to wait for readiness other than 'load' (default: self.ready_timeout)
+        :param **kwargs: keyword arguments converted into URL-encoded key=value query parameters
+        :raises WaitTimeoutException: if the page is not ready within timeout
         """
         if self.url == None:
             raise Exception(f"Attempted to goto {self.name}, but no url was provided in class definition.")
 
-        param_string = ''
-        # Build query params if any provided
-        if len(kwargs) > 0:
-            param_string = '?'
-            for key, value in kwargs.items():
-                param_string += f"{key}={value}&"
-        
-        self.driver.get(self.url + param_string)
+        params = dict(query_params or {})
+        params.update(kwargs)
+        url = self.url_with(params)
+
+        instrumentation = getattr(self.driver, 'instrumentation', None)
+        if isinstance(instrumentation, Instrumentation):
+            instrumentation.page = self.name
+        # The current URL costs a round trip, so it is only fetched when needed
+        current_url = None
+        if not force:
+            current_url = self.driver.current_url
+            if current_url == url or (isinstance(current_url, str) and
+                                      normalize_url(current_url) == normalize_url(url)):
+                return self
+
+        ready = self.ready if ready is None else ready
+        # A fragment-only change keeps the document, so there is nothing to wait for; a forced goto doesn't check
+        if ready == 'load' or (not force and '#' in url and
+                               normalize_url(urldefrag(url)[0]) == normalize_url(urldefrag(current_url)[0])):
+            self.driver.get(url)
+        else:
+            self._navigate_until_ready(url, ready, self.ready_timeout if timeout is None else timeout)
+
+        if self.prefetch_elements:
+            self.prefetch()
         # Return self to allow chaining
         # e.g. login_page.goto().login()
         return self
 
+    def _navigate_until_ready(self, url: str, ready, timeout: float) -> None:
+        if isinstance(ready, Locator):
+            ready = ready.as_dict()
+        if ready == 'page':
+            ready = lambda page: page.isCurrentPage()
+        if ready != 'eager' and not isinstance(ready, dict) and not callable(ready):
+            raise ValueError(f"Unsupported readiness {ready!r}, expected 'load', 'eager', 'page', "
+                             f"a Locator, a locator dict or a function")
+
+        deadline = time.monotonic() + timeout
+        # Unique per navigation of this driver, yet the same on every run so recorded sessions replay
+        marker = f'vorpal-navigation-{self.driver.navigation_generation}'
+        self.driver.execute_script(scripts.NAVIGATE, url, marker)
+        self.driver.invalidate_elements()
+
+        def left_document():
+            return self.driver.execute_script(scripts.LEFT_DOCUMENT, marker)
+
+        # Scripts can fail while the browser swaps documents
+        ignored = (WebDriverException,)
+        wait_until(left_document, timeout_seconds=timeout, polling_frequency_seconds=0.05, backoff=1.5,
+                   max_polling_seconds=0.5, ignored_exceptions=ignored)
+        remaining = max(deadline - time.monotonic(), 0)
+
+        if ready == 'eager':
+            return
+        if isinstance(ready, dict):
+            self.driver.wait_for(ready, 'visible', timeout=remaining)
+            return
+
+        def page_ready():
+            return ready(self)
+
+        wait_until(page_ready, timeout_seconds=remaining, polling_frequency_seconds=0.05, backoff=1.5,
+                   max_polling_seconds=0.5, ignored_exceptions=ignored)
+
     @abstractmethod
     def isCurrentPage(self):
         """
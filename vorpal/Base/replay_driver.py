@@ -0,0 +1,30 @@
+"""
+Package: Base
+ReplayWebDriver class implementation.
+Selenium WebDriver answering every command from a Cassette, for browserless reruns of recorded tests.
+"""
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+from .cassette import Cassette, CassetteExecutor
+
+
+class ReplayWebDriver(RemoteWebDriver):
+    """
+    Selenium WebDriver whose command executor serves responses recorded in a Cassette.
+    A command missing from the cassette raises CassetteMismatch.
+    """
+
+    def __init__(self, cassette: Cassette):
+        """
+        :param cassette: Cassette in replay mode
+        """
+        super().__init__(command_executor=CassetteExecutor(cassette), desired_capabilities={})
+
+    @property
+    def cassette(self) -> Cassette:
+        return self.command_executor.cassette
+
+    def start_client(self):
+        pass
+
+    def stop_client(self):
+        pass
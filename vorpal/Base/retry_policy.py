@@ -0,0 +1,166 @@
+"""
+Module containing the retry policy used by retry_with_timeout.
+"""
+import json
+import random
+import time
+from collections import OrderedDict
+from threading import Lock
+from selenium.common.exceptions import TimeoutException, InvalidElementStateException, ElementNotVisibleException, \
+    ElementNotInteractableException, ElementNotSelectableException, ElementClickInterceptedException
+
+# Exceptions that mean "the element is not ready yet" and are worth retrying
+RETRYABLE_EXCEPTIONS = (InvalidElementStateException,
+                        ElementNotVisibleException,
+                        ElementNotInteractableException,
+                        ElementNotSelectableException,
+                        ElementClickInterceptedException)
+
+
+class RetryTimeoutException(TimeoutException):
+    """Raised when an action still fails after its retry deadline has passed."""
+
+    def __init__(self, action: str, attempts: int, elapsed: float, last_exception: Exception):
+        """
+        :param action: name of the retried action
+        :param attempts: number of attempts made
+        :param elapsed: seconds spent, including time inside the failing calls
+        :param last_exception: exception raised by the final attempt
+        """
+        super().__init__(f"{action} failed after {attempts} attempts in {elapsed:.2f}s: {last_exception!r}")
+        self.action = action
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.last_exception = last_exception
+
+
+class RetryStatistics:
+    """
+    Thread-safe per-action retry counters.
+    Each action records calls, attempts, retries, timeouts and total seconds spent.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._actions = OrderedDict()
+
+    def record(self, action: str, attempts: int, elapsed: float, timed_out: bool = False) -> None:
+        """
+        Record one completed (or timed out) action.
+        :param action: action name
+        :param attempts: number of attempts made
+        :param elapsed: seconds spent
+        :param timed_out: (optional) whether the action ran out of time
+        """
+        with self._lock:
+            stats = self._actions.setdefault(
+                action, {'calls': 0, 'attempts': 0, 'retries': 0, 'timeouts': 0, 'seconds': 0.0})
+            stats['calls'] += 1
+            stats['attempts'] += attempts
+            stats['retries'] += attempts - 1
+            stats['timeouts'] += int(timed_out)
+            stats['seconds'] += elapsed
+
+    def as_dict(self) -> dict:
+        """Copy of the counters as {action: {'calls', 'attempts', 'retries', 'timeouts', 'seconds'}}."""
+        with self._lock:
+            return {action: dict(stats) for action, stats in self._actions.items()}
+
+    def export(self, path: str) -> None:
+        """
+        Write the counters to a JSON file.
+        :param path: destination file path
+        """
+        with open(path, 'w') as output_file:
+            json.dump(self.as_dict(), output_file, indent=2)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._actions.clear()
+
+
+class RetryPolicy:
+    """
+    Deadline-based retry with exponential backoff, jitter and a delay cap.
+    The deadline is measured on a monotonic clock, so time spent inside failing calls counts against the timeout.
+    """
+
+    def __init__(self, timeout: float = 5, initial_delay: float = 0.05, multiplier: float = 2,
+                 max_delay: float = 1.0, jitter: float = 0.5, retry_on: tuple = RETRYABLE_EXCEPTIONS,
+                 statistics: RetryStatistics = None, clock=time.monotonic, sleep=time.sleep, rng=None):
+        """
+        Initializes RetryPolicy.
+        :param timeout: (optional) seconds from the first attempt after which no further attempt is made
+        :param initial_delay: (optional) delay before the first retry
+        :param multiplier: (optional) growth factor of the delay after each retry
+        :param max_delay: (optional) upper bound of a single delay
+        :param jitter: (optional) fraction (0-1) of each delay that is randomized away
+        :param retry_on: (optional) exception types that trigger a retry, anything else is raised immediately
+        :param statistics: (optional) RetryStatistics to record into, a new one is created if omitted
+        :param clock: (optional) monotonic clock function
+        :param sleep: (optional) sleep function
+        :param rng: (optional) random.Random used for jitter
+        """
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retry_on = tuple(retry_on)
+        self.statistics = statistics if statistics is not None else RetryStatistics()
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+
+    def with_overrides(self, **kwargs) -> 'RetryPolicy':
+        """
+        Copy of this policy with some settings replaced. The copy records into the same statistics.
+        :param **kwargs: any RetryPolicy constructor argument
+        :return: RetryPolicy
+        """
+        settings = {
+            'timeout': self.timeout, 'initial_delay': self.initial_delay, 'multiplier': self.multiplier,
+            'max_delay': self.max_delay, 'jitter': self.jitter, 'retry_on': self.retry_on,
+            'statistics': self.statistics, 'clock': self.clock, 'sleep': self.sleep, 'rng': self.rng,
+        }
+        settings.update(kwargs)
+        return RetryPolicy(**settings)
+
+    def delay(self, retry_number: int) -> float:
+        """
+        Delay before the given retry (0-based), with backoff, cap and jitter applied.
+        :param retry_number: number of retries already made
+        :return: seconds
+        """
+        delay = min(self.max_delay, self.initial_delay * self.multiplier ** retry_number)
+        return delay * (1 - self.jitter * self.rng.random())
+
+    def call(self, action: str, func, *args, **kwargs):
+        """
+        Call func until it succeeds or the deadline passes.
+        :param action: action name used for statistics and error messages
+        :param func: callable to retry
+        :return: func's return value
+        :raises RetryTimeoutException: if the final attempt still raised one of retry_on
+        """
+        start = self.clock()
+        deadline = start + self.timeout
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                result = func(*args, **kwargs)
+            except self.retry_on as exception:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    elapsed = self.clock() - start
+                    self.statistics.record(action, attempts, elapsed, timed_out=True)
+                    raise RetryTimeoutException(action, attempts, elapsed, exception) from exception
+                self.sleep(min(self.delay(attempts - 1), remaining))
+            else:
+                self.statistics.record(action, attempts, self.clock() - start)
+                return result
+
+
+# Used when neither the call, the element nor the driver provides a policy
+DEFAULT_RETRY_POLICY = RetryPolicy()
@@ -0,0 +1,233 @@
+"""
+Package: Base
+ScenarioRunner class implementation.
+Runs page-object scenarios across worker processes, balanced by historical durations with work stealing.
+"""
+import json
+import multiprocessing
+import os
+import queue
+import time
+import traceback
+from collections import namedtuple
+from .webdriver_pool import WebDriverPool
+
+# Outcome of one scenario: outcome is 'passed' or 'failed' (error holds the formatted traceback)
+ScenarioResult = namedtuple('ScenarioResult', ['name', 'worker', 'seconds', 'outcome', 'error', 'stolen'])
+
+
+class TimingDatabase:
+    """
+    Per-scenario duration history stored in a local JSON file.
+    Estimates are an exponential moving average of past runs.
+    """
+
+    def __init__(self, path: str, smoothing: float = 0.5, default_seconds: float = 1.0):
+        """
+        :param path: JSON file path, created on save() if missing
+        :param smoothing: (optional) weight of the newest duration in the moving average (0-1)
+        :param default_seconds: (optional) estimate for scenarios with no history when nothing else is known
+        """
+        self.path = path
+        self.smoothing = smoothing
+        self.default_seconds = default_seconds
+        self.durations = {}
+        if os.path.exists(path):
+            with open(path) as timings_file:
+                self.durations = json.load(timings_file)
+
+    def estimate(self, name: str) -> float:
+        """Expected duration of a scenario; unknown scenarios get the median of known ones."""
+        if name in self.durations:
+            return self.durations[name]
+        if not self.durations:
+            return self.default_seconds
+        known = sorted(self.durations.values())
+        return known[len(known) // 2]
+
+    def update(self, name: str, seconds: float) -> None:
+        previous = self.durations.get(name)
+        self.durations[name] = seconds if previous is None else \
+            self.smoothing * seconds + (1 - self.smoothing) * previous
+
+    def save(self) -> None:
+        """Write the history atomically so concurrent readers never see a partial file."""
+        temporary_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(temporary_path, 'w') as timings_file:
+            json.dump(self.durations, timings_file, indent=2, sort_keys=True)
+        os.replace(temporary_path, self.path)
+
+
+def plan_shards(estimates: dict, workers: int) -> list:
+    """
+    Split scenarios into shards with the longest-processing-time-first heuristic.
+    :param estimates: {scenario name: expected seconds}
+    :param workers: number of shards
+    :return: list of shards, each a list of names ordered longest first
+    """
+    shards = [[] for _ in range(workers)]
+    loads = [0.0] * workers
+    for name in sorted(estimates, key=lambda name: (-estimates[name], name)):
+        lightest = loads.index(min(loads))
+        shards[lightest].append(name)
+        loads[lightest] += estimates[name]
+    return shards
+
+
+class RunReport:
+    """Results of ScenarioRunner.run() with wall time compared to the ideal critical path."""
+
+    def __init__(self, results: list, wall_seconds: float, workers: int):
+        self.results = results
+        self.wall_seconds = wall_seconds
+        self.workers = workers
+
+    @property
+    def failed(self) -> list:
+        return [result for result in self.results if result.outcome != 'passed']
+
+    @property
+    def ideal_seconds(self) -> float:
+        """Lower bound on wall time: total work spread evenly, but never less than the longest scenario."""
+        durations = [result.seconds for result in self.results]
+        if not durations:
+            return 0.0
+        return max(sum(durations) / self.workers, max(durations))
+
+    @property
+    def worker_seconds(self) -> dict:
+        """Busy seconds per worker."""
+        busy = {}
+        for result in self.results:
+            if result.worker is not None:
+                busy[result.worker] = busy.get(result.worker, 0.0) + result.seconds
+        return busy
+
+    @property
+    def steals(self) -> int:
+        return sum(result.stolen for result in self.results)
+
+    def summary(self) -> str:
+        efficiency = self.ideal_seconds / self.wall_seconds if self.wall_seconds else 1.0
+        lines = [
+            f"{len(self.results)} scenarios, {len(self.failed)} failed, {self.workers} workers, {self.steals} stolen",
+            f"wall time {self.wall_seconds:.2f}s vs ideal critical path {self.ideal_seconds:.2f}s "
+            f"({efficiency:.0%} efficient)",
+        ]
+        for worker, seconds in sorted(self.worker_seconds.items()):
+            lines.append(f"  worker {worker}: {seconds:.2f}s busy")
+        for result in self.failed:
+            lines.append(f"  FAILED {result.name}: {result.error.strip().splitlines()[-1]}")
+        return '\n'.join(lines)
+
+
+def _next_scenario(worker, shards, lock, estimates):
+    """Pop the next scenario from this worker's shard, or steal the last one from the most loaded shard."""
+    with lock:
+        if len(shards[worker]):
+            return shards[worker].pop(0), False
+        candidates = [(sum(estimates[name] for name in shard), len(shard), index)
+                      for index, shard in enumerate(list(shard) for shard in shards) if shard]
+        if not candidates:
+            return None, False
+        return shards[max(candidates)[2]].pop(), True
+
+
+def _worker(worker, factory, scenarios, shards, lock, estimates, results, waiting_time):
+    # If the browser can't start, the worker exits and its queued scenarios are stolen by the others
+    with WebDriverPool(factory, size=1, waiting_time=waiting_time) as pool:
+        while True:
+            name, stolen = _next_scenario(worker, shards, lock, estimates)
+            if name is None:
+                break
+            start = time.monotonic()
+            error = None
+            driver = pool.lease()
+            try:
+                scenarios[name](driver)
+            except Exception:
+                error = traceback.format_exc()
+            finally:
+                pool.release(driver)
+            results.put(ScenarioResult(name, worker, time.monotonic() - start,
+                                       'passed' if error is None else 'failed', error, stolen))
+
+
+class ScenarioRunner:
+    """
+    Runs scenarios (functions taking a CustomSeleniumDriver) across worker processes.
+    Each worker holds its own browser session from the factory. Shards are planned from the durations in a
+    TimingDatabase, idle workers steal queued scenarios from the most loaded shard, and the database is
+    updated after each run.
+    Scenarios are looked up by name in the workers, so the 'fork' start method (the Linux default) is required
+    unless scenarios and factory are importable and picklable.
+    """
+
+    def __init__(self, factory, workers: int = 4, timing_path: str = '.vorpal_timings.json',
+                 waiting_time: int = 5, mp_context=None):
+        """
+        Initializes ScenarioRunner.
+        :param factory: WebDriverFactory (or anything with get_webdriver_instance(waiting_time))
+        :param workers: (optional) number of worker processes
+        :param timing_path: (optional) JSON file holding historical scenario durations
+        :param waiting_time: (optional) implicit wait for each worker's session
+        :param mp_context: (optional) multiprocessing context, defaults to 'fork' where available
+        """
+        self.factory = factory
+        self.workers = workers
+        self.timings = TimingDatabase(timing_path)
+        self.waiting_time = waiting_time
+        if mp_context is None:
+            fork_available = 'fork' in multiprocessing.get_all_start_methods()
+            mp_context = multiprocessing.get_context('fork' if fork_available else None)
+        self.mp_context = mp_context
+
+    def run(self, scenarios) -> RunReport:
+        """
+        Run every scenario once.
+        :param scenarios: {name: function(driver)} dict, or iterable of functions (named by __qualname__)
+        :return: RunReport
+        """
+        if not isinstance(scenarios, dict):
+            scenarios = {f'{scenario.__module__}.{scenario.__qualname__}': scenario for scenario in scenarios}
+        estimates = {name: self.timings.estimate(name) for name in scenarios}
+        workers = max(1, min(self.workers, len(scenarios)))
+
+        start = time.monotonic()
+        with self.mp_context.Manager() as manager:
+            shards = [manager.list(shard) for shard in plan_shards(estimates, workers)]
+            lock = manager.Lock()
+            results = manager.Queue()
+            processes = [
+                self.mp_context.Process(target=_worker, args=(
+                    worker, self.factory, scenarios, shards, lock, estimates, results, self.waiting_time))
+                for worker in range(workers)
+            ]
+            for process in processes:
+                process.start()
+
+            collected = []
+            while len(collected) < len(scenarios):
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    break
+                try:
+                    collected.append(results.get(timeout=0.1))
+                except queue.Empty:
+                    continue
+            for process in processes:
+                process.join()
+            while not results.empty():
+                collected.append(results.get())
+
+        # Scenarios lost to crashed workers (or never run because every worker failed to start)
+        reported = {result.name for result in collected}
+        for name in scenarios:
+            if name not in reported:
+                collected.append(ScenarioResult(name, None, 0.0, 'failed', 'No worker completed this scenario', False))
+
+        wall_seconds = time.monotonic() - start
+        for result in collected:
+            if result.outcome == 'passed':
+                self.timings.update(result.name, result.seconds)
+        self.timings.save()
+        return RunReport(collected, wall_seconds, workers)
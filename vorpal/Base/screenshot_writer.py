@@ -0,0 +1,124 @@
+"""
+Package: Base
+ScreenshotWriter class implementation.
+Decodes and writes screenshots on a background thread so capturing one costs the test a single command.
+"""
+import base64
+import hashlib
+import os
+import queue
+import threading
+
+
+class _Screenshot:
+    """One submitted screenshot; done is set once its write has finished, succeeded tells whether it worked."""
+
+    def __init__(self, destination_file: str, png_base64: str, digest: bytes = None):
+        self.destination_file = destination_file
+        self.png_base64 = png_base64
+        self.digest = digest
+        self.done = threading.Event()
+        self.succeeded = False
+
+    def written_to(self, destination_file: str) -> bool:
+        """
+        Whether this image can stand in for one meant for destination_file, waiting for its write if pending.
+        :param destination_file: path the identical image would be written to
+        """
+        if os.path.dirname(self.destination_file) != os.path.dirname(destination_file):
+            return False
+        self.done.wait()
+        return self.succeeded
+
+
+class ScreenshotWriter:
+    """
+    Bounded background writer for base64 PNG screenshots.
+    Images byte-identical to the previous one are skipped once it is written to the same directory, and close() waits for every pending write.
+    """
+
+    def __init__(self, max_pending: int = 64, dedupe: bool = True):
+        """
+        :param max_pending: (optional) screenshots queued before submit() blocks
+        :param dedupe: (optional) skip an image identical to the previously submitted one
+        """
+        self.dedupe = dedupe
+        self.written = 0
+        self.skipped = 0
+        self.errors = []
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last = None
+        self._directories = set()
+
+    def submit(self, destination_file: str, png_base64: str) -> str:
+        """
+        Queue a screenshot for writing, starting the writer thread on first use.
+        :param destination_file: path of the PNG to write
+        :param png_base64: screenshot as returned by get_screenshot_as_base64()
+        :return: path the image ends up at: destination_file, or the previous screenshot's path when the image
+            is identical to it, was written successfully and is in the same directory
+        """
+        screenshot = _Screenshot(destination_file, png_base64)
+        with self._lock:
+            if self.dedupe:
+                # The base64 text is a function of the PNG bytes, so it can be compared without decoding
+                screenshot.digest = hashlib.sha1(png_base64.encode('ascii')).digest()
+                previous = self._last
+                if previous is not None and previous.digest == screenshot.digest \
+                        and previous.written_to(destination_file):
+                    self.skipped += 1
+                    return previous.destination_file
+                self._last = screenshot
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='vorpal-screenshots', daemon=True)
+                self._thread.start()
+        self._queue.put(screenshot)
+        return destination_file
+
+    def _run(self):
+        while True:
+            screenshot = self._queue.get()
+            try:
+                if screenshot is None:
+                    return
+                self._write(screenshot.destination_file, screenshot.png_base64)
+                screenshot.succeeded = True
+            except Exception as error:
+                self.errors.append(error)
+            finally:
+                if screenshot is not None:
+                    screenshot.done.set()
+                self._queue.task_done()
+
+    def _write(self, destination_file: str, png_base64: str) -> None:
+        png = base64.b64decode(png_base64)
+        directory = os.path.dirname(destination_file)
+        if directory not in self._directories:
+            os.makedirs(directory or '.', exist_ok=True)
+            self._directories.add(directory)
+        with open(destination_file, 'wb') as png_file:
+            png_file.write(png)
+        self.written += 1
+
+    def flush(self) -> None:
+        """
+        Wait until every queued screenshot is written.
+        :raises Exception: the first error raised by a write since the last flush
+        """
+        self._queue.join()
+        if self.errors:
+            error = self.errors[0]
+            self.errors = []
+            raise error
+
+    def close(self) -> None:
+        """Flush and stop the writer thread; a later submit() starts a new one."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+        self.flush()
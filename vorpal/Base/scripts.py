@@ -0,0 +1,366 @@
+"""
+Module containing JavaScript sources executed in the browser by vorpal.
+Scripts take already-resolved element handles as arguments so no additional lookup is needed.
+"""
+
+# Helper functions shared by the scripts below
+_IS_DISPLAYED = """
+function isDisplayed(el) {
+    var style = window.getComputedStyle(el);
+    return el.getClientRects().length > 0 && style.visibility !== 'hidden' && style.display !== 'none';
+}
+"""
+
+_RECT = """
+function rectOf(el) {
+    var box = el.getBoundingClientRect();
+    return {'x': box.left + window.pageXOffset, 'y': box.top + window.pageYOffset,
+            'width': box.width, 'height': box.height};
+}
+"""
+
+_ATTRIBUTE = """
+function attributeOf(el, name) {
+    var value = name in el && typeof el[name] !== 'function' && typeof el[name] !== 'object' ? el[name] : el.getAttribute(name);
+    return value === null || value === undefined ? null : String(value);
+}
+"""
+
+_DISPLAY_TEXT = _IS_DISPLAYED + """
+function displayText(el) {
+    var text = el.tagName.toLowerCase() === 'input' ? el.value : (isDisplayed(el) ? el.innerText : '');
+    if (!text) {
+        text = el.innerText || '';
+    }
+    return text.trim();
+}
+"""
+
+_SNAPSHOT = _IS_DISPLAYED + _RECT + _ATTRIBUTE + """
+function snapshot(el, names) {
+    var displayed = isDisplayed(el);
+    var attributes = {};
+    for (var i = 0; i < names.length; i++) {
+        attributes[names[i]] = attributeOf(el, names[i]);
+    }
+    return {
+        'tag_name': el.tagName.toLowerCase(),
+        'text': displayed ? (el.innerText || '') : '',
+        'value': el.value === undefined || el.value === null ? null : String(el.value),
+        'inner_text': el.innerText === undefined ? null : el.innerText,
+        'is_displayed': displayed,
+        'is_enabled': !el.disabled,
+        'is_selected': !!(el.checked || el.selected),
+        'rect': rectOf(el),
+        'attributes': attributes
+    };
+}
+"""
+
+# Finds elements from a Selenium By value and locator, in document order
+_FIND = """
+function findAll(by, locator, root) {
+    root = root || document;
+    var found = [];
+    if (by === 'css selector') {
+        return Array.prototype.slice.call(root.querySelectorAll(locator));
+    } else if (by === 'id') {
+        return Array.prototype.slice.call(root.querySelectorAll('[id="' + locator.replace(/(["\\\\])/g, '\\\\$1') + '"]'));
+    } else if (by === 'name') {
+        return Array.prototype.slice.call(root.querySelectorAll('[name="' + locator.replace(/(["\\\\])/g, '\\\\$1') + '"]'));
+    } else if (by === 'class name') {
+        return Array.prototype.slice.call(root.getElementsByClassName(locator));
+    } else if (by === 'tag name') {
+        return Array.prototype.slice.call(root.getElementsByTagName(locator));
+    } else if (by === 'xpath') {
+        var result = document.evaluate(locator, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (var i = 0; i < result.snapshotLength; i++) {
+            found.push(result.snapshotItem(i));
+        }
+        return found;
+    } else if (by === 'link text' || by === 'partial link text') {
+        var links = root.querySelectorAll('a');
+        for (var j = 0; j < links.length; j++) {
+            var text = (links[j].innerText || links[j].textContent || '').trim();
+            if (by === 'link text' ? text === locator : text.indexOf(locator) !== -1) {
+                found.push(links[j]);
+            }
+        }
+        return found;
+    }
+    throw new Error('Unsupported locator type: ' + by);
+}
+
+function find(by, locator, root) {
+    return findAll(by, locator, root)[0] || null;
+}
+"""
+
+# Reads the state of arguments[0] in a single round trip.
+# arguments[1] is a list of attribute names to collect alongside the standard state.
+SNAPSHOT_ELEMENT = _SNAPSHOT + """
+return snapshot(arguments[0], arguments[1] || []);
+"""
+
+# Collection scripts: arguments[0] is a list of element handles, results are returned in the same order.
+SNAPSHOT_ELEMENTS = _SNAPSHOT + """
+var names = arguments[1] || [];
+return arguments[0].map(function (el) { return snapshot(el, names); });
+"""
+
+COLLECTION_TEXTS = _DISPLAY_TEXT + """
+return arguments[0].map(displayText);
+"""
+
+COLLECTION_ATTRIBUTES = _ATTRIBUTE + """
+var name = arguments[1];
+return arguments[0].map(function (el) { return attributeOf(el, name); });
+"""
+
+COLLECTION_DISPLAYED = _IS_DISPLAYED + """
+return arguments[0].map(isDisplayed);
+"""
+
+COLLECTION_RECTS = _RECT + """
+return arguments[0].map(rectOf);
+"""
+
+# Resolves many locators in one round trip. arguments[0] is a list of [by, locator, nth_of_type] triples;
+# returns the nth match (1-based) of each, or null where it is missing or the locator can't be evaluated.
+PREFETCH_ELEMENTS = _FIND + """
+return arguments[0].map(function (spec) {
+    try {
+        return findAll(spec[0], spec[1])[spec[2] - 1] || null;
+    } catch (e) {
+        return null;
+    }
+});
+"""
+
+# Sets many form controls in one round trip. arguments[0] is a list of [handle, by, locator, nth_of_type, value];
+# a null handle is found from by/locator/nth_of_type. Values are assigned through the native value setter and
+# followed by bubbling 'input' and 'change' events (checkboxes and radios are clicked), as frameworks like React expect.
+# Returns [error, element] per field: error is null on success, FILL_NEEDS_KEYSTROKES for file inputs, else a message.
+FILL_FORM = _FIND + """
+var TEXT_LESS = ['button', 'submit', 'reset', 'image'];
+
+function fire(el, type) {
+    el.dispatchEvent(new Event(type, {'bubbles': true}));
+}
+
+function setValue(el, value) {
+    var descriptor = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value');
+    if (descriptor && descriptor.set) {
+        descriptor.set.call(el, value);
+    } else {
+        el.value = value;
+    }
+}
+
+function fillSelect(el, value) {
+    var wanted = (Array.isArray(value) ? value : [value]).map(String);
+    if (!el.multiple && wanted.length !== 1) {
+        return 'a single select takes one value';
+    }
+    var chosen = [];
+    for (var i = 0; i < wanted.length; i++) {
+        var match = null;
+        for (var j = 0; j < el.options.length && match === null; j++) {
+            if (el.options[j].value === wanted[i]) { match = el.options[j]; }
+        }
+        for (var k = 0; k < el.options.length && match === null; k++) {
+            if ((el.options[k].text || '').trim() === wanted[i]) { match = el.options[k]; }
+        }
+        if (match === null) {
+            return 'no option ' + JSON.stringify(wanted[i]);
+        }
+        chosen.push(match);
+    }
+    for (var n = 0; n < el.options.length; n++) {
+        el.options[n].selected = chosen.indexOf(el.options[n]) !== -1;
+    }
+    fire(el, 'input');
+    fire(el, 'change');
+    return null;
+}
+
+function fillCheckable(el, value) {
+    var target = el;
+    if (el.type === 'radio' && typeof value === 'string') {
+        var group = (el.form || document).querySelectorAll('input[type="radio"]');
+        target = null;
+        for (var i = 0; i < group.length && target === null; i++) {
+            if (group[i].name === el.name && group[i].value === value) { target = group[i]; }
+        }
+        if (target === null) {
+            return 'no radio button with value ' + JSON.stringify(value);
+        }
+        value = true;
+    }
+    if (target.checked !== !!value) {
+        if (target.type === 'radio' && !value) {
+            return 'a radio button cannot be unchecked';
+        }
+        target.click();
+    }
+    return null;
+}
+
+function fill(el, value) {
+    var tag = el.tagName.toLowerCase(), type = (el.type || '').toLowerCase();
+    if (el.disabled) {
+        return 'disabled';
+    }
+    if (tag === 'select') {
+        return fillSelect(el, value);
+    }
+    if (tag === 'input' && (type === 'checkbox' || type === 'radio')) {
+        return fillCheckable(el, value);
+    }
+    if (tag === 'input' && type === 'file') {
+        return 'needs keystrokes';
+    }
+    if (tag === 'textarea' || (tag === 'input' && TEXT_LESS.indexOf(type) === -1)) {
+        if (el.readOnly) {
+            return 'read-only';
+        }
+        setValue(el, value === null || value === undefined ? '' : String(value));
+        fire(el, 'input');
+        fire(el, 'change');
+        return null;
+    }
+    return 'cannot fill <' + tag + (type ? ' type=' + type : '') + '>';
+}
+
+return arguments[0].map(function (field) {
+    var el = field[0];
+    try {
+        el = el || findAll(field[1], field[2])[field[3] - 1] || null;
+        return el ? [fill(el, field[4]), el] : ['not found', null];
+    } catch (e) {
+        return [String(e), el];
+    }
+});
+"""
+
+# fill() result for controls whose value can only be entered by typing, which fill_form() leaves to send_keys()
+FILL_NEEDS_KEYSTROKES = 'needs keystrokes'
+
+# Runs queued element actions in one round trip. arguments[0] is a list of [action, target, arguments]; target is
+# an element handle, or a [by, locator, nth_of_type] triple found in the page (XPath through document.evaluate).
+# Returns [error, value, element] per action: error is null on success, value is what the action returned.
+RUN_ACTIONS = _FIND + """
+var ACTIONS = {
+    'click': function (el) {
+        el.click();
+    },
+    'scroll_into_view': function (el, block) {
+        el.scrollIntoView({'block': block, 'inline': 'nearest'});
+    },
+    'focus': function (el) {
+        el.focus();
+        return document.activeElement === el;
+    },
+    'set_attribute': function (el, name, value) {
+        if (value === null) {
+            el.removeAttribute(name);
+        } else {
+            el.setAttribute(name, String(value));
+        }
+    },
+    'dispatch_event': function (el, type, detail) {
+        return el.dispatchEvent(new CustomEvent(type, {'bubbles': true, 'cancelable': true, 'detail': detail}));
+    }
+};
+
+return arguments[0].map(function (action) {
+    var target = action[1], el = null;
+    try {
+        el = Array.isArray(target) ? findAll(target[0], target[1])[target[2] - 1] || null : target;
+        if (!el) {
+            return ['not found', null, null];
+        }
+        var value = ACTIONS[action[0]].apply(null, [el].concat(action[2]));
+        return [null, value === undefined ? null : value, el];
+    } catch (e) {
+        return [String(e), null, el];
+    }
+});
+"""
+
+# Starts a navigation without waiting for it. The marker (arguments[1]) is left on the current window,
+# so LEFT_DOCUMENT can tell the old document from the new one.
+NAVIGATE = """
+window.__vorpalNavigation = arguments[1];
+window.location.assign(arguments[0]);
+"""
+
+# True once the document carrying marker arguments[0] is gone and the new one has been parsed (DOMContentLoaded)
+LEFT_DOCUMENT = """
+return window.__vorpalNavigation !== arguments[0] && document.readyState !== 'loading';
+"""
+
+# Waits in the page for an element to reach a state, reacting to DOM mutations instead of polling over the wire.
+# arguments: by, locator, state, expected, timeout in ms, callback.
+# Resolves with {'status': 'ok', 'element': element or null} or {'status': 'timeout'}.
+WAIT_FOR_ELEMENT = _FIND + _DISPLAY_TEXT + """
+var by = arguments[0], locator = arguments[1], state = arguments[2], expected = arguments[3],
+    timeout = arguments[4], callback = arguments[arguments.length - 1];
+var initial = null, done = false, observer = null, interval = null, timer = null;
+
+function fingerprint(el) {
+    var parts = [displayText(el)];
+    for (var i = 0; i < el.attributes.length; i++) {
+        parts.push(el.attributes[i].name + '=' + el.attributes[i].value);
+    }
+    return parts.join('\\n');
+}
+
+function check() {
+    var el = find(by, locator);
+    switch (state) {
+        case 'present': return el;
+        case 'visible': return el && isDisplayed(el) ? el : null;
+        case 'clickable': return el && isDisplayed(el) && !el.disabled ? el : null;
+        case 'invisible': return !el || !isDisplayed(el) ? {'element': null} : null;
+        case 'text': return el && displayText(el).indexOf(expected) !== -1 ? el : null;
+        case 'attribute': return el && el.getAttribute(expected[0]) === expected[1] ? el : null;
+        case 'changed':
+            if (initial === null) { initial = el ? fingerprint(el) : ''; return null; }
+            return el && fingerprint(el) !== initial ? el : null;
+    }
+    throw new Error('Unsupported wait state: ' + state);
+}
+
+function finish(result) {
+    if (done) { return; }
+    done = true;
+    if (observer) { observer.disconnect(); }
+    clearInterval(interval);
+    clearTimeout(timer);
+    callback(result);
+}
+
+function onChange() {
+    var found;
+    try {
+        found = check();
+    } catch (e) {
+        finish({'status': 'error', 'message': String(e)});
+        return;
+    }
+    if (found) {
+        finish({'status': 'ok', 'element': found.element === null ? null : found});
+    }
+}
+
+onChange();
+if (!done) {
+    observer = new MutationObserver(onChange);
+    observer.observe(document.documentElement, {'childList': true, 'subtree': true, 'attributes': true,
+                                                'characterData': true});
+    // Layout-only changes (e.g. stylesheet loads, transitions) don't mutate the DOM, so recheck occasionally
+    interval = setInterval(onChange, 100);
+    timer = setTimeout(function () { finish({'status': 'timeout'}); }, timeout);
+}
+"""
@@ -0,0 +1,562 @@
+"""
+Module containing the document model of the simulated WebDriver: an HTML parser, CSS selector matching
+and the rendered-text and visibility rules Selenium applies, without a browser or a layout engine.
+"""
+import re
+from html import escape
+from html.parser import HTMLParser
+from selenium.common.exceptions import InvalidSelectorException
+
+# Elements without content or end tag
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track',
+             'wbr'}
+# Elements never rendered, whatever their style
+HIDDEN_TAGS = {'head', 'script', 'style', 'template', 'noscript', 'title', 'meta', 'link', 'base'}
+# Elements that start a new line in rendered text
+BLOCK_TAGS = {'address', 'article', 'aside', 'blockquote', 'dd', 'details', 'dialog', 'div', 'dl', 'dt', 'fieldset',
+              'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li',
+              'main', 'nav', 'ol', 'p', 'pre', 'section', 'summary', 'table', 'tr', 'ul', 'caption', 'body', 'html',
+              'option', 'select', 'textarea', 'tbody', 'thead', 'tfoot'}
+# Start tags that implicitly close an open element of the listed types
+IMPLIED_END = {'li': {'li'}, 'option': {'option'}, 'dt': {'dt', 'dd'}, 'dd': {'dt', 'dd'}, 'tr': {'tr', 'td', 'th'},
+               'td': {'td', 'th'}, 'th': {'td', 'th'}, 'thead': {'tbody', 'tr', 'td', 'th'},
+               'tbody': {'thead', 'tbody', 'tr', 'td', 'th'}}
+# Block-level start tags close an open paragraph
+for _tag in BLOCK_TAGS - {'body', 'html', 'option', 'select', 'textarea', 'dd', 'dt', 'li', 'tr', 'caption',
+                          'tbody', 'thead', 'tfoot', 'summary', 'figcaption'}:
+    IMPLIED_END.setdefault(_tag, set()).add('p')
+# Attributes whose presence is their value
+BOOLEAN_ATTRIBUTES = {'checked', 'selected', 'disabled', 'readonly', 'required', 'multiple', 'hidden', 'autofocus',
+                      'novalidate', 'formnovalidate', 'open', 'reversed', 'async', 'defer', 'ismap', 'nomodule',
+                      'autoplay', 'controls', 'loop', 'muted', 'default', 'inert'}
+# Elements a disabled attribute applies to
+FORM_CONTROLS = {'button', 'input', 'select', 'textarea', 'option', 'optgroup', 'fieldset'}
+
+
+class Node:
+    """Base of the document tree."""
+
+    def __init__(self, parent: 'Node' = None):
+        self.parent = parent
+        self.children = []
+
+    @property
+    def element_children(self) -> list:
+        return [child for child in self.children if isinstance(child, Element)]
+
+    def iter(self):
+        """Descendant elements in document order."""
+        for child in self.children:
+            if isinstance(child, Element):
+                yield child
+                yield from child.iter()
+
+    @property
+    def text_content(self) -> str:
+        return ''.join(child.data if isinstance(child, Text) else child.text_content
+                       for child in self.children if isinstance(child, (Text, Element)))
+
+
+class Document(Node):
+    """Root of a parsed page."""
+
+    def __init__(self, url: str = 'about:blank'):
+        super().__init__()
+        self.url = url
+        # Globals scripts set on window while this document is shown
+        self.window = {}
+
+    @property
+    def document_element(self) -> 'Element':
+        return next(iter(self.element_children), None)
+
+    @property
+    def title(self) -> str:
+        title = next((element for element in self.iter() if element.tag == 'title'), None)
+        return ' '.join(title.text_content.split()) if title is not None else ''
+
+    def __repr__(self):
+        return f"<Document {self.url}>"
+
+
+class Text(Node):
+    """Text between tags, with character references already decoded."""
+
+    def __init__(self, data: str, parent: Node = None):
+        super().__init__(parent)
+        self.data = data
+
+
+class Element(Node):
+    """An element with its attributes and the live form state (value, checked, selected) scripts would see."""
+
+    def __init__(self, tag: str, attributes: dict, parent: Node = None):
+        super().__init__(parent)
+        self.tag = tag
+        self.attributes = attributes
+        self._value = None
+        self.checked = 'checked' in attributes
+        self.selected = 'selected' in attributes
+
+    def __repr__(self):
+        return f"<Element {self.tag}{' #' + self.attributes['id'] if 'id' in self.attributes else ''}>"
+
+    def get(self, name: str, default=None):
+        return self.attributes.get(name.lower(), default)
+
+    @property
+    def classes(self) -> list:
+        return self.attributes.get('class', '').split()
+
+    @property
+    def input_type(self) -> str:
+        return self.attributes.get('type', 'text').lower() if self.tag == 'input' else None
+
+    @property
+    def value(self) -> str:
+        """Current value of a form control (the 'value' property, not the attribute)."""
+        if self.tag == 'textarea':
+            return self.text_content if self._value is None else self._value
+        if self.tag == 'select':
+            selected = self.selected_options
+            return selected[0].value if selected else ''
+        if self.tag == 'option':
+            return self.attributes['value'] if 'value' in self.attributes else ' '.join(self.text_content.split())
+        if self._value is not None:
+            return self._value
+        if self.tag == 'input' and self.input_type in ('checkbox', 'radio'):
+            return self.attributes.get('value', 'on')
+        return self.attributes.get('value', '') if self.tag in ('input', 'button') else None
+
+    @value.setter
+    def value(self, value: str):
+        self._value = value
+
+    @property
+    def options(self) -> list:
+        return [element for element in self.iter() if element.tag == 'option']
+
+    @property
+    def selected_options(self) -> list:
+        options = self.options
+        selected = [option for option in options if option.selected]
+        if not selected and options and 'multiple' not in self.attributes:
+            return options[:1]
+        return selected
+
+    @property
+    def form(self) -> 'Element':
+        return next((ancestor for ancestor in ancestors(self) if ancestor.tag == 'form'), None)
+
+    @property
+    def is_disabled(self) -> bool:
+        if self.tag not in FORM_CONTROLS:
+            return False
+        if 'disabled' in self.attributes:
+            return True
+        return any(ancestor.tag in ('fieldset', 'select', 'optgroup') and 'disabled' in ancestor.attributes
+                   for ancestor in ancestors(self))
+
+    @property
+    def style(self) -> dict:
+        declarations = {}
+        for declaration in self.attributes.get('style', '').split(';'):
+            name, _, value = declaration.partition(':')
+            if name.strip():
+                declarations[name.strip().lower()] = value.strip().lower()
+        return declarations
+
+
+def ancestors(node: Node):
+    """Ancestor elements, nearest first."""
+    node = node.parent
+    while isinstance(node, Element):
+        yield node
+        node = node.parent
+
+
+class _TreeBuilder(HTMLParser):
+    """Tolerant parser building the Document tree, closing implied and mismatched tags like browsers do."""
+
+    def __init__(self, document: Document):
+        super().__init__(convert_charrefs=True)
+        self.stack = [document]
+
+    def handle_starttag(self, tag, attrs):
+        implied = IMPLIED_END.get(tag, ())
+        while isinstance(self.stack[-1], Element) and self.stack[-1].tag in implied:
+            self.stack.pop()
+        attributes = {}
+        for name, value in attrs:
+            attributes.setdefault(name.lower(), value if value is not None else '')
+        element = Element(tag, attributes, self.stack[-1])
+        self.stack[-1].children.append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                del self.stack[index:]
+                return
+
+    def handle_data(self, data):
+        parent = self.stack[-1]
+        if parent.children and isinstance(parent.children[-1], Text):
+            parent.children[-1].data += data
+        else:
+            parent.children.append(Text(data, parent))
+
+
+def parse_html(html: str, url: str = 'about:blank') -> Document:
+    """
+    Parse an HTML document.
+    :param html: markup
+    :param url: (optional) address of the document
+    :return: Document
+    """
+    document = Document(url)
+    builder = _TreeBuilder(document)
+    builder.feed(html)
+    builder.close()
+    return document
+
+
+# SECTION: Rendering rules
+
+def is_rendered(element: Element) -> bool:
+    """Whether the element itself (ignoring its ancestors) is rendered."""
+    if element.tag in HIDDEN_TAGS or 'hidden' in element.attributes:
+        return False
+    if element.tag == 'input' and element.input_type == 'hidden':
+        return False
+    style = element.style
+    return style.get('display') != 'none' and style.get('visibility') not in ('hidden', 'collapse')
+
+
+def is_displayed(element: Element) -> bool:
+    """Selenium's is_displayed(): the element and all its ancestors are rendered (layout is not simulated)."""
+    if element.tag in ('option', 'optgroup'):
+        select = next((ancestor for ancestor in ancestors(element) if ancestor.tag == 'select'), None)
+        return select is not None and is_displayed(select)
+    return is_rendered(element) and all(is_rendered(ancestor) for ancestor in ancestors(element))
+
+
+def rendered_text(element: Element) -> str:
+    """innerText-like text: hidden descendants skipped, whitespace collapsed, block elements on their own lines."""
+    parts = []
+
+    def walk(node, preformatted):
+        for child in node.children:
+            if isinstance(child, Text):
+                parts.append(child.data if preformatted else re.sub(r'\s+', ' ', child.data))
+            elif isinstance(child, Element) and is_rendered(child):
+                if child.tag == 'br':
+                    parts.append('\n')
+                    continue
+                if child.tag in ('input', 'select', 'textarea'):
+                    continue
+                block = child.tag in BLOCK_TAGS
+                if block:
+                    parts.append('\n')
+                walk(child, preformatted or child.tag == 'pre')
+                if block:
+                    parts.append('\n')
+
+    walk(element, element.tag == 'pre')
+    lines = (line.strip(' ') for line in ''.join(parts).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def outer_html(node: Node) -> str:
+    if isinstance(node, Text):
+        parent = node.parent
+        return node.data if isinstance(parent, Element) and parent.tag in ('script', 'style') else escape(node.data, False)
+    if not isinstance(node, Element):
+        return inner_html(node)
+    attributes = ''.join(f' {name}' if value == '' and name in BOOLEAN_ATTRIBUTES else f' {name}="{escape(value)}"'
+                         for name, value in node.attributes.items())
+    if node.tag in VOID_TAGS:
+        return f'<{node.tag}{attributes}>'
+    return f'<{node.tag}{attributes}>{inner_html(node)}</{node.tag}>'
+
+
+def inner_html(node: Node) -> str:
+    return ''.join(outer_html(child) for child in node.children if isinstance(child, (Text, Element)))
+
+
+# SECTION: CSS selectors
+
+_CSS_TOKEN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<combinator>[>+~])
+  | (?P<comma>,)
+  | \#(?P<id>(?:[-\w]|\\.)+)
+  | \.(?P<cls>(?:[-\w]|\\.)+)
+  | \[\s*(?P<attr>[-\w:]+)\s*(?:(?P<op>[~|^$*]?=)\s*(?:"(?P<dq>(?:[^"\\]|\\.)*)"|'(?P<sq>(?:[^'\\]|\\.)*)'|(?P<bare>[^\s\]]+))\s*(?P<flag>[iIsS])?\s*)?\]
+  | ::?(?P<pseudo>[-\w]+)(?P<args>\()?
+  | (?P<tag>\*|[-\w]+)
+''', re.VERBOSE)
+
+
+def _unescape_css(value: str) -> str:
+    return re.sub(r'\\(.)', r'\1', value)
+
+
+class _SelectorParser:
+    """Parses a selector list into [[(combinator, compound), ...], ...] with compounds as lists of tests."""
+
+    def __init__(self, selector: str):
+        self.selector = selector
+        self.position = 0
+
+    def error(self, message: str):
+        return InvalidSelectorException(f"Invalid or unsupported CSS selector {self.selector!r}: {message}")
+
+    def parse_list(self, closing: str = None) -> list:
+        selectors = [self.parse_complex()]
+        while self.position < len(self.selector):
+            if closing and self.selector[self.position] == closing:
+                break
+            match = _CSS_TOKEN.match(self.selector, self.position)
+            if not match or not match.group('comma'):
+                raise self.error(f"unexpected text at {self.position}")
+            self.position = match.end()
+            selectors.append(self.parse_complex())
+        return selectors
+
+    def parse_complex(self) -> list:
+        parts = []
+        combinator = None
+        compound = []
+        while self.position < len(self.selector):
+            character = self.selector[self.position]
+            if character in ',)':
+                break
+            match = _CSS_TOKEN.match(self.selector, self.position)
+            if not match:
+                raise self.error(f"unexpected character {character!r} at {self.position}")
+            self.position = match.end()
+            if match.group('space') or match.group('combinator'):
+                if compound:
+                    parts.append((combinator, compound))
+                    compound = []
+                    combinator = ' '
+                if match.group('combinator'):
+                    if combinator is None:
+                        raise self.error("selector starts with a combinator")
+                    combinator = match.group('combinator')
+                continue
+            compound.append(self.parse_simple(match))
+        if compound:
+            parts.append((combinator, compound))
+        elif parts:
+            raise self.error("selector ends with a combinator")
+        if not parts:
+            raise self.error("empty selector")
+        return parts
+
+    def parse_simple(self, match) -> tuple:
+        if match.group('tag'):
+            return ('tag', match.group('tag').lower())
+        if match.group('id'):
+            return ('id', _unescape_css(match.group('id')))
+        if match.group('cls'):
+            return ('class', _unescape_css(match.group('cls')))
+        if match.group('attr'):
+            value = next((group for group in (match.group('dq'), match.group('sq'), match.group('bare'))
+                          if group is not None), None)
+            return ('attr', match.group('attr').lower(), match.group('op'),
+                    _unescape_css(value) if value is not None else None, (match.group('flag') or '').lower() == 'i')
+        name = match.group('pseudo').lower()
+        if not match.group('args'):
+            if name not in _PSEUDO_CLASSES:
+                raise self.error(f"unsupported pseudo-class :{name}")
+            return ('pseudo', name, None)
+        if name in ('not', 'is', 'where', 'has'):
+            argument = self.parse_list(closing=')')
+        else:
+            end = self.selector.find(')', self.position)
+            if end == -1:
+                raise self.error("unclosed parenthesis")
+            argument = self.selector[self.position:end].strip()
+            self.position = end
+            if name not in _PSEUDO_FUNCTIONS:
+                raise self.error(f"unsupported pseudo-class :{name}()")
+            if name.startswith('nth'):
+                argument = _parse_nth(argument, self)
+        if self.position >= len(self.selector) or self.selector[self.position] != ')':
+            raise self.error("unclosed parenthesis")
+        self.position += 1
+        return ('pseudo', name, argument)
+
+
+def _parse_nth(expression: str, parser: _SelectorParser) -> tuple:
+    expression = expression.replace(' ', '').lower()
+    if expression == 'odd':
+        return 2, 1
+    if expression == 'even':
+        return 2, 0
+    match = re.match(r'^([+-]?\d*)n([+-]\d+)?$', expression)
+    if match:
+        a = match.group(1)
+        a = 1 if a in ('', '+') else -1 if a == '-' else int(a)
+        return a, int(match.group(2) or 0)
+    if re.match(r'^[+-]?\d+$', expression):
+        return 0, int(expression)
+    raise parser.error(f"invalid nth expression {expression!r}")
+
+
+def _nth_matches(position: int, nth: tuple) -> bool:
+    a, b = nth
+    if a == 0:
+        return position == b
+    return (position - b) % a == 0 and (position - b) // a >= 0
+
+
+def _siblings(element: Element) -> list:
+    return element.parent.element_children if element.parent is not None else [element]
+
+
+def _same_type(element: Element) -> list:
+    return [sibling for sibling in _siblings(element) if sibling.tag == element.tag]
+
+
+_PSEUDO_CLASSES = {
+    'first-child': lambda element: _siblings(element)[0] is element,
+    'last-child': lambda element: _siblings(element)[-1] is element,
+    'only-child': lambda element: len(_siblings(element)) == 1,
+    'first-of-type': lambda element: _same_type(element)[0] is element,
+    'last-of-type': lambda element: _same_type(element)[-1] is element,
+    'only-of-type': lambda element: len(_same_type(element)) == 1,
+    'empty': lambda element: not element.element_children and not element.text_content,
+    'root': lambda element: not isinstance(element.parent, Element),
+    'checked': lambda element: element.checked if element.tag == 'input' else
+                               (element.tag == 'option' and element in element_select_options(element)),
+    'disabled': lambda element: element.is_disabled,
+    'enabled': lambda element: element.tag in FORM_CONTROLS and not element.is_disabled,
+    'required': lambda element: 'required' in element.attributes,
+    'optional': lambda element: element.tag in ('input', 'select', 'textarea') and 'required' not in element.attributes,
+    'link': lambda element: element.tag in ('a', 'area') and 'href' in element.attributes,
+    'any-link': lambda element: element.tag in ('a', 'area') and 'href' in element.attributes,
+    'hover': lambda element: False,
+    'focus': lambda element: False,
+    'active': lambda element: False,
+    'visited': lambda element: False,
+}
+
+_PSEUDO_FUNCTIONS = {'nth-child', 'nth-last-child', 'nth-of-type', 'nth-last-of-type'}
+
+
+def element_select_options(option: Element) -> list:
+    select = next((ancestor for ancestor in ancestors(option) if ancestor.tag == 'select'), None)
+    return select.selected_options if select is not None else ([option] if option.selected else [])
+
+
+def _matches_simple(element: Element, test: tuple) -> bool:
+    kind = test[0]
+    if kind == 'tag':
+        return test[1] == '*' or element.tag == test[1]
+    if kind == 'id':
+        return element.attributes.get('id') == test[1]
+    if kind == 'class':
+        return test[1] in element.classes
+    if kind == 'attr':
+        _, name, operator, expected, ignore_case = test
+        if name not in element.attributes:
+            return False
+        if operator is None:
+            return True
+        actual = element.attributes[name]
+        if ignore_case:
+            actual, expected = actual.lower(), expected.lower()
+        if operator == '=':
+            return actual == expected
+        if operator == '~=':
+            return expected in actual.split()
+        if operator == '|=':
+            return actual == expected or actual.startswith(expected + '-')
+        if operator == '^=':
+            return bool(expected) and actual.startswith(expected)
+        if operator == '$=':
+            return bool(expected) and actual.endswith(expected)
+        return bool(expected) and expected in actual
+    name, argument = test[1], test[2]
+    if argument is None:
+        return _PSEUDO_CLASSES[name](element)
+    if name == 'not':
+        return not any(_matches_complex(element, selector) for selector in argument)
+    if name in ('is', 'where'):
+        return any(_matches_complex(element, selector) for selector in argument)
+    if name == 'has':
+        return any(_matches_complex(descendant, selector) for descendant in element.iter() for selector in argument)
+    if name == 'nth-child':
+        return _nth_matches(_siblings(element).index(element) + 1, argument)
+    if name == 'nth-last-child':
+        siblings = _siblings(element)
+        return _nth_matches(len(siblings) - siblings.index(element), argument)
+    if name == 'nth-of-type':
+        return _nth_matches(_same_type(element).index(element) + 1, argument)
+    same_type = _same_type(element)
+    return _nth_matches(len(same_type) - same_type.index(element), argument)
+
+
+def _matches_compound(element: Element, compound: list) -> bool:
+    return all(_matches_simple(element, test) for test in compound)
+
+
+def _matches_complex(element: Element, parts: list, index: int = None) -> bool:
+    index = len(parts) - 1 if index is None else index
+    combinator, compound = parts[index]
+    if not _matches_compound(element, compound):
+        return False
+    if index == 0:
+        return True
+    if combinator == '>':
+        parent = element.parent
+        return isinstance(parent, Element) and _matches_complex(parent, parts, index - 1)
+    if combinator == ' ':
+        return any(_matches_complex(ancestor, parts, index - 1) for ancestor in ancestors(element))
+    siblings = _siblings(element)
+    previous = siblings[:siblings.index(element)]
+    if combinator == '+':
+        return bool(previous) and _matches_complex(previous[-1], parts, index - 1)
+    return any(_matches_complex(sibling, parts, index - 1) for sibling in previous)
+
+
+_selector_cache = {}
+
+
+def compile_selector(selector: str) -> list:
+    """
+    Parse a CSS selector list once; results are cached.
+    :raises InvalidSelectorException: for malformed or unsupported selectors
+    """
+    compiled = _selector_cache.get(selector)
+    if compiled is None:
+        parser = _SelectorParser(selector.strip())
+        compiled = parser.parse_list()
+        if parser.position != len(parser.selector):
+            raise parser.error(f"unexpected text at {parser.position}")
+        _selector_cache[selector] = compiled
+    return compiled
+
+
+def select(root: Node, selector: str) -> list:
+    """
+    querySelectorAll(): descendants of root matching the selector, in document order.
+    :param root: Document or Element
+    :param selector: CSS selector list
+    """
+    compiled = compile_selector(selector)
+    return [element for element in root.iter() if any(_matches_complex(element, parts) for parts in compiled)]
+
+
+def matches(element: Element, selector: str) -> bool:
+    """Element.matches()."""
+    return any(_matches_complex(element, parts) for parts in compile_selector(selector))
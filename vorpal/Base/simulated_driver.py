@@ -0,0 +1,855 @@
+"""
+Package: Base
+SimulatedWebDriver class implementation.
+An in-process WebDriver for browserless runs: pages are parsed and queried in Python, so page objects,
+locators, snapshots, collections and waits run without starting a browser.
+"""
+import base64
+import json
+import re
+from urllib.parse import urljoin, urldefrag, urlencode, urlsplit, unquote_to_bytes
+from urllib.request import url2pathname, urlopen
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+from selenium.webdriver.remote import webelement
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import InvalidSelectorException
+from .simulated_dom import Element, parse_html, select, is_displayed, rendered_text, outer_html, inner_html, \
+    ancestors, BOOLEAN_ATTRIBUTES
+from . import simulated_xpath
+from . import scripts
+
+# Key of element references in W3C requests and responses
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+
+# 1x1 transparent PNG returned for screenshots
+BLANK_PNG = 'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII='
+
+# Unicode private-use characters Selenium sends for special keys (Keys.ENTER, Keys.RETURN, Keys.BACK_SPACE)
+_KEY_ENTER = ('\ue007', '\ue006')
+_KEY_BACKSPACE = '\ue003'
+_SPECIAL_KEYS = ('\ue000', '\ue0ff')
+_INPUT_TYPES_WITHOUT_TEXT = {'checkbox', 'radio', 'submit', 'reset', 'button', 'image', 'file', 'hidden'}
+_RECT = {'x': 0, 'y': 0, 'width': 0, 'height': 0}
+
+
+class SimulatedError(Exception):
+    """A WebDriver error, returned to the client as a W3C error response."""
+
+    def __init__(self, error: str, message: str):
+        super().__init__(message)
+        self.error = error
+        self.message = message
+
+
+class _HistoryEntry:
+
+    def __init__(self, url: str, method: str = 'get', data: list = None, document=None):
+        self.url = url
+        self.method = method
+        self.data = data
+        self.document = document
+
+
+# SECTION: element state, with the semantics of Selenium's atoms and vorpal's scripts
+
+def is_selected(element: Element) -> bool:
+    if element.tag == 'option':
+        select_element = next((ancestor for ancestor in ancestors(element) if ancestor.tag == 'select'), None)
+        return element in select_element.selected_options if select_element is not None else element.selected
+    return element.tag == 'input' and element.input_type in ('checkbox', 'radio') and element.checked
+
+
+def inner_text(element: Element) -> str:
+    return rendered_text(element) if is_displayed(element) else ' '.join(element.text_content.split())
+
+
+_MISSING = object()
+
+
+def property_of(element: Element, name: str, base_url: str):
+    """JavaScript property of the element, or _MISSING for properties the simulation doesn't model."""
+    if name == 'value' and element.tag in ('input', 'textarea', 'select', 'option', 'button'):
+        return element.value
+    if name == 'checked' and element.tag == 'input':
+        return element.checked
+    if name == 'selected' and element.tag == 'option':
+        return is_selected(element)
+    if name == 'disabled' and element.tag in ('button', 'input', 'select', 'textarea', 'option', 'fieldset'):
+        return 'disabled' in element.attributes
+    if name in ('href', 'src', 'action') and name in element.attributes:
+        return urljoin(base_url, element.attributes[name])
+    if name in ('innerText', 'outerText'):
+        return inner_text(element)
+    if name == 'textContent':
+        return element.text_content
+    if name == 'innerHTML':
+        return inner_html(element)
+    if name == 'outerHTML':
+        return outer_html(element)
+    if name in ('tagName', 'nodeName'):
+        return element.tag.upper()
+    if name == 'className':
+        return element.attributes.get('class', '')
+    if name in ('id', 'title', 'lang', 'dir'):
+        return element.attributes.get(name, '')
+    if name == 'type' and element.tag in ('input', 'button'):
+        return element.input_type if element.tag == 'input' else element.attributes.get('type', 'submit').lower()
+    if name == 'name' and element.tag in ('input', 'button', 'select', 'textarea', 'form', 'a', 'iframe'):
+        return element.attributes.get('name', '')
+    return _MISSING
+
+
+def attribute_of(element: Element, name: str, base_url: str) -> str:
+    """WebElement.get_attribute(): Selenium's getAttribute atom, property first and booleans as 'true' or None."""
+    lowered = name.lower()
+    if lowered == 'style':
+        return element.attributes.get('style')
+    if lowered in ('selected', 'checked'):
+        return 'true' if is_selected(element) else None
+    if lowered in BOOLEAN_ATTRIBUTES:
+        return 'true' if lowered in element.attributes else None
+    value = property_of(element, 'className' if lowered == 'class' else name, base_url)
+    if value is not _MISSING and value is not None:
+        return _js_string(value)
+    return element.attributes.get(lowered)
+
+
+def script_attribute_of(element: Element, name: str, base_url: str) -> str:
+    """attributeOf() from scripts.py: property when it is a primitive, otherwise the attribute."""
+    value = property_of(element, name, base_url)
+    if value is _MISSING:
+        value = element.attributes.get(name.lower())
+    return None if value is None else _js_string(value)
+
+
+def _js_string(value) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def display_text(element: Element) -> str:
+    """displayText() from scripts.py."""
+    text = element.value if element.tag == 'input' else (inner_text(element) if is_displayed(element) else '')
+    return (text or inner_text(element) or '').strip()
+
+
+def snapshot(element: Element, names: list, base_url: str) -> dict:
+    """snapshot() from scripts.py."""
+    displayed = is_displayed(element)
+    value = element.value
+    return {
+        'tag_name': element.tag,
+        'text': inner_text(element) if displayed else '',
+        'value': None if value is None else str(value),
+        'inner_text': inner_text(element),
+        'is_displayed': displayed,
+        'is_enabled': not element.is_disabled,
+        'is_selected': element.checked if element.tag == 'input' else is_selected(element),
+        'rect': dict(_RECT),
+        'attributes': {name: script_attribute_of(element, name, base_url) for name in names},
+    }
+
+
+def find_all(root, by: str, value: str) -> list:
+    """
+    Elements under root (a Document or Element) matching a Selenium locator, in document order.
+    :raises InvalidSelectorException: for malformed selectors or unknown strategies
+    """
+    if by == By.CSS_SELECTOR:
+        return select(root, value)
+    if by == By.XPATH:
+        return simulated_xpath.select(root, value)
+    if by == By.ID:
+        return [element for element in root.iter() if element.attributes.get('id') == value]
+    if by == By.NAME:
+        return [element for element in root.iter() if element.attributes.get('name') == value]
+    if by == By.CLASS_NAME:
+        return [element for element in root.iter() if value in element.classes]
+    if by == By.TAG_NAME:
+        return [element for element in root.iter() if element.tag == value.lower()]
+    if by in (By.LINK_TEXT, By.PARTIAL_LINK_TEXT):
+        links = (element for element in root.iter() if element.tag == 'a')
+        if by == By.LINK_TEXT:
+            return [link for link in links if inner_text(link).strip() == value]
+        return [link for link in links if value in inner_text(link)]
+    raise InvalidSelectorException(f"Unsupported locator strategy {by!r}")
+
+
+# SECTION: scripts the simulated browser can run, keyed by their exact source
+
+def _wait_for_element(browser, by, locator, state, expected, timeout):
+    # The DOM only changes through commands, so whatever is true now stays true for the whole timeout
+    found = next(iter(find_all(browser.document, by, locator)), None)
+    if state == 'present':
+        result = found
+    elif state == 'visible':
+        result = found if found is not None and is_displayed(found) else None
+    elif state == 'clickable':
+        result = found if found is not None and is_displayed(found) and not found.is_disabled else None
+    elif state == 'invisible':
+        if found is None or not is_displayed(found):
+            return {'status': 'ok', 'element': None}
+        result = None
+    elif state == 'text':
+        result = found if found is not None and expected in display_text(found) else None
+    elif state == 'attribute':
+        result = found if found is not None and found.attributes.get(expected[0]) == expected[1] else None
+    else:
+        result = None
+    return {'status': 'ok', 'element': result} if result is not None else {'status': 'timeout'}
+
+
+def _navigate(browser, url, marker):
+    browser.document.window['__vorpalNavigation'] = marker
+    browser.navigate(url)
+
+
+def _prefetch(browser, specs):
+    handles = []
+    for by, locator, nth in specs:
+        try:
+            matches = find_all(browser.document, by, locator)
+        except InvalidSelectorException:
+            matches = []
+        handles.append(matches[nth - 1] if len(matches) >= nth else None)
+    return handles
+
+
+def _fill_control(browser, element, value):
+    """fill() from scripts.FILL_FORM."""
+    if element.is_disabled:
+        return 'disabled'
+    if element.tag == 'select':
+        wanted = [str(item) for item in (value if isinstance(value, list) else [value])]
+        if 'multiple' not in element.attributes and len(wanted) != 1:
+            return 'a single select takes one value'
+        chosen = []
+        for item in wanted:
+            match = next((option for option in element.options if option.value == item), None) or next(
+                (option for option in element.options if option.text_content.strip() == item), None)
+            if match is None:
+                return f'no option {json.dumps(item)}'
+            chosen.append(match)
+        for option in element.options:
+            option.selected = any(option is match for match in chosen)
+        return None
+    if element.tag == 'input' and element.input_type in ('checkbox', 'radio'):
+        target = element
+        if element.input_type == 'radio' and isinstance(value, str):
+            scope = element.form or browser.document
+            target = next((other for other in scope.iter() if other.tag == 'input' and other.input_type == 'radio'
+                           and other.attributes.get('name') == element.attributes.get('name')
+                           and other.value == value), None)
+            if target is None:
+                return f'no radio button with value {json.dumps(value)}'
+            value = True
+        if target.checked != bool(value):
+            if target.input_type == 'radio' and not value:
+                return 'a radio button cannot be unchecked'
+            browser.activate(target)
+        return None
+    if element.tag == 'input' and element.input_type == 'file':
+        return scripts.FILL_NEEDS_KEYSTROKES
+    if element.tag == 'textarea' or (element.tag == 'input' and
+                                     element.input_type not in ('button', 'submit', 'reset', 'image')):
+        if 'readonly' in element.attributes:
+            return 'read-only'
+        element.value = '' if value is None else _js_string(value)
+        return None
+    input_type = f' type={element.input_type}' if element.input_type else ''
+    return f'cannot fill <{element.tag}{input_type}>'
+
+
+def _fill_form(browser, fields):
+    results = []
+    for handle, by, locator, nth, value in fields:
+        element = handle
+        if element is None:
+            try:
+                matches = find_all(browser.document, by, locator)
+            except InvalidSelectorException as error:
+                results.append([error.msg, None])
+                continue
+            element = matches[nth - 1] if len(matches) >= nth else None
+        results.append([_fill_control(browser, element, value), element] if element is not None
+                       else ['not found', None])
+    return results
+
+
+def _set_attribute(element, name, value):
+    if value is None:
+        element.attributes.pop(name, None)
+    else:
+        element.attributes[name] = _js_string(value)
+
+
+# ACTIONS from scripts.RUN_ACTIONS: there is no viewport or focus, and pages have no event listeners
+_ACTIONS = {
+    'click': lambda browser, element: browser.activate(element),
+    'scroll_into_view': lambda browser, element, block: None,
+    'focus': lambda browser, element: element.tag in ('input', 'select', 'textarea', 'button', 'a')
+        and not element.is_disabled,
+    'set_attribute': lambda browser, element, name, value: _set_attribute(element, name, value),
+    'dispatch_event': lambda browser, element, event_type, detail: True,
+}
+
+
+def _run_actions(browser, actions):
+    results = []
+    for action, target, arguments in actions:
+        element = target
+        try:
+            if isinstance(target, list):
+                matches = find_all(browser.document, *target[:2])
+                element = matches[target[2] - 1] if len(matches) >= target[2] else None
+            if element is None:
+                results.append(['not found', None, None])
+                continue
+            results.append([None, _ACTIONS[action](browser, element, *arguments), element])
+        except InvalidSelectorException as error:
+            results.append([error.msg, None, None])
+    return results
+
+
+def _submit(browser, form):
+    browser.submit_form(form)
+
+
+SCRIPTS = {
+    scripts.SNAPSHOT_ELEMENT: lambda browser, element, names=None:
+        snapshot(element, names or [], browser.current_url),
+    scripts.SNAPSHOT_ELEMENTS: lambda browser, elements, names=None:
+        [snapshot(element, names or [], browser.current_url) for element in elements],
+    scripts.COLLECTION_TEXTS: lambda browser, elements: [display_text(element) for element in elements],
+    scripts.COLLECTION_ATTRIBUTES: lambda browser, elements, name:
+        [script_attribute_of(element, name, browser.current_url) for element in elements],
+    scripts.COLLECTION_DISPLAYED: lambda browser, elements: [is_displayed(element) for element in elements],
+    scripts.COLLECTION_RECTS: lambda browser, elements: [dict(_RECT) for _ in elements],
+    scripts.PREFETCH_ELEMENTS: _prefetch,
+    scripts.NAVIGATE: _navigate,
+    scripts.LEFT_DOCUMENT: lambda browser, marker: browser.document.window.get('__vorpalNavigation') != marker,
+    scripts.WAIT_FOR_ELEMENT: _wait_for_element,
+    scripts.FILL_FORM: _fill_form,
+    scripts.RUN_ACTIONS: _run_actions,
+    # Scripts Selenium's WebElement runs for get_attribute(), is_displayed(), submit() and get_property()
+    "return (%s).apply(null, arguments);" % webelement.getAttribute_js:
+        lambda browser, element, name: attribute_of(element, name, browser.current_url),
+    "return (%s).apply(null, arguments);" % webelement.isDisplayed_js: lambda browser, element: is_displayed(element),
+    "var e = arguments[0].ownerDocument.createEvent('Event');"
+    "e.initEvent('submit', true, true);"
+    "if (arguments[0].dispatchEvent(e)) { arguments[0].submit() }": _submit,
+    'return arguments[0][arguments[1]]': lambda browser, element, name:
+        None if property_of(element, name, browser.current_url) is _MISSING
+        else property_of(element, name, browser.current_url),
+    'return document.readyState': lambda browser: 'complete',
+    'return document.readyState;': lambda browser: 'complete',
+}
+
+
+# (regular expression, handler receiving the match groups) for scripts generated with varying source
+SCRIPT_PATTERNS = [
+    (re.compile(r'^window\.scroll(?:By|To)\([^)]*\);?$'), lambda browser: None),
+]
+
+
+class SimulatedBrowser:
+    """
+    Command executor playing the remote end of a SimulatedWebDriver session.
+    Keeps the current document, history, cookies and window state in memory and answers WebDriver commands
+    with W3C responses, so everything above it (Selenium's client, instrumentation) works unchanged.
+    """
+
+    def __init__(self, pages: dict = None, fetch: bool = False):
+        """
+        :param pages: (optional) {url: html} served instead of the network. A value may also be a function
+            (method, url, form_data) -> html, called for each load of that URL.
+        :param fetch: (optional) load http(s) URLs missing from pages over the network
+        """
+        self.pages = dict(pages or {})
+        self.fetch = fetch
+        self.scripts = dict(SCRIPTS)
+        self.script_patterns = list(SCRIPT_PATTERNS)
+        self.w3c = True
+        self.document = parse_html('', 'about:blank')
+        self.history = [_HistoryEntry('about:blank', document=self.document)]
+        self.history_index = 0
+        self.cookies = {}
+        self.timeouts = {'implicit': 0, 'pageLoad': 300000, 'script': 30000}
+        self.window_rect = {'x': 0, 'y': 0, 'width': 1920, 'height': 1080}
+        self.window_handles = ['simulated-window']
+        self.closed = False
+        self._elements = {}
+        self._element_ids = {}
+        self._retired = set()
+        self._next_id = 0
+
+    # SECTION: documents
+
+    @property
+    def current_url(self) -> str:
+        return self.document.url
+
+    def load(self, url: str, method: str = 'get', data: list = None) -> str:
+        """
+        Markup for a URL: a registered page, a file:, data: or about:blank URL, or (with fetch) the network.
+        :raises SimulatedError: if nothing serves the URL
+        """
+        page_url = urldefrag(url)[0]
+        for key in (url, page_url, page_url.split('?')[0]):
+            if key in self.pages:
+                page = self.pages[key]
+                return page(method, url, data) if callable(page) else page
+        scheme = urlsplit(url).scheme
+        if scheme == 'file':
+            with open(url2pathname(urlsplit(page_url).path), encoding='utf-8') as page_file:
+                return page_file.read()
+        if scheme == 'data':
+            header, _, payload = page_url[5:].partition(',')
+            content = unquote_to_bytes(payload)
+            return (base64.b64decode(content) if header.endswith(';base64') else content).decode('utf-8')
+        if page_url == 'about:blank':
+            return ''
+        if self.fetch and scheme in ('http', 'https'):
+            body = urlencode(data or []).encode() if method == 'post' else None
+            with urlopen(page_url, data=body) as response:
+                return response.read().decode(response.headers.get_content_charset() or 'utf-8')
+        raise SimulatedError('unknown error', f"net::ERR_NAME_NOT_RESOLVED: no simulated page for {url}")
+
+    def show(self, entry: _HistoryEntry) -> None:
+        """Make the entry's document current, parsing it again unless it is the document already shown."""
+        if entry.document is None or entry.document is not self.document:
+            entry.document = parse_html(self.load(entry.url, entry.method, entry.data), entry.url)
+        self._retire_elements()
+        self.document = entry.document
+
+    def navigate(self, url: str, method: str = 'get', data: list = None) -> None:
+        """Load a URL (relative to the current one) as a new history entry."""
+        url = urljoin(self.current_url, url) if self.current_url != 'about:blank' else url
+        fragment_only = method == 'get' and '#' in url and urldefrag(url)[0] == urldefrag(self.current_url)[0]
+        entry = _HistoryEntry(url, method, data)
+        if fragment_only:
+            self.document.url = url
+            entry.document = self.document
+        else:
+            self.show(entry)
+        del self.history[self.history_index + 1:]
+        self.history.append(entry)
+        self.history_index = len(self.history) - 1
+
+    def traverse(self, delta: int) -> None:
+        index = self.history_index + delta
+        if 0 <= index < len(self.history):
+            self.history_index = index
+            entry = self.history[index]
+            self.show(entry)
+            self.document.url = entry.url
+
+    def _retire_elements(self) -> None:
+        self._retired.update(self._elements)
+        self._elements.clear()
+        self._element_ids.clear()
+
+    # SECTION: element references
+
+    def reference(self, element: Element) -> dict:
+        element_id = self._element_ids.get(id(element))
+        if element_id is None:
+            self._next_id += 1
+            element_id = f'simulated-{self._next_id}'
+            self._element_ids[id(element)] = element_id
+            self._elements[element_id] = element
+        return {ELEMENT_KEY: element_id}
+
+    def element(self, element_id: str) -> Element:
+        if element_id in self._elements:
+            return self._elements[element_id]
+        if element_id in self._retired:
+            raise SimulatedError('stale element reference',
+                                 'stale element reference: element is not attached to the page document')
+        raise SimulatedError('no such element', f"No element with reference {element_id}")
+
+    def serialize(self, value):
+        if isinstance(value, Element):
+            return self.reference(value)
+        if isinstance(value, (list, tuple)):
+            return [self.serialize(item) for item in value]
+        if isinstance(value, dict):
+            return {key: self.serialize(item) for key, item in value.items()}
+        return value
+
+    def deserialize(self, value):
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value or 'ELEMENT' in value:
+                return self.element(value.get(ELEMENT_KEY) or value['ELEMENT'])
+            return {key: self.deserialize(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.deserialize(item) for item in value]
+        return value
+
+    # SECTION: interaction
+
+    def activate(self, element: Element) -> None:
+        """Default action of a click: follow links, toggle checkboxes, select options, submit forms."""
+        if element.is_disabled:
+            return
+        link = next((node for node in [element] + list(ancestors(element))
+                     if node.tag in ('a', 'area') and 'href' in node.attributes), None)
+        if element.tag == 'label':
+            target = (self._by_id(element.attributes['for']) if 'for' in element.attributes else
+                      next((node for node in element.iter() if node.tag in ('input', 'select', 'textarea')), None))
+            if target is not None:
+                self.activate(target)
+        elif element.tag == 'input' and element.input_type == 'checkbox':
+            element.checked = not element.checked
+        elif element.tag == 'input' and element.input_type == 'radio':
+            self._check_radio(element)
+        elif element.tag == 'option':
+            self._select_option(element)
+        elif (element.tag == 'button' and element.attributes.get('type', 'submit').lower() == 'submit') or (
+                element.tag == 'input' and element.input_type in ('submit', 'image')):
+            if element.form is not None:
+                self.submit_form(element.form, element)
+        elif (element.tag == 'button' and element.attributes.get('type', '').lower() == 'reset') or (
+                element.tag == 'input' and element.input_type == 'reset'):
+            if element.form is not None:
+                self.reset_form(element.form)
+        elif link is not None and not link.attributes['href'].lower().startswith('javascript:'):
+            self.navigate(link.attributes['href'])
+
+    def _by_id(self, element_id: str) -> Element:
+        return next((element for element in self.document.iter() if element.attributes.get('id') == element_id), None)
+
+    def _check_radio(self, radio: Element) -> None:
+        name = radio.attributes.get('name')
+        scope = radio.form or self.document
+        if name:
+            for other in scope.iter():
+                if other.tag == 'input' and other.input_type == 'radio' and other.attributes.get('name') == name:
+                    other.checked = False
+        radio.checked = True
+
+    def _select_option(self, option: Element) -> None:
+        select_element = next((ancestor for ancestor in ancestors(option) if ancestor.tag == 'select'), None)
+        if select_element is not None and 'multiple' in select_element.attributes:
+            option.selected = not option.selected
+            return
+        if select_element is not None:
+            for other in select_element.options:
+                other.selected = False
+        option.selected = True
+
+    def type_text(self, element: Element, text: str) -> None:
+        """send_keys(): append text to a text control; Enter submits its form, Backspace deletes."""
+        if element.tag == 'input' and element.input_type == 'file':
+            element.value = text
+            return
+        typing = (element.tag == 'input' and element.input_type not in _INPUT_TYPES_WITHOUT_TEXT) or \
+            element.tag == 'textarea'
+        for character in text:
+            if character in _KEY_ENTER:
+                if element.tag == 'textarea':
+                    element.value = element.value + '\n'
+                elif element.form is not None:
+                    self.submit_form(element.form)
+                    return
+            elif character == _KEY_BACKSPACE:
+                if typing:
+                    element.value = element.value[:-1]
+            elif _SPECIAL_KEYS[0] <= character <= _SPECIAL_KEYS[1]:
+                continue
+            elif typing and 'readonly' not in element.attributes:
+                maximum = element.attributes.get('maxlength', '')
+                if not maximum.isdigit() or len(element.value) < int(maximum):
+                    element.value = element.value + character
+            elif element.tag == 'select':
+                option = next((option for option in element.options
+                               if ' '.join(option.text_content.split()).lower().startswith(character.lower())), None)
+                if option is not None:
+                    self._select_option(option)
+
+    @staticmethod
+    def form_data(form: Element, submitter: Element = None) -> list:
+        """Successful controls of a form as (name, value) pairs, in document order."""
+        data = []
+        for control in form.iter():
+            name = control.attributes.get('name')
+            if not name or control.is_disabled:
+                continue
+            if control.tag == 'input':
+                if control.input_type in ('checkbox', 'radio'):
+                    if control.checked:
+                        data.append((name, control.value))
+                elif control.input_type in ('submit', 'image', 'button', 'reset'):
+                    if control is submitter:
+                        data.append((name, control.value))
+                else:
+                    data.append((name, control.value))
+            elif control.tag == 'button':
+                if control is submitter:
+                    data.append((name, control.attributes.get('value', '')))
+            elif control.tag == 'select':
+                data.extend((name, option.value) for option in control.selected_options)
+            elif control.tag == 'textarea':
+                data.append((name, control.value))
+        return data
+
+    def submit_form(self, form: Element, submitter: Element = None) -> None:
+        """Submit a form: GET forms navigate to action?query, other methods load the action with the data."""
+        data = self.form_data(form, submitter)
+        action = urljoin(self.current_url, form.attributes.get('action') or self.current_url)
+        method = form.attributes.get('method', 'get').lower()
+        if method == 'get':
+            self.navigate(urldefrag(action)[0].split('?')[0] + '?' + urlencode(data))
+        else:
+            self.navigate(action, method, data)
+
+    @staticmethod
+    def reset_form(form: Element) -> None:
+        for control in form.iter():
+            control.value = None
+            control.checked = 'checked' in control.attributes
+            control.selected = 'selected' in control.attributes
+
+    def run_script(self, script: str, arguments: list):
+        handler = self.scripts.get(script)
+        if handler is not None:
+            return handler(self, *arguments)
+        for pattern, handler in self.script_patterns:
+            match = pattern.match(script.strip())
+            if match:
+                return handler(self, *match.groups(), *arguments)
+        raise SimulatedError('javascript error', "The simulated browser does not run arbitrary JavaScript; "
+                                                 f"register a handler for this script: {script[:80]!r}")
+
+    def _interactable(self, element: Element) -> Element:
+        if not is_displayed(element):
+            raise SimulatedError('element not interactable', 'element not interactable')
+        return element
+
+    # SECTION: WebDriver commands
+
+    def execute(self, command: str, params: dict) -> dict:
+        """
+        Run a WebDriver command.
+        :param command: Selenium Command name
+        :param params: command parameters, as sent to a remote end
+        :return: response dict, {'value': ...} or a W3C error response
+        """
+        try:
+            handler = self._COMMANDS.get(command)
+            if handler is None:
+                raise SimulatedError('unknown command', f"The simulated browser does not support {command}")
+            if self.closed and command not in (Command.NEW_SESSION, Command.QUIT):
+                raise SimulatedError('invalid session id', 'invalid session id')
+            return {'value': self.serialize(handler(self, params))}
+        except SimulatedError as error:
+            return self._error(error.error, error.message)
+        except InvalidSelectorException as error:
+            return self._error('invalid selector', error.msg)
+
+    @staticmethod
+    def _error(error: str, message: str) -> dict:
+        # Shaped like RemoteConnection's response to an HTTP error, so ErrorHandler raises the matching exception
+        return {'status': 500, 'value': json.dumps({'value': {'error': error, 'message': message,
+                                                              'stacktrace': ''}})}
+
+    def _find(self, params: dict, root=None) -> list:
+        root = self.element(params['id']) if root is None and 'id' in params else root or self.document
+        return find_all(root, params['using'], params['value'])
+
+    def _find_one(self, params: dict) -> Element:
+        found = self._find(params)
+        if not found:
+            raise SimulatedError('no such element', 'no such element: Unable to locate element: '
+                                                    f'{{"method":"{params["using"]}","selector":"{params["value"]}"}}')
+        return found[0]
+
+    def _cookie(self, params: dict) -> dict:
+        cookie = self.cookies.get(params['name'])
+        if cookie is None:
+            raise SimulatedError('no such cookie', f"no such cookie: {params['name']}")
+        return cookie
+
+    def _add_cookie(self, params: dict) -> None:
+        cookie = dict(params['cookie'])
+        cookie.setdefault('path', '/')
+        cookie.setdefault('domain', urlsplit(self.current_url).hostname or '')
+        cookie.setdefault('secure', False)
+        cookie.setdefault('httpOnly', False)
+        self.cookies[cookie['name']] = cookie
+
+    def _switch_to_window(self, params: dict) -> None:
+        if params.get('handle', params.get('name')) not in self.window_handles:
+            raise SimulatedError('no such window', 'no such window')
+
+    def _close(self, params: dict) -> list:
+        self.window_handles = []
+        self.closed = True
+        return []
+
+    def _set_timeouts(self, params: dict) -> None:
+        self.timeouts.update({key: params[key] for key in ('implicit', 'pageLoad', 'script') if key in params})
+
+    def _set_window_rect(self, params: dict) -> dict:
+        self.window_rect.update({key: params[key] for key in ('x', 'y', 'width', 'height')
+                                 if params.get(key) is not None})
+        return dict(self.window_rect)
+
+    def _click(self, params: dict) -> None:
+        self.activate(self._interactable(self.element(params['id'])))
+
+    def _clear(self, params: dict) -> None:
+        element = self._interactable(self.element(params['id']))
+        if element.tag in ('input', 'textarea') and 'readonly' not in element.attributes:
+            element.value = ''
+
+    def _send_keys(self, params: dict) -> None:
+        element = self.element(params['id'])
+        if not (element.tag == 'input' and element.input_type == 'file'):
+            self._interactable(element)
+        self.type_text(element, params.get('text') or ''.join(params.get('value', [])))
+
+    def _text(self, params: dict) -> str:
+        element = self.element(params['id'])
+        return rendered_text(element) if is_displayed(element) else ''
+
+    def _property(self, params: dict):
+        value = property_of(self.element(params['id']), params['name'], self.current_url)
+        return None if value is _MISSING else value
+
+    def _rect(self, params: dict) -> dict:
+        self.element(params['id'])
+        return dict(_RECT)
+
+    def _delete_cookie(self, params: dict) -> None:
+        self.cookies.pop(params['name'], None)
+
+    def _switch_to_frame(self, params: dict) -> None:
+        if params.get('id') is not None:
+            raise SimulatedError('no such frame', 'frames are not simulated')
+
+    def _no_alert(self, params: dict) -> None:
+        raise SimulatedError('no such alert', 'no such alert')
+
+    def _css_value(self, params: dict) -> str:
+        element = self.element(params['id'])
+        name = params['propertyName'].lower()
+        if name == 'display':
+            return element.style.get('display', 'block' if element.tag in ('div', 'p', 'form', 'ul', 'li') else
+                                     'inline')
+        if name == 'visibility':
+            return 'visible' if is_displayed(element) else element.style.get('visibility', 'hidden')
+        return element.style.get(name, '')
+
+    _COMMANDS = {
+        Command.NEW_SESSION: lambda self, params: {'sessionId': 'simulated', 'capabilities': {
+            'browserName': 'simulated', 'browserVersion': '1', 'platformName': 'any',
+            'pageLoadStrategy': 'normal', 'acceptInsecureCerts': False}},
+        Command.QUIT: lambda self, params: self._close(params),
+        Command.CLOSE: lambda self, params: self._close(params),
+        Command.GET: lambda self, params: self.navigate(params['url']),
+        Command.GO_BACK: lambda self, params: self.traverse(-1),
+        Command.GO_FORWARD: lambda self, params: self.traverse(1),
+        Command.REFRESH: lambda self, params: self.show(_HistoryEntry(
+            self.current_url, self.history[self.history_index].method, self.history[self.history_index].data)),
+        Command.GET_CURRENT_URL: lambda self, params: self.current_url,
+        Command.GET_TITLE: lambda self, params: self.document.title,
+        Command.GET_PAGE_SOURCE: lambda self, params: outer_html(self.document),
+        Command.W3C_GET_CURRENT_WINDOW_HANDLE: lambda self, params: self.window_handles[0],
+        Command.W3C_GET_WINDOW_HANDLES: lambda self, params: list(self.window_handles),
+        Command.SWITCH_TO_WINDOW: lambda self, params: self._switch_to_window(params),
+        Command.SWITCH_TO_FRAME: lambda self, params: self._switch_to_frame(params),
+        Command.SWITCH_TO_PARENT_FRAME: lambda self, params: None,
+        Command.FIND_ELEMENT: lambda self, params: self._find_one(params),
+        Command.FIND_ELEMENTS: lambda self, params: self._find(params),
+        Command.FIND_CHILD_ELEMENT: lambda self, params: self._find_one(params),
+        Command.FIND_CHILD_ELEMENTS: lambda self, params: self._find(params),
+        Command.W3C_GET_ACTIVE_ELEMENT: lambda self, params: next(
+            (element for element in self.document.iter() if element.tag == 'body'), None),
+        Command.W3C_EXECUTE_SCRIPT: lambda self, params: self.run_script(
+            params['script'], self.deserialize(params.get('args', []))),
+        Command.W3C_EXECUTE_SCRIPT_ASYNC: lambda self, params: self.run_script(
+            params['script'], self.deserialize(params.get('args', []))),
+        Command.CLICK_ELEMENT: lambda self, params: self._click(params),
+        Command.CLEAR_ELEMENT: lambda self, params: self._clear(params),
+        Command.SEND_KEYS_TO_ELEMENT: lambda self, params: self._send_keys(params),
+        Command.GET_ELEMENT_TEXT: lambda self, params: self._text(params),
+        Command.GET_ELEMENT_TAG_NAME: lambda self, params: self.element(params['id']).tag,
+        Command.GET_ELEMENT_PROPERTY: lambda self, params: self._property(params),
+        Command.GET_ELEMENT_ATTRIBUTE: lambda self, params: attribute_of(
+            self.element(params['id']), params['name'], self.current_url),
+        Command.GET_ELEMENT_VALUE_OF_CSS_PROPERTY: lambda self, params: self._css_value(params),
+        Command.IS_ELEMENT_SELECTED: lambda self, params: is_selected(self.element(params['id'])),
+        Command.IS_ELEMENT_ENABLED: lambda self, params: not self.element(params['id']).is_disabled,
+        Command.IS_ELEMENT_DISPLAYED: lambda self, params: is_displayed(self.element(params['id'])),
+        Command.GET_ELEMENT_RECT: lambda self, params: self._rect(params),
+        Command.ELEMENT_SCREENSHOT: lambda self, params: self._rect(params) and BLANK_PNG,
+        Command.SCREENSHOT: lambda self, params: BLANK_PNG,
+        Command.GET_ALL_COOKIES: lambda self, params: list(self.cookies.values()),
+        Command.GET_COOKIE: lambda self, params: self._cookie(params),
+        Command.ADD_COOKIE: lambda self, params: self._add_cookie(params),
+        Command.DELETE_COOKIE: lambda self, params: self._delete_cookie(params),
+        Command.DELETE_ALL_COOKIES: lambda self, params: self.cookies.clear(),
+        Command.SET_TIMEOUTS: lambda self, params: self._set_timeouts(params),
+        Command.GET_WINDOW_RECT: lambda self, params: dict(self.window_rect),
+        Command.SET_WINDOW_RECT: lambda self, params: self._set_window_rect(params),
+        Command.W3C_MAXIMIZE_WINDOW: lambda self, params: dict(self.window_rect),
+        Command.FULLSCREEN_WINDOW: lambda self, params: dict(self.window_rect),
+        Command.MINIMIZE_WINDOW: lambda self, params: dict(self.window_rect),
+        Command.W3C_ACTIONS: lambda self, params: None,
+        Command.W3C_CLEAR_ACTIONS: lambda self, params: None,
+        Command.W3C_GET_ALERT_TEXT: lambda self, params: self._no_alert(params),
+        Command.W3C_ACCEPT_ALERT: lambda self, params: self._no_alert(params),
+        Command.W3C_DISMISS_ALERT: lambda self, params: self._no_alert(params),
+    }
+
+
+class SimulatedWebDriver(RemoteWebDriver):
+    """
+    Selenium WebDriver backed by a SimulatedBrowser instead of a browser process.
+    HTML is parsed in Python; CSS selectors, XPath, id, name, class, tag and link-text lookups, clicks on links,
+    checkboxes, radios, options and submit buttons, typing, form submission, history and cookies are simulated.
+    JavaScript in pages is not run, there is no layout (every rect is zero) and only vorpal's own scripts
+    (plus any registered with register_script()) can be executed.
+
+    driver = CustomSeleniumDriver(SimulatedWebDriver({'http://app/login': '<form>...</form>'}))
+    """
+
+    def __init__(self, pages: dict = None, fetch: bool = False, desired_capabilities: dict = None):
+        """
+        :param pages: (optional) {url: html or function(method, url, form_data) -> html} served by the browser
+        :param fetch: (optional) load http(s) URLs missing from pages over the network
+        :param desired_capabilities: (optional) capabilities recorded for the session
+        """
+        capabilities = dict(desired_capabilities or {}, browserName='simulated')
+        super().__init__(command_executor=SimulatedBrowser(pages, fetch), desired_capabilities=capabilities)
+
+    @property
+    def browser(self) -> SimulatedBrowser:
+        """The simulated remote end, holding the current document, history and cookies."""
+        return self.command_executor
+
+    def add_page(self, url: str, html) -> None:
+        """
+        Serve html (or a function (method, url, form_data) -> html) at url.
+        :param url: absolute URL
+        :param html: markup or function
+        """
+        self.browser.pages[url] = html
+
+    def register_script(self, script: str, handler) -> None:
+        """
+        Simulate a script the application's page objects run with execute_script().
+        :param script: exact script source
+        :param handler: function(browser, *arguments) returning the script's result; element handles
+            arrive as simulated_dom.Element objects and Elements in the result are returned as WebElements
+        """
+        self.browser.scripts[script] = handler
+
+    def start_client(self):
+        pass
+
+    def stop_client(self):
+        pass
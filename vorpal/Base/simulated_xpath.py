@@ -0,0 +1,622 @@
+"""
+Module containing the XPath 1.0 evaluator of the simulated WebDriver.
+Supports location paths over all axes except namespace, predicates, unions, arithmetic and comparisons,
+and the core function library, which covers the locators page objects and Locator.xpath produce.
+"""
+import math
+import re
+from selenium.common.exceptions import InvalidSelectorException
+from .simulated_dom import Document, Element, Node, Text
+
+_TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<literal>"[^"]*"|'[^']*')
+      | (?P<number>\d+(?:\.\d*)?|\.\d+)
+      | (?P<operator>//|::|\.\.|!=|<=|>=|[/()\[\]@,|.=<>+*-])
+      | (?P<name>[A-Za-z_][-\w.]*(?::[A-Za-z_][-\w.]*)?)
+    )''', re.VERBOSE)
+
+_AXES = {'ancestor', 'ancestor-or-self', 'attribute', 'child', 'descendant', 'descendant-or-self', 'following',
+         'following-sibling', 'parent', 'preceding', 'preceding-sibling', 'self'}
+_REVERSE_AXES = {'ancestor', 'ancestor-or-self', 'preceding', 'preceding-sibling'}
+_NODE_TYPES = {'node', 'text', 'comment', 'processing-instruction'}
+# Tokens after which '*' is a name test and 'and', 'or', 'div', 'mod' are names rather than operators
+_OPERAND_EXPECTED = {None, '@', '::', '(', '[', ',', '/', '//', '|', '+', '-', '=', '!=', '<', '<=', '>', '>=',
+                     'and', 'or', 'div', 'mod', '*op'}
+
+
+class Attribute:
+    """Attribute node, created on demand by the attribute axis."""
+
+    def __init__(self, element: Element, name: str, value: str):
+        self.parent = element
+        self.name = name
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Attribute) and other.parent is self.parent and other.name == self.name
+
+    def __hash__(self):
+        return hash((id(self.parent), self.name))
+
+
+def _tokenize(expression: str) -> list:
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match:
+            raise _invalid(expression, f"unexpected character at {position}")
+        position = match.end()
+        previous = None if not tokens else tokens[-1][1] if tokens[-1][0] == 'operator' else 'operand'
+        if match.group('literal'):
+            tokens.append(('literal', match.group('literal')[1:-1]))
+        elif match.group('number'):
+            tokens.append(('number', float(match.group('number'))))
+        elif match.group('operator'):
+            operator = match.group('operator')
+            if operator == '*' and previous not in _OPERAND_EXPECTED:
+                operator = '*op'
+            tokens.append(('operator', operator))
+        else:
+            name = match.group('name')
+            if name in ('and', 'or', 'div', 'mod') and previous not in _OPERAND_EXPECTED:
+                tokens.append(('operator', name))
+            else:
+                tokens.append(('name', name))
+    return tokens
+
+
+def _invalid(expression: str, message: str) -> InvalidSelectorException:
+    return InvalidSelectorException(f"Invalid or unsupported XPath {expression!r}: {message}")
+
+
+# SECTION: node helpers
+
+def _root(node):
+    while node.parent is not None:
+        node = node.parent
+    return node
+
+
+def _children(node) -> list:
+    return node.children if isinstance(node, (Document, Element)) else []
+
+
+def _descendants(node):
+    for child in _children(node):
+        yield child
+        yield from _descendants(child)
+
+
+def _ancestors(node):
+    node = node.parent
+    while node is not None:
+        yield node
+        node = node.parent
+
+
+def _following_siblings(node) -> list:
+    if isinstance(node, Attribute) or node.parent is None:
+        return []
+    siblings = node.parent.children
+    return siblings[siblings.index(node) + 1:]
+
+
+def _preceding_siblings(node) -> list:
+    if isinstance(node, Attribute) or node.parent is None:
+        return []
+    siblings = node.parent.children
+    return list(reversed(siblings[:siblings.index(node)]))
+
+
+def _following(node):
+    if isinstance(node, Attribute):
+        node = node.parent
+        yield from _descendants(node)
+    while node is not None:
+        for sibling in _following_siblings(node):
+            yield sibling
+            yield from _descendants(sibling)
+        node = node.parent
+
+
+def _preceding(node):
+    if isinstance(node, Attribute):
+        node = node.parent
+    ancestors = set(map(id, _ancestors(node)))
+    found = [candidate for candidate in _descendants(_root(node)) if id(candidate) not in ancestors]
+    index = next((position for position, candidate in enumerate(found) if candidate is node), len(found))
+    return list(reversed(found[:index]))
+
+
+def _attributes(node) -> list:
+    if not isinstance(node, Element):
+        return []
+    return [Attribute(node, name, value) for name, value in node.attributes.items()]
+
+
+_AXIS_NODES = {
+    'child': _children,
+    'descendant': lambda node: list(_descendants(node)),
+    'descendant-or-self': lambda node: [node] + list(_descendants(node)),
+    'self': lambda node: [node],
+    'parent': lambda node: [node.parent] if node.parent is not None else [],
+    'ancestor': lambda node: list(_ancestors(node)),
+    'ancestor-or-self': lambda node: [node] + list(_ancestors(node)),
+    'following-sibling': _following_siblings,
+    'preceding-sibling': _preceding_siblings,
+    'following': lambda node: list(_following(node)),
+    'preceding': _preceding,
+    'attribute': _attributes,
+}
+
+
+def _order_key(node) -> tuple:
+    """Sort key giving document order; attributes sort after their element and before its children."""
+    if isinstance(node, Attribute):
+        names = list(node.parent.attributes)
+        return _order_key(node.parent) + (-1, names.index(node.name) if node.name in names else 0)
+    key = []
+    while node.parent is not None:
+        key.append(node.parent.children.index(node))
+        node = node.parent
+    return tuple(reversed(key))
+
+
+def _document_order(nodes) -> list:
+    unique = {}
+    for node in nodes:
+        unique.setdefault(node if isinstance(node, Attribute) else id(node), node)
+    return sorted(unique.values(), key=_order_key)
+
+
+# SECTION: values
+
+def string_value(node) -> str:
+    if isinstance(node, Attribute):
+        return node.value
+    if isinstance(node, Text):
+        return node.data
+    return node.text_content
+
+
+def _to_string(value) -> str:
+    if isinstance(value, list):
+        return string_value(value[0]) if value else ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return 'Infinity' if value > 0 else '-Infinity'
+        return str(int(value)) if value == int(value) else repr(value)
+    return value
+
+
+def _to_number(value) -> float:
+    if isinstance(value, float):
+        return value
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    try:
+        return float(_to_string(value).strip())
+    except ValueError:
+        return math.nan
+
+
+def _to_boolean(value) -> bool:
+    if isinstance(value, list):
+        return bool(value)
+    if isinstance(value, float):
+        return value != 0 and not math.isnan(value)
+    return bool(value)
+
+
+_RELATIONS = {'=': lambda a, b: a == b, '!=': lambda a, b: a != b, '<': lambda a, b: a < b,
+              '<=': lambda a, b: a <= b, '>': lambda a, b: a > b, '>=': lambda a, b: a >= b}
+
+
+def _compare(operator: str, left, right) -> bool:
+    relation = _RELATIONS[operator]
+    if isinstance(left, list) and isinstance(right, list):
+        right_values = [string_value(node) for node in right]
+        if operator in ('=', '!='):
+            return any(relation(string_value(node), value) for node in left for value in right_values)
+        return any(relation(_to_number(string_value(node)), _to_number(value))
+                   for node in left for value in right_values)
+    if isinstance(left, list) or isinstance(right, list):
+        nodes, other, swapped = (left, right, False) if isinstance(left, list) else (right, left, True)
+        if isinstance(other, bool):
+            return _compare(operator, bool(nodes), other) if not swapped else _compare(operator, other, bool(nodes))
+        for node in nodes:
+            value = string_value(node)
+            if isinstance(other, float) or operator not in ('=', '!='):
+                value, compared = _to_number(value), _to_number(other)
+            else:
+                compared = other
+            if relation(compared, value) if swapped else relation(value, compared):
+                return True
+        return False
+    if operator in ('=', '!='):
+        if isinstance(left, bool) or isinstance(right, bool):
+            return relation(_to_boolean(left), _to_boolean(right))
+        if isinstance(left, float) or isinstance(right, float):
+            return relation(_to_number(left), _to_number(right))
+        return relation(_to_string(left), _to_string(right))
+    return relation(_to_number(left), _to_number(right))
+
+
+class _Context:
+    __slots__ = ('node', 'position', 'size')
+
+    def __init__(self, node, position: int = 1, size: int = 1):
+        self.node = node
+        self.position = position
+        self.size = size
+
+
+def _round(value: float) -> float:
+    if math.isnan(value) or math.isinf(value):
+        return value
+    return float(math.floor(value + 0.5))
+
+
+def _substring(value, start, length=None) -> str:
+    value = _to_string(value)
+    first = _round(_to_number(start))
+    last = first + _round(_to_number(length)) if length is not None else math.inf
+    return ''.join(character for index, character in enumerate(value, 1) if first <= index < last)
+
+
+def _translate(value, source, target) -> str:
+    value, source, target = _to_string(value), _to_string(source), _to_string(target)
+    mapping = {}
+    for index, character in enumerate(source):
+        mapping.setdefault(character, target[index] if index < len(target) else None)
+    return ''.join(mapping.get(character, character) or '' for character in value)
+
+
+def _node_name(context, nodes=None) -> str:
+    node = nodes[0] if nodes else (context.node if nodes is None else None)
+    if isinstance(node, Element):
+        return node.tag
+    if isinstance(node, Attribute):
+        return node.name
+    return ''
+
+
+# name: (minimum arguments, maximum arguments, function(context, *values))
+_FUNCTIONS = {
+    'last': (0, 0, lambda context: float(context.size)),
+    'position': (0, 0, lambda context: float(context.position)),
+    'count': (1, 1, lambda context, nodes: float(len(nodes))),
+    'name': (0, 1, _node_name),
+    'local-name': (0, 1, _node_name),
+    'string': (0, 1, lambda context, value=None: _to_string([context.node] if value is None else value)),
+    'concat': (2, None, lambda context, *values: ''.join(_to_string(value) for value in values)),
+    'starts-with': (2, 2, lambda context, value, prefix: _to_string(value).startswith(_to_string(prefix))),
+    'contains': (2, 2, lambda context, value, part: _to_string(part) in _to_string(value)),
+    'substring-before': (2, 2, lambda context, value, part: _to_string(value).partition(_to_string(part))[0]
+                         if _to_string(part) in _to_string(value) else ''),
+    'substring-after': (2, 2, lambda context, value, part: _to_string(value).partition(_to_string(part))[2]
+                        if _to_string(part) in _to_string(value) else ''),
+    'substring': (2, 3, lambda context, *values: _substring(*values)),
+    'string-length': (0, 1, lambda context, value=None:
+                      float(len(_to_string([context.node] if value is None else value)))),
+    'normalize-space': (0, 1, lambda context, value=None:
+                        ' '.join(_to_string([context.node] if value is None else value).split())),
+    'translate': (3, 3, lambda context, *values: _translate(*values)),
+    'boolean': (1, 1, lambda context, value: _to_boolean(value)),
+    'not': (1, 1, lambda context, value: not _to_boolean(value)),
+    'true': (0, 0, lambda context: True),
+    'false': (0, 0, lambda context: False),
+    'number': (0, 1, lambda context, value=None: _to_number([context.node] if value is None else value)),
+    'sum': (1, 1, lambda context, nodes: float(sum(_to_number(string_value(node)) for node in nodes))),
+    'floor': (1, 1, lambda context, value: float(math.floor(_to_number(value)))
+              if math.isfinite(_to_number(value)) else _to_number(value)),
+    'ceiling': (1, 1, lambda context, value: float(math.ceil(_to_number(value)))
+                if math.isfinite(_to_number(value)) else _to_number(value)),
+    'round': (1, 1, lambda context, value: _round(_to_number(value))),
+}
+
+
+# SECTION: parser producing closures context -> value
+
+class _Parser:
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tokens = _tokenize(expression)
+        self.position = 0
+
+    def error(self, message: str) -> InvalidSelectorException:
+        return _invalid(self.expression, message)
+
+    def peek(self, offset: int = 0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def accept(self, *operators) -> str:
+        kind, value = self.peek()
+        if kind == 'operator' and value in operators:
+            self.position += 1
+            return value
+        return None
+
+    def expect(self, operator: str) -> None:
+        if not self.accept(operator):
+            raise self.error(f"expected {operator!r}")
+
+    def parse(self):
+        if not self.tokens:
+            raise self.error("empty expression")
+        expression = self.parse_or()
+        if self.position != len(self.tokens):
+            raise self.error(f"unexpected {self.peek()[1]!r}")
+        return expression
+
+    def binary(self, operand, operators, combine):
+        def parse():
+            left = operand()
+            while True:
+                operator = self.accept(*operators)
+                if operator is None:
+                    return left
+                left = combine(operator, left, operand())
+        return parse()
+
+    def parse_or(self):
+        return self.binary(self.parse_and, ('or',),
+                           lambda operator, left, right:
+                           lambda context: _to_boolean(left(context)) or _to_boolean(right(context)))
+
+    def parse_and(self):
+        return self.binary(self.parse_equality, ('and',),
+                           lambda operator, left, right:
+                           lambda context: _to_boolean(left(context)) and _to_boolean(right(context)))
+
+    def parse_equality(self):
+        return self.binary(self.parse_relational, ('=', '!='), self.comparison)
+
+    def parse_relational(self):
+        return self.binary(self.parse_additive, ('<', '<=', '>', '>='), self.comparison)
+
+    @staticmethod
+    def comparison(operator, left, right):
+        return lambda context: _compare(operator, left(context), right(context))
+
+    def parse_additive(self):
+        return self.binary(self.parse_multiplicative, ('+', '-'), self.arithmetic)
+
+    def parse_multiplicative(self):
+        return self.binary(self.parse_unary, ('*op', 'div', 'mod'), self.arithmetic)
+
+    @staticmethod
+    def arithmetic(operator, left, right):
+        def evaluate(context):
+            a, b = _to_number(left(context)), _to_number(right(context))
+            if operator == '+':
+                return a + b
+            if operator == '-':
+                return a - b
+            if operator == '*op':
+                return a * b
+            if b == 0:
+                return math.nan if operator == 'mod' or a == 0 or math.isnan(a) else math.copysign(math.inf, a) * math.copysign(1, b)
+            return a / b if operator == 'div' else math.fmod(a, b)
+        return evaluate
+
+    def parse_unary(self):
+        if self.accept('-'):
+            operand = self.parse_unary()
+            return lambda context: -_to_number(operand(context))
+        return self.parse_union()
+
+    def parse_union(self):
+        def union(operator, left, right):
+            def evaluate(context):
+                a, b = left(context), right(context)
+                if not isinstance(a, list) or not isinstance(b, list):
+                    raise self.error("'|' needs node-sets on both sides")
+                return _document_order(a + b)
+            return evaluate
+        return self.binary(self.parse_path, ('|',), union)
+
+    def parse_path(self):
+        kind, value = self.peek()
+        starts_filter = kind in ('literal', 'number') or (kind == 'operator' and value == '(') or (
+            kind == 'name' and self.peek(1) == ('operator', '(') and value not in _NODE_TYPES)
+        if not starts_filter:
+            return self.parse_location_path()
+        primary = self.parse_filter()
+        if self.peek() not in (('operator', '/'), ('operator', '//')):
+            return primary
+        steps = self.parse_relative_steps(self.accept('/', '//'))
+        return lambda context: self.apply_steps(self.node_set(primary(context)), steps)
+
+    def node_set(self, value) -> list:
+        if not isinstance(value, list):
+            raise self.error("path step applied to a value that is not a node-set")
+        return value
+
+    def parse_filter(self):
+        kind, value = self.peek()
+        if kind == 'literal':
+            self.position += 1
+            primary = lambda context: value
+        elif kind == 'number':
+            self.position += 1
+            primary = lambda context: value
+        elif self.accept('('):
+            primary = self.parse_or()
+            self.expect(')')
+        else:
+            primary = self.parse_function()
+        predicates = self.parse_predicates()
+        if not predicates:
+            return primary
+
+        def evaluate(context):
+            nodes = self.node_set(primary(context))
+            for predicate in predicates:
+                nodes = self.filter(nodes, predicate)
+            return nodes
+        return evaluate
+
+    def parse_function(self):
+        _, name = self.peek()
+        self.position += 1
+        self.expect('(')
+        arguments = []
+        if not self.accept(')'):
+            arguments.append(self.parse_or())
+            while self.accept(','):
+                arguments.append(self.parse_or())
+            self.expect(')')
+        if name not in _FUNCTIONS:
+            raise self.error(f"unsupported function {name}()")
+        minimum, maximum, function = _FUNCTIONS[name]
+        if len(arguments) < minimum or (maximum is not None and len(arguments) > maximum):
+            raise self.error(f"wrong number of arguments to {name}()")
+        return lambda context: function(context, *(argument(context) for argument in arguments))
+
+    def parse_predicates(self) -> list:
+        predicates = []
+        while self.accept('['):
+            predicates.append(self.parse_or())
+            self.expect(']')
+        return predicates
+
+    @staticmethod
+    def filter(nodes: list, predicate) -> list:
+        kept = []
+        for position, node in enumerate(nodes, 1):
+            result = predicate(_Context(node, position, len(nodes)))
+            if isinstance(result, float) and not isinstance(result, bool):
+                if result == position:
+                    kept.append(node)
+            elif _to_boolean(result):
+                kept.append(node)
+        return kept
+
+    def parse_location_path(self):
+        separator = self.accept('/', '//')
+        if separator == '/' and not self.starts_step():
+            return lambda context: [_root(context.node)]
+        steps = self.parse_relative_steps(separator)
+        if separator:
+            return lambda context: self.apply_steps([_root(context.node)], steps)
+        return lambda context: self.apply_steps([context.node], steps)
+
+    def starts_step(self) -> bool:
+        kind, value = self.peek()
+        return kind == 'name' or (kind == 'operator' and value in ('.', '..', '@', '*'))
+
+    def parse_relative_steps(self, separator: str) -> list:
+        steps = []
+        if separator == '//':
+            steps.append(('descendant-or-self', 'node()', []))
+        steps.append(self.parse_step())
+        while True:
+            separator = self.accept('/', '//')
+            if separator is None:
+                return steps
+            if separator == '//':
+                steps.append(('descendant-or-self', 'node()', []))
+            steps.append(self.parse_step())
+
+    def parse_step(self) -> tuple:
+        if self.accept('.'):
+            return ('self', 'node()', [])
+        if self.accept('..'):
+            return ('parent', 'node()', [])
+        axis = 'child'
+        if self.accept('@'):
+            axis = 'attribute'
+        elif self.peek()[0] == 'name' and self.peek(1) == ('operator', '::'):
+            axis = self.peek()[1]
+            if axis not in _AXES:
+                raise self.error(f"unsupported axis {axis}")
+            self.position += 2
+        kind, value = self.peek()
+        if kind == 'operator' and value == '*':
+            self.position += 1
+            test = '*'
+        elif kind == 'name':
+            self.position += 1
+            test = value
+            if value in _NODE_TYPES and self.accept('('):
+                if value == 'processing-instruction' and self.peek()[0] == 'literal':
+                    self.position += 1
+                self.expect(')')
+                test = value + '()'
+        else:
+            raise self.error("expected a node test")
+        return (axis, test, self.parse_predicates())
+
+    def apply_steps(self, nodes: list, steps: list) -> list:
+        for axis, test, predicates in steps:
+            found = []
+            for node in nodes:
+                candidates = [candidate for candidate in _AXIS_NODES[axis](node)
+                              if self.node_test(candidate, axis, test)]
+                for predicate in predicates:
+                    candidates = self.filter(candidates, predicate)
+                found.extend(candidates)
+            nodes = _document_order(found) if len(nodes) > 1 or axis in _REVERSE_AXES else found
+        return nodes
+
+    @staticmethod
+    def node_test(node, axis: str, test: str) -> bool:
+        if test == 'node()':
+            return True
+        if test == 'text()':
+            return isinstance(node, Text)
+        if test.endswith('()'):
+            return False
+        if axis == 'attribute':
+            return test == '*' or node.name == test.lower()
+        if not isinstance(node, Element):
+            return False
+        return test == '*' or node.tag == test.lower()
+
+
+_compiled = {}
+
+
+def compile_xpath(expression: str):
+    """
+    Parse an XPath expression once; results are cached.
+    :return: function(node) -> node list, str, float or bool
+    :raises InvalidSelectorException: for malformed or unsupported expressions
+    """
+    evaluate = _compiled.get(expression)
+    if evaluate is None:
+        parsed = _Parser(expression).parse()
+
+        def evaluate(node):
+            return parsed(_Context(node))
+        _compiled[expression] = evaluate
+    return evaluate
+
+
+def evaluate(expression: str, node: Node):
+    """
+    Evaluate an XPath expression with node as the context node.
+    :return: node list in document order, str, float or bool
+    """
+    return compile_xpath(expression)(node)
+
+
+def select(node: Node, expression: str) -> list:
+    """
+    Elements selected by expression, as document.evaluate() returns them to Selenium.
+    :raises InvalidSelectorException: if the expression doesn't evaluate to elements only
+    """
+    result = evaluate(expression, node)
+    if not isinstance(result, list) or any(not isinstance(item, Element) for item in result):
+        raise _invalid(expression, "the result should be a set of elements")
+    return result
@@ -0,0 +1,126 @@
+"""
+Module containing helpers for streaming large request and response bodies in constant memory.
+"""
+import hashlib
+import time
+
+
+class TransferStats:
+    """
+    Running byte count, elapsed time and optional checksum of a streamed body.
+    Updated as each chunk passes through, so it can be read while the transfer is in progress.
+    """
+
+    def __init__(self, checksum: str = None, clock=time.monotonic):
+        """
+        :param checksum: (optional) hashlib algorithm name (e.g. 'sha256', 'md5') for a running checksum
+        :param clock: (optional) monotonic clock function
+        """
+        self.checksum_algorithm = checksum
+        self._hash = hashlib.new(checksum) if checksum else None
+        self._clock = clock
+        self.bytes = 0
+        self.chunks = 0
+        self.started = None
+        self.finished = None
+
+    def __repr__(self):
+        return f"<TransferStats {self.bytes} bytes in {self.seconds:.2f}s>"
+
+    def start(self) -> None:
+        """Start the clock, when the request is sent, so the time to the first byte is counted too."""
+        if self.started is None:
+            self.started = self.finished = self._clock()
+
+    def update(self, chunk: bytes) -> None:
+        """Account for one chunk."""
+        self.start()
+        self.finished = self._clock()
+        self.bytes += len(chunk)
+        self.chunks += 1
+        if self._hash is not None:
+            self._hash.update(chunk)
+
+    @property
+    def seconds(self) -> float:
+        if self.started is None:
+            return 0.0
+        return self.finished - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second (0 until time has elapsed)."""
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def checksum(self) -> str:
+        """Hex digest of the bytes transferred so far, or None if no algorithm was requested."""
+        return self._hash.hexdigest() if self._hash is not None else None
+
+
+def counted_chunks(chunks, stats: TransferStats):
+    """
+    Pass chunks through unchanged, accounting each one in stats.
+    :param chunks: iterable of bytes
+    :param stats: TransferStats to update
+    """
+    for chunk in chunks:
+        if chunk:
+            stats.update(chunk)
+            yield chunk
+
+
+class CountingReader:
+    """
+    File-like wrapper that accounts every read in a TransferStats.
+    Exposes __len__ when the size is known, so 'requests' sends a Content-Length instead of chunked encoding.
+    """
+
+    def __init__(self, file_object, stats: TransferStats, length: int = None, chunk_size: int = 64 * 1024):
+        self.file_object = file_object
+        self.stats = stats
+        self.length = length
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.file_object.read(size if size and size > 0 else self.chunk_size)
+        if chunk:
+            self.stats.update(chunk)
+        return chunk
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class ChunkStream:
+    """
+    Iterable over the body of a streamed response, in chunks of bounded size.
+    The response is closed once the stream is exhausted or closed.
+    """
+
+    def __init__(self, response, chunk_size: int, stats: TransferStats):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.stats = stats
+
+    def __iter__(self):
+        try:
+            yield from counted_chunks(self.response.iter_content(self.chunk_size), self.stats)
+        finally:
+            self.response.close()
+
+    def close(self) -> None:
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -6,47 +6,67 @@ Creates a driver instance based on various browser configurations.
 from selenium import webdriver
 from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 from .custom_selenium_driver import CustomSeleniumDriver
+from .retry_policy import RetryPolicy
 
 class WebDriverFactory:
     
-    def __init__(self, browser: str, base_url: str, webdriver = webdriver, remote: bool = False, remote_url: str = 'http://127.0.0.1:4444/wd/hub'):
+    def __init__(self, browser: str, base_url: str, webdriver = webdriver, remote: bool = False, remote_url: str = 'http://127.0.0.1:4444/wd/hub',
+                 page_load_strategy: str = None, pages: dict = None):
         """
         Initialize WebDriverFactory class.
-        :param browser: specified browser.
+        :param browser: specified browser; 'simulated' runs pages in-process without a browser, see SimulatedWebDriver
         :param base_url: entry page URL
+        :param page_load_strategy: (optional) 'normal', 'eager' or 'none': how long navigation commands block,
+            see BasePage.goto() readiness
+        :param pages: (optional) {url: html} served by the 'simulated' browser
         """
         self.browser = browser
         self.base_url = base_url
         self.webdriver = webdriver
         self.remote = remote
         self.remote_url = remote_url
+        self.pages = pages
 
         self.desired_capabilities: DesiredCapabilities = {
             'chrome': DesiredCapabilities.CHROME,
             'firefox': DesiredCapabilities.FIREFOX,
             'IE': DesiredCapabilities.INTERNETEXPLORER,
         }.get(browser, DesiredCapabilities.CHROME)
+        self.page_load_strategy = page_load_strategy
+        if page_load_strategy is not None:
+            self.desired_capabilities = dict(self.desired_capabilities, pageLoadStrategy=page_load_strategy)
 
-    def get_webdriver_instance(self, waiting_time: int = 5) -> CustomSeleniumDriver:
+    def get_webdriver_instance(self, waiting_time: int = 5, retry_policy: RetryPolicy = None,
+                               event_driven_waits: bool = False, screenshot_root: str = None) -> CustomSeleniumDriver:
         """
         Get WebDriver Instance based on the browser configuration.
         :param waiting_time: Implicit wait time for all elements on a web page.
+        :param retry_policy: (optional) RetryPolicy for element actions on this driver.
+        :param event_driven_waits: (optional) use in-page MutationObserver waits instead of polling.
+        :param screenshot_root: (optional) directory take_screen_shot() writes under.
         :return: Webdriver instance.
         """
-        if self.remote:
+        if self.browser == "simulated":
+            # Imported here so real-browser sessions don't load the simulated DOM
+            from .simulated_driver import SimulatedWebDriver
+            driver = SimulatedWebDriver(self.pages)
+        elif self.remote:
             driver = self.webdriver.Remote(
                 command_executor=self.remote_url,
                 desired_capabilities=self.desired_capabilities)
         else:
+            # Only pass capabilities when they differ from each browser's defaults
+            options = {'desired_capabilities': self.desired_capabilities} if self.page_load_strategy else {}
             if self.browser == "firefox":
-                driver = self.webdriver.Firefox()
+                driver = self.webdriver.Firefox(**options)
             elif self.browser == "IE":
-                driver = self.webdriver.Ie()
+                driver = self.webdriver.Ie(**options)
             else:
-                driver = self.webdriver.Chrome()
+                driver = self.webdriver.Chrome(**options)
                 driver.set_window_size(1920, 1080)
 
         driver.implicitly_wait(waiting_time)
         driver.get(self.base_url)
 
-        return CustomSeleniumDriver(driver, implicit_wait=waiting_time)
+        return CustomSeleniumDriver(driver, implicit_wait=waiting_time, retry_policy=retry_policy,
+                                    event_driven_waits=event_driven_waits, screenshot_root=screenshot_root)
@@ -0,0 +1,270 @@
+"""
+Package: Base
+WebDriverPool class implementation.
+Keeps warm browser sessions created by a WebDriverFactory and leases them to tests.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Condition
+from selenium.common.exceptions import WebDriverException
+from .custom_selenium_driver import CustomSeleniumDriver
+
+
+class WebDriverPoolTimeout(Exception):
+    """Raised when no session becomes available within the lease timeout."""
+
+
+class PooledSession:
+    """Bookkeeping for one pooled CustomSeleniumDriver."""
+
+    def __init__(self, driver: CustomSeleniumDriver, created_at: float):
+        self.driver = driver
+        self.created_at = created_at
+        self.uses = 0
+
+
+class WebDriverPool:
+    """
+    Thread-safe pool of warm CustomSeleniumDriver sessions.
+    Sessions are health-checked when leased, reset cheaply when returned (cookies, storage, extra windows,
+    about:blank) and retired after max_lifetime seconds or max_uses leases.
+    Each process owns its own sessions: a pool inherited through fork discards the parent's sessions on first use,
+    and an optional multiprocessing semaphore caps the number of browsers across processes.
+    """
+
+    def __init__(self, factory, size: int = 2, prestart: int = None, waiting_time: int = 5,
+                 max_lifetime: float = None, max_uses: int = None, lease_timeout: float = 60,
+                 reset_url: str = 'about:blank', process_semaphore=None, clock=time.monotonic):
+        """
+        Initializes WebDriverPool and starts prestart sessions.
+        :param factory: WebDriverFactory used to create sessions
+        :param size: (optional) maximum number of sessions in this process
+        :param prestart: (optional) number of sessions to start immediately (default: size)
+        :param waiting_time: (optional) implicit wait passed to the factory
+        :param max_lifetime: (optional) seconds after which a session is retired on return
+        :param max_uses: (optional) number of leases after which a session is retired on return
+        :param lease_timeout: (optional) default seconds lease() waits for a free session
+        :param reset_url: (optional) page a returned session is parked on
+        :param process_semaphore: (optional) multiprocessing.(Bounded)Semaphore shared by worker processes,
+            acquired for every live browser
+        :param clock: (optional) monotonic clock function
+        """
+        self.factory = factory
+        self.size = size
+        self.waiting_time = waiting_time
+        self.max_lifetime = max_lifetime
+        self.max_uses = max_uses
+        self.lease_timeout = lease_timeout
+        self.reset_url = reset_url
+        self.process_semaphore = process_semaphore
+        self.clock = clock
+        self._init_process_state()
+        self.start(size if prestart is None else prestart)
+
+    def _init_process_state(self):
+        self._pid = os.getpid()
+        self._condition = Condition()
+        self._idle = []
+        self._leased = {}
+        self._total = 0
+        self._closed = False
+        self._stats = {'leases': 0, 'reuses': 0, 'created': 0, 'retired': 0, 'replaced': 0,
+                       'lease_wait_seconds': 0.0, 'max_lease_wait_seconds': 0.0}
+
+    def _check_process(self):
+        # After a fork the inherited sessions belong to the parent process: forget them without quitting
+        if os.getpid() != self._pid:
+            self._init_process_state()
+
+    def start(self, count: int) -> None:
+        """
+        Start sessions concurrently until count are idle (bounded by size).
+        :param count: number of idle sessions wanted
+        """
+        self._check_process()
+        with self._condition:
+            count = min(count - len(self._idle), self.size - self._total)
+            self._total += max(count, 0)
+        if count <= 0:
+            return
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(self._create) for _ in range(count)]
+        errors = []
+        for future in futures:
+            with self._condition:
+                try:
+                    self._idle.append(future.result())
+                except Exception as error:
+                    self._total -= 1
+                    errors.append(error)
+                self._condition.notify()
+        if errors:
+            raise errors[0]
+
+    def _create(self) -> PooledSession:
+        if self.process_semaphore is not None:
+            self.process_semaphore.acquire()
+        try:
+            driver = self.factory.get_webdriver_instance(self.waiting_time)
+        except Exception:
+            if self.process_semaphore is not None:
+                self.process_semaphore.release()
+            raise
+        with self._condition:
+            self._stats['created'] += 1
+        return PooledSession(driver, self.clock())
+
+    def _destroy(self, session: PooledSession) -> None:
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+        finally:
+            if self.process_semaphore is not None:
+                self.process_semaphore.release()
+
+    def _is_healthy(self, session: PooledSession) -> bool:
+        try:
+            session.driver.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def lease(self, timeout: float = None) -> CustomSeleniumDriver:
+        """
+        Lease a healthy session, starting one if the pool is below size, else waiting for a return.
+        :param timeout: (optional) seconds to wait for a free session (default: lease_timeout)
+        :return: CustomSeleniumDriver
+        :raises WebDriverPoolTimeout: if no session becomes available in time
+        """
+        self._check_process()
+        timeout = self.lease_timeout if timeout is None else timeout
+        start = self.clock()
+        deadline = start + timeout
+        while True:
+            session = None
+            create = False
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError("WebDriverPool is closed")
+                while not self._idle and self._total >= self.size:
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        raise WebDriverPoolTimeout(f"No WebDriver session available after {timeout}s")
+                    self._condition.wait(remaining)
+                if self._idle:
+                    session = self._idle.pop()
+                else:
+                    self._total += 1
+                    create = True
+
+            if create:
+                try:
+                    session = self._create()
+                except Exception:
+                    with self._condition:
+                        self._total -= 1
+                        self._condition.notify()
+                    raise
+            elif not self._is_healthy(session):
+                # Crashed browser: drop it and loop to lease (or create) another
+                self._destroy(session)
+                with self._condition:
+                    self._total -= 1
+                    self._stats['replaced'] += 1
+                    self._condition.notify()
+                continue
+
+            waited = self.clock() - start
+            with self._condition:
+                session.uses += 1
+                self._leased[id(session.driver)] = session
+                self._stats['leases'] += 1
+                self._stats['reuses'] += int(session.uses > 1)
+                self._stats['lease_wait_seconds'] += waited
+                self._stats['max_lease_wait_seconds'] = max(self._stats['max_lease_wait_seconds'], waited)
+            return session.driver
+
+    def release(self, driver: CustomSeleniumDriver, discard: bool = False) -> None:
+        """
+        Return a leased session, resetting it for the next lease or retiring it.
+        :param driver: CustomSeleniumDriver obtained from lease()
+        :param discard: (optional) quit the session instead of reusing it (e.g. after a browser crash)
+        """
+        self._check_process()
+        with self._condition:
+            session = self._leased.pop(id(driver), None)
+        if session is None:
+            raise ValueError("Driver was not leased from this pool")
+
+        expired = (self.max_lifetime is not None and self.clock() - session.created_at >= self.max_lifetime) or \
+                  (self.max_uses is not None and session.uses >= self.max_uses)
+        if discard or expired or self._closed or not self._reset(session.driver):
+            self._destroy(session)
+            with self._condition:
+                self._total -= 1
+                self._stats['retired'] += 1
+                self._condition.notify()
+            return
+
+        with self._condition:
+            self._idle.append(session)
+            self._condition.notify()
+
+    def _reset(self, driver: CustomSeleniumDriver) -> bool:
+        """Close extra windows, clear storage and cookies and park on reset_url. Returns False if the session broke."""
+        try:
+            handles = driver.driver.window_handles
+            for handle in handles[1:]:
+                driver.driver.switch_to.window(handle)
+                driver.driver.close()
+            driver.driver.switch_to.window(handles[0])
+            try:
+                driver.execute_script('window.localStorage.clear(); window.sessionStorage.clear();')
+            except WebDriverException:
+                # Pages such as about:blank or data: URLs have no accessible storage
+                pass
+            driver.delete_all_cookies()
+            driver.get(self.reset_url)
+            return True
+        except WebDriverException:
+            return False
+
+    @contextmanager
+    def session(self, timeout: float = None):
+        """
+        Context manager leasing a session and returning it afterwards.
+        :param timeout: (optional) seconds to wait for a free session
+        """
+        driver = self.lease(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def stats(self) -> dict:
+        """Counters: leases, reuses, created, retired, replaced, lease wait seconds (total and max), idle, in_use."""
+        with self._condition:
+            stats = dict(self._stats)
+            stats.update(idle=len(self._idle), in_use=len(self._leased))
+            return stats
+
+    def close(self) -> None:
+        """Quit idle sessions; leased sessions are quit when released."""
+        self._check_process()
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._condition.notify_all()
+        for session in idle:
+            self._destroy(session)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,6 +1,47 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from .Base import custom_selenium_driver, BasePage, WebDriverFactory
-from .Base import ExtendedWebElement, BaseHttpEndpoint
-from .Base import wait_until
+from typing import TYPE_CHECKING
+from ._lazy import lazy_exports
+
+# Public names and the modules defining them, imported on first access so that
+# 'import vorpal' does not load Selenium until a browser-facing name is used
+_EXPORTS = {
+    'webdriver': ('selenium.webdriver', None),
+    'By': ('selenium.webdriver.common.by', 'By'),
+    'Keys': ('selenium.webdriver.common.keys', 'Keys'),
+    'custom_selenium_driver': ('.Base.custom_selenium_driver', None),
+    'BasePage': ('.Base.page', 'BasePage'),
+    'WebDriverFactory': ('.Base.webdriver_factory', 'WebDriverFactory'),
+    'WebDriverPool': ('.Base.webdriver_pool', 'WebDriverPool'),
+    'SimulatedWebDriver': ('.Base.simulated_driver', 'SimulatedWebDriver'),
+    'Cassette': ('.Base.cassette', 'Cassette'),
+    'ExtendedWebElement': ('.Base.element', 'ExtendedWebElement'),
+    'Locator': ('.Base.locator', 'Locator'),
+    'ElementSnapshot': ('.Base.element_snapshot', 'ElementSnapshot'),
+    'ElementCollection': ('.Base.element_collection', 'ElementCollection'),
+    'BaseHttpEndpoint': ('.Base.base_http_endpoint', 'BaseHttpEndpoint'),
+    'AsyncHttpEndpoint': ('.Base.async_http_endpoint', 'AsyncHttpEndpoint'),
+    'RetryPolicy': ('.Base.retry_policy', 'RetryPolicy'),
+    'RetryStatistics': ('.Base.retry_policy', 'RetryStatistics'),
+    'RetryTimeoutException': ('.Base.retry_policy', 'RetryTimeoutException'),
+    'wait_until': ('.Base.expected_condition', 'wait_until'),
+    'wait_any': ('.Base.expected_condition', 'wait_any'),
+    'wait_all': ('.Base.expected_condition', 'wait_all'),
+    'WaitResult': ('.Base.expected_condition', 'WaitResult'),
+    'WaitTimeoutException': ('.Base.expected_condition', 'WaitTimeoutException'),
+    'Instrumentation': ('.Base.instrumentation', 'Instrumentation'),
+    'CommandBudgetExceeded': ('.Base.command_budget', 'CommandBudgetExceeded'),
+    'within_budget': ('.Base.command_budget', 'within_budget'),
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    from .Base import custom_selenium_driver, BasePage, WebDriverFactory, WebDriverPool, SimulatedWebDriver
+    from .Base import ExtendedWebElement, ElementSnapshot, ElementCollection, BaseHttpEndpoint, AsyncHttpEndpoint
+    from .Base import RetryPolicy, RetryStatistics, RetryTimeoutException
+    from .Base import wait_until, wait_any, wait_all, WaitResult, WaitTimeoutException
+    from .Base import Instrumentation, Locator, Cassette
+    from .Base import CommandBudgetExceeded, within_budget
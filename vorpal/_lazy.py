@@ -0,0 +1,32 @@
+"""
+Module containing the lazy attribute loader used by the package __init__ modules.
+Public names are imported on first access (PEP 562), so 'import vorpal' stays cheap and an HTTP-only user
+never pays for importing the Selenium browser bindings.
+"""
+from importlib import import_module
+
+
+def lazy_exports(package: str, exports: dict):
+    """
+    Build the module-level __getattr__ and __dir__ for a package with lazily imported names.
+    :param package: __name__ of the package, used to resolve relative module paths
+    :param exports: {public name: (module path, attribute name or None for the module itself)}
+    :return: (__getattr__, __dir__) functions to assign in the package namespace
+    """
+    namespace = import_module(package).__dict__
+
+    def __getattr__(name):
+        try:
+            module_path, attribute = exports[name]
+        except KeyError:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}") from None
+        module = import_module(module_path, package)
+        value = module if attribute is None else getattr(module, attribute)
+        # Cache in the package so later lookups skip __getattr__ entirely
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__